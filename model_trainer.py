@@ -1,59 +1,91 @@
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import RobustScaler
-from sklearn.linear_model import BayesianRidge
-from sklearn.model_selection import LeaveOneOut, cross_val_score
-import joblib
-import pandas as pd
-import numpy as np
-
-class ModelTrainer:
-    def __init__(self):
-        self.model = None
-        self.feature_importance = None
-    
-    def train_model(self, X, y):
-        """Treina o modelo preditivo"""
-        pipeline = Pipeline([
-            ('scaler', RobustScaler()),
-            ('regressor', BayesianRidge())
-        ])
-        
-        # Validação cruzada Leave-One-Out para pequenos datasets
-        loo = LeaveOneOut()
-        cv_scores = cross_val_score(pipeline, X, y, cv=loo, scoring='r2')
-        print(f"Performance CV: R² médio = {np.mean(cv_scores):.2f} (±{np.std(cv_scores):.2f})")
-        
-        # Treinamento final
-        pipeline.fit(X, y)
-        self.model = pipeline
-        
-        # Calcula importância das features
-        self._calculate_feature_importance(X.columns)
-        
-        return pipeline
-    
-    def _calculate_feature_importance(self, feature_names):
-        """Calcula a importância das features para o modelo treinado"""
-        if hasattr(self.model.named_steps['regressor'], 'coef_'):
-            coefs = self.model.named_steps['regressor'].coef_
-            self.feature_importance = pd.DataFrame({
-                'Feature': feature_names,
-                'Coefficient': coefs
-            }).sort_values('Coefficient', ascending=False)
-    
-    def save_model(self, filepath):
-        """Salva o modelo treinado em disco"""
-        if self.model is not None:
-            joblib.dump(self.model, filepath)
-            print(f"Modelo salvo em {filepath}")
-        else:
-            raise ValueError("Nenhum modelo treinado para salvar")
-    
-    def load_model(self, filepath):
-        """Carrega um modelo salvo"""
-        self.model = joblib.load(filepath)
-        return self.model
-    
-    def get_feature_importance(self):
-        """Retorna a importância das features"""
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import RobustScaler
+from sklearn.linear_model import BayesianRidge
+from sklearn.model_selection import KFold, cross_val_score
+import joblib
+import pandas as pd
+import numpy as np
+
+class ModelTrainer:
+    def __init__(self):
+        self.model = None
+        self.feature_importance = None
+    
+    def train_model(self, X, y):
+        """Treina o modelo preditivo"""
+        pipeline = Pipeline([
+            ('scaler', RobustScaler()),
+            ('regressor', BayesianRidge())
+        ])
+        
+        # Treinamento final; o mesmo ajuste serve ao Leave-One-Out em forma fechada
+        pipeline.fit(X, y)
+        self.model = pipeline
+        
+        # K-fold (em cópias do pipeline) só quando a forma fechada não é válida
+        loo_r2 = self._fast_loo_r2(pipeline, X, y)
+        if loo_r2 is not None:
+            print(f"Performance LOO (PRESS): R² = {loo_r2:.2f}")
+        else:
+            cv = KFold(n_splits=5, shuffle=True, random_state=42)
+            cv_scores = cross_val_score(pipeline, X, y, cv=cv, scoring='r2')
+            print(f"Performance CV: R² médio = {np.mean(cv_scores):.2f} (±{np.std(cv_scores):.2f})")
+        
+        # Calcula importância das features
+        self._calculate_feature_importance(X.columns)
+        
+        return pipeline
+    
+    def _fast_loo_r2(self, pipeline, X, y):
+        """
+        R² Leave-One-Out pela identidade PRESS, a partir do pipeline já ajustado.
+        
+        Com o scaler e os hiperparâmetros (alpha, lambda) do BayesianRidge fixos,
+        o modelo é uma regressão ridge com intercepto, e o resíduo LOO de cada
+        amostra é e_i / (1 - h_ii), onde h_ii é a diagonal da matriz hat.
+        R² = 1 - PRESS / soma dos quadrados totais.
+        Retorna None quando a aproximação não é válida (poucas amostras ou
+        alavancagem ~1), para que seja usado K-fold.
+        """
+        X_scaled = pipeline.named_steps['scaler'].transform(X)
+        regressor = pipeline.named_steps['regressor']
+        y = np.asarray(y, dtype=float)
+        n_samples, n_features = X_scaled.shape
+        if n_samples <= n_features + 1:
+            return None
+        
+        X_centered = X_scaled - X_scaled.mean(axis=0)
+        gram = X_centered.T @ X_centered + (regressor.lambda_ / regressor.alpha_) * np.eye(n_features)
+        leverage = 1.0 / n_samples + np.einsum('ij,ij->i', X_centered @ np.linalg.pinv(gram), X_centered)
+        if leverage.max() >= 1 - 1e-8:
+            return None
+        
+        residuals = y - regressor.predict(X_scaled)
+        press = np.sum((residuals / (1 - leverage)) ** 2)
+        return 1 - press / np.sum((y - y.mean()) ** 2)
+    
+    def _calculate_feature_importance(self, feature_names):
+        """Calcula a importância das features para o modelo treinado"""
+        if hasattr(self.model.named_steps['regressor'], 'coef_'):
+            coefs = self.model.named_steps['regressor'].coef_
+            self.feature_importance = pd.DataFrame({
+                'Feature': feature_names,
+                'Coefficient': coefs
+            }).sort_values('Coefficient', ascending=False)
+    
+    def save_model(self, filepath):
+        """Salva o modelo treinado em disco"""
+        if self.model is not None:
+            joblib.dump(self.model, filepath)
+            print(f"Modelo salvo em {filepath}")
+        else:
+            raise ValueError("Nenhum modelo treinado para salvar")
+    
+    def load_model(self, filepath):
+        """Carrega um modelo salvo"""
+        self.model = joblib.load(filepath)
+        return self.model
+    
+    def get_feature_importance(self):
+        """Retorna a importância das features"""
         return self.feature_importance.copy()
\ No newline at end of file
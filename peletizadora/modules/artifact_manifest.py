@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+from config import MANIFEST_PATH
+
+# Etapas do pipeline em threads diferentes podem registrar no mesmo manifesto
+_lock = threading.Lock()
+
+
+class ArtifactManifest:
+    """
+    Registro dos artefatos gerados (gráficos e relatórios): para cada chave
+    (hash das entradas que produziram os arquivos), a lista de arquivos salvos.
+
+    Um artefato cuja chave já está no manifesto e cujos arquivos ainda existem
+    não precisa ser gerado de novo. Apague o manifesto para forçar a regeração.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def outputs(self, key):
+        """Arquivos gerados com esta chave, ou None se a chave é nova ou algum arquivo sumiu"""
+        paths = self._read().get(key)
+        if not paths or not all(os.path.exists(path) for path in paths):
+            return None
+        return paths
+
+    def record(self, key, paths):
+        """Registra os arquivos gerados com a chave; entradas antigas dos mesmos arquivos são removidas"""
+        paths = [str(path) for path in paths]
+        if not paths:
+            return
+        with _lock:
+            # Relê o arquivo antes de gravar: outras instâncias (relatórios, gráficos) podem ter registrado entradas
+            entries = {k: v for k, v in self._read().items() if not set(v) & set(paths)}
+            entries[key] = paths
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(self.path + '.tmp', self.path)
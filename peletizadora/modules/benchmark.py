@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import (BENCHMARK_DIR, BENCHMARK_SIZES, BENCHMARK_TRAIN_ROWS, BENCHMARK_SEARCH_CANDIDATES,
+                    BENCHMARK_BATCH_ROWS, BENCHMARK_LATENCY_READINGS, BENCHMARK_TOLERANCE, MODEL_DIR)
+
+MODEL_TYPES = ['bayesian', 'random_forest', 'gradient_boosting']
+STAGES = ['load', 'preprocess', 'train', 'predict', 'plot']
+
+# Colunas do historiador (mesmo esquema e ordem do Novo.csv): média, desvio, mínimo e máximo
+SYNTHETIC_SCHEMA = {
+    'Pres Vapor Caldeira': (8.8, 0.4, 7.0, 10.5),
+    'Tx Compressao Matriz': (18.6, 0.3, 17.5, 19.0),
+    'Afastamento Rolos': (0.2, 0.4, 0.0, 2.0),
+    'Amperagem Condicionador': (42.0, 5.0, 30.0, 60.0),
+    'Velocidade Alimentador': (58.0, 12.0, 30.0, 85.0),
+    'Porc Temp Condicionador': (76.0, 3.5, 65.0, 86.0),
+    'Pressao Vapor': (1.6, 0.2, 1.0, 2.2),
+    'Amperagem Peletizadora': (635.0, 15.0, 590.0, 680.0),
+}
+
+# Métricas em que um valor maior é uma piora (as demais, como vazão, pioram quando caem)
+LOWER_IS_BETTER = ('wall_s', 'peak_rss_mb', 'p50_ms', 'p99_ms')
+HIGHER_IS_BETTER = ('rows_per_s', 'batch_rows_per_s', 'pkl_batch_rows_per_s')
+
+
+def generate_synthetic_csv(path, n_rows, seed=0, chunk_rows=1_000_000):
+    """
+    Gera um CSV sintético no formato do historiador (separador ';', decimal ','),
+    escrito em blocos para que 10 milhões de linhas não precisem caber na memória.
+    PDI e Finos dependem das variáveis de processo, com ruído, ~1% de outliers e ~0,5% de faltantes.
+    """
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < n_rows:
+        n = min(chunk_rows, n_rows - written)
+        data = {}
+        for name, (mean, std, lower, upper) in SYNTHETIC_SCHEMA.items():
+            data[name] = np.clip(rng.normal(mean, std, n), lower, upper)
+        data['Afastamento Rolos'] = np.round(data['Afastamento Rolos'])
+        finos = (14 + 0.08 * (data['Velocidade Alimentador'] - 58) - 0.25 * (data['Porc Temp Condicionador'] - 76)
+                 + rng.normal(0, 2.5, n))
+        pdi = (81.5 - 0.55 * (finos - 14) + 0.04 * (data['Amperagem Peletizadora'] - 635)
+               - 0.05 * (data['Velocidade Alimentador'] - 58) + 2.0 * (data['Tx Compressao Matriz'] - 18.6)
+               + rng.normal(0, 1.5, n))
+        data['Porc Finos Tyl6'] = np.clip(finos, 2, 35)
+        data['Porc Pdi Tyl6'] = np.clip(pdi, 60, 95)
+        values = np.column_stack(list(data.values()))
+        outliers = rng.random(values.shape) < 0.01
+        values[outliers] *= rng.choice([0.1, 10.0], size=outliers.sum())
+        values[rng.random(values.shape) < 0.005] = np.nan
+        frame = pd.DataFrame(values, columns=list(data))
+        frame.to_csv(path, sep=';', decimal=',', index=False, float_format='%.4f',
+                     mode='w' if written == 0 else 'a', header=(written == 0), encoding='utf-8')
+        written += n
+    return path
+
+
+def synthetic_data(n_rows, data_dir):
+    """Caminho do CSV sintético com n_rows linhas, gerado na primeira vez (semente fixa)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_{n_rows}.csv")
+    if not os.path.exists(path):
+        print(f"Gerando dados sintéticos com {n_rows} linhas em {path}")
+        generate_synthetic_csv(path + '.tmp', n_rows)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB); None onde o módulo resource não existe (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _load(data_path, use_cache=True):
+    from data_processor import DataProcessor
+    processor = DataProcessor(data_path)
+    if not processor.load_data(use_cache=use_cache):
+        raise ValueError(f"Não foi possível carregar {data_path}")
+    return processor
+
+
+def _training_data(data_path):
+    processor = _load(data_path)
+    df = processor.preprocess_data()
+    if len(df) > BENCHMARK_TRAIN_ROWS:
+        df = df.sample(BENCHMARK_TRAIN_ROWS, random_state=0)
+    return processor, df.drop(['PDI', 'Finos'], axis=1), df['PDI']
+
+
+def stage_load(data_path, model_type=None):
+    """Leitura do CSV sem cache (o cache colunar é medido indiretamente nas outras etapas)"""
+    started = time.perf_counter()
+    processor = _load(data_path, use_cache=False)
+    wall = time.perf_counter() - started
+    return {'wall_s': wall, 'rows': len(processor.df), 'rows_per_s': len(processor.df) / wall}
+
+
+def stage_preprocess(data_path, model_type=None):
+    processor = _load(data_path)
+    started = time.perf_counter()
+    df = processor.preprocess_data()
+    wall = time.perf_counter() - started
+    return {'wall_s': wall, 'rows': len(df), 'rows_per_s': len(df) / wall}
+
+
+def stage_train(data_path, model_type):
+    """Treino com busca random de poucos candidatos; salva o modelo usado pela etapa predict"""
+    from model_trainer import ModelTrainer
+    processor, X, y = _training_data(data_path)
+    trainer = ModelTrainer(model_type=model_type, search='random', n_candidates=BENCHMARK_SEARCH_CANDIDATES)
+    started = time.perf_counter()
+    trainer.train_model(X, y)
+    wall = time.perf_counter() - started
+    trainer.save_model(f'pdi_model_{model_type}.pkl')
+    trainer.export_compact(f'pdi_model_{model_type}.npz')
+    processor.preprocessor.save(os.path.join(MODEL_DIR, 'preprocessor.npz'))
+    return {'wall_s': wall, 'rows': len(X), 'rows_per_s': len(X) / wall}
+
+
+def _batch_wall(monitor, frame):
+    started = time.perf_counter()
+    for start in range(0, len(frame), 100_000):
+        monitor.predict_batch(frame.iloc[start:start + 100_000])
+    return time.perf_counter() - started
+
+
+def stage_predict(data_path, model_type):
+    """
+    Latência de uma leitura (p50/p99) e vazão do lote no PDIMonitor, com o modelo salvo pela etapa train:
+    no formato compacto (.npz, preditor compilado) e no .pkl (lotes grandes de árvores no sklearn)
+    """
+    from monitoring_system import PDIMonitor
+    model_path = os.path.join(MODEL_DIR, f'pdi_model_{model_type}.npz')
+    if not os.path.exists(model_path):
+        raise ValueError(f"Modelo {model_type} não encontrado: inclua a etapa train antes de predict")
+    processor = _load(data_path)
+    preprocessor_path = os.path.join(MODEL_DIR, 'preprocessor.npz')
+    monitor = PDIMonitor(model_path, preprocessor_path, optimize_setpoints=False)
+    readings = processor.df.head(BENCHMARK_LATENCY_READINGS).to_dict('records')
+    for reading in readings[:10]:
+        monitor.predict_pdi(reading)
+    timings = []
+    for reading in readings:
+        started = time.perf_counter()
+        monitor.predict_pdi(reading)
+        timings.append(time.perf_counter() - started)
+
+    frame = processor.df.head(BENCHMARK_BATCH_ROWS)
+    wall = _batch_wall(monitor, frame)
+    pkl_wall = _batch_wall(PDIMonitor(model_path[:-len('.npz')] + '.pkl', preprocessor_path,
+                                      optimize_setpoints=False), frame)
+    return {
+        'wall_s': wall,
+        'rows': len(frame),
+        'p50_ms': 1000 * float(np.percentile(timings, 50)),
+        'p99_ms': 1000 * float(np.percentile(timings, 99)),
+        'batch_rows_per_s': len(frame) / wall,
+        'pkl_batch_rows_per_s': len(frame) / pkl_wall,
+    }
+
+
+def stage_plot(data_path, model_type=None):
+    """Figuras da análise exploratória, em sequência no próprio processo (backend Agg)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from exploratory_analysis import ExploratoryAnalysis
+    df = _load(data_path).preprocess_data()
+    started = time.perf_counter()
+    explorer = ExploratoryAnalysis(df)
+    figures = len(explorer.plot_distributions(save=True))
+    explorer.plot_correlation_matrix(save=True)
+    figures += 1 + len(explorer.plot_key_relationships(save=True))
+    wall = time.perf_counter() - started
+    return {'wall_s': wall, 'rows': len(df), 'figures': figures, 'rows_per_s': len(df) / wall}
+
+
+def run_stage(stage, data_path, model_type=None, workdir='.', timeout=None):
+    """
+    Executa uma etapa em um processo novo, com diretório de trabalho próprio
+    (MODEL_DIR, PLOT_DIR e CACHE_DIR relativos a workdir), para medir o pico
+    de memória só daquela etapa. Retorna o dicionário de métricas.
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--run-stage', stage, '--data', os.path.abspath(data_path)]
+    if model_type:
+        command += ['--model', model_type]
+    os.makedirs(workdir, exist_ok=True)
+    completed = subprocess.run(command, cwd=workdir, capture_output=True, text=True, timeout=timeout)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Etapa {stage} falhou:\n{completed.stderr[-2000:]}")
+    # A última linha da saída é o JSON com as métricas (as anteriores são mensagens dos módulos)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, stages=STAGES, model_types=MODEL_TYPES, output_dir=BENCHMARK_DIR,
+                   repeats=1):
+    """
+    Executa cada etapa para cada tamanho (e tipo de modelo, em train/predict) e retorna o resultado completo.
+    Com repeats > 1, cada etapa roda várias vezes e fica a execução mais rápida (menos ruído na comparação).
+    """
+    output_dir = os.path.abspath(output_dir)
+    results = []
+    for n_rows in sizes:
+        data_path = synthetic_data(n_rows, os.path.join(output_dir, 'data'))
+        workdir = os.path.join(output_dir, f'work_{n_rows}')
+        for stage in stages:
+            for model_type in (model_types if stage in ('train', 'predict') else [None]):
+                label = f"{stage}" + (f" [{model_type}]" if model_type else "")
+                print(f"{n_rows} linhas - {label}...", flush=True)
+                runs = [run_stage(stage, data_path, model_type, workdir) for _ in range(repeats)]
+                metrics = min(runs, key=lambda run: run['wall_s'])
+                results.append({'rows': n_rows, 'stage': stage, 'model': model_type, **metrics})
+                print("  " + ", ".join(f"{key}={value:.4g}" for key, value in metrics.items()
+                                       if isinstance(value, float)), flush=True)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=BENCHMARK_TOLERANCE):
+    """Regressões em relação à referência: lista de mensagens para métricas que pioraram mais que tolerance"""
+    reference = {(r['rows'], r['stage'], r['model']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = reference.get((result['rows'], result['stage'], result['model']))
+        if old is None:
+            continue
+        label = f"{result['stage']}" + (f" [{result['model']}]" if result['model'] else "") + f" {result['rows']} linhas"
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None or old_value <= 0:
+                continue
+            change = new_value / old_value - 1 if metric in LOWER_IS_BETTER else old_value / new_value - 1
+            if change > tolerance:
+                regressions.append(f"{label}: {metric} {old_value:.4g} -> {new_value:.4g} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de PDI (carga, pré-processamento, "
+                                                 "treino, previsão e gráficos)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=BENCHMARK_SIZES, help="Linhas dos dados sintéticos")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--models', nargs='+', choices=MODEL_TYPES, default=MODEL_TYPES)
+    parser.add_argument('--repeats', type=int, default=1, help="Execuções de cada etapa (fica a mais rápida)")
+    parser.add_argument('--output', default=None, help="Arquivo JSON de resultados (padrão: BENCHMARK_DIR/benchmark_<data>.json)")
+    parser.add_argument('--baseline', default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+                        help="Piora relativa máxima aceita antes de falhar (0.2 = 20%%)")
+    parser.add_argument('--run-stage', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--data', help=argparse.SUPPRESS)
+    parser.add_argument('--model', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        # Processo filho: executa uma etapa e imprime as métricas como a última linha
+        metrics = globals()[f'stage_{args.run_stage}'](args.data, args.model)
+        metrics['peak_rss_mb'] = peak_rss_mb()
+        print(json.dumps(metrics))
+        return
+
+    report = run_benchmarks(args.sizes, args.stages, args.models, repeats=args.repeats)
+    output = args.output or os.path.join(BENCHMARK_DIR, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados salvos em {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressões acima de {args.tolerance:.0%}:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print(f"\nSem regressões acima de {args.tolerance:.0%} em relação a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,89 @@
-# Caminhos padrão e limites de controle
-
-# Caminho para os dados de entrada
-DATA_PATH = "data/Novo.csv"
-
-# Caminho onde os modelos serão salvos
-MODEL_DIR = "output/models"
-
-# Caminho para salvar relatórios e gráficos
-REPORT_DIR = "output/reports"
-PLOT_DIR = "output/plots"
-
-# Limites de controle operacionais (podem ser usados no monitoramento)
-CONTROL_LIMITS = {
-    'Amperagem_Peletizadora': (630, 660),
-    'Taxa_Compressao': (18.8, 19.0),
-    'Velocidade_Alimentador': (35, 60)
-}
-
-# Threshold para considerar uma variável importante
-IMPORTANCE_THRESHOLD = 0.05
+# Caminhos padrão e limites de controle
+
+# Caminho para os dados de entrada
+DATA_PATH = "data/Novo.csv"
+
+# Caminho onde os modelos serão salvos
+MODEL_DIR = "output/models"
+
+# Registro de modelos (model_registry.py): um diretório de arrays .npy por versão e um índice JSON
+REGISTRY_DIR = "output/models/registry"
+REGISTRY_FLOAT32 = True         # limiares e folhas das árvores em float32 (limiares arredondados sem mudar as decisões)
+
+# Caminho para salvar relatórios e gráficos
+REPORT_DIR = "output/reports"
+PLOT_DIR = "output/plots"
+
+# Cache colunar (binário) dos dados já lidos do CSV
+CACHE_DIR = "output/cache"
+STATS_CACHE_SIZE = 8            # estatísticas (stats_*.npz) mantidas em CACHE_DIR e na memória; as menos usadas saem
+
+# Manifesto dos gráficos e relatórios gerados (chave das entradas -> arquivos), para pular os que não mudaram
+MANIFEST_PATH = "output/manifest.json"
+
+# Cache das etapas do pipeline (pipeline_runner.py): resultado de cada etapa, pela chave das entradas e do código
+PIPELINE_DIR = "output/cache/pipeline"
+
+# Instrumentação das etapas (main.py --instrument / --profile)
+PROFILE_DIR = "output/profiles"                 # dumps do cProfile por etapa
+METRICS_PATH = "output/reports/stage_metrics"   # .json e .prom (Prometheus) com tempos, linhas e memória
+
+# Gráficos com muitas linhas: agregação com NumPy antes do matplotlib (plot_aggregation.py)
+LARGE_PLOT_ROWS = 50_000        # acima disso, histogramas/densidades em vez de KDE, regplot e scatter
+PLOT_BINS = 60                  # faixas dos histogramas e das médias por faixa
+PLOT_SAMPLE_POINTS = 2_000      # pontos sorteados (reservoir sampling) sobrepostos à densidade
+
+# Limites de controle operacionais (podem ser usados no monitoramento)
+CONTROL_LIMITS = {
+    'Amperagem_Peletizadora': (630, 660),
+    'Taxa_Compressao': (18.8, 19.0),
+    'Velocidade_Alimentador': (35, 60)
+}
+
+# Threshold para considerar uma variável importante
+IMPORTANCE_THRESHOLD = 0.05
+
+# Leitura em blocos (modo streaming) para arquivos grandes do historiador
+CHUNK_SIZE = 100_000
+
+# Número de faixas do histograma usado para estimar quantis no modo streaming
+QUANTILE_BINS = 10_000
+
+# Serviço de monitoramento contínuo (streaming_service.py)
+STREAM_QUEUE_SIZE = 20_000      # leituras pendentes antes de aplicar contrapressão
+STREAM_BATCH_SIZE = 1_000       # tamanho máximo de cada micro-lote
+STREAM_BATCH_TIMEOUT = 0.05     # espera máxima (s) para completar um micro-lote
+STREAM_HISTORY = 100_000        # leituras mantidas no buffer circular
+
+# Hot-reload do modelo no monitoramento
+RELOAD_POLL_INTERVAL = 2.0      # intervalo (s) entre verificações de novas versões em MODEL_DIR
+RELOAD_R2_TOLERANCE = 0.02      # queda máxima de R² aceita na amostra de validação
+RELOAD_MAX_ATTEMPTS = 3         # tentativas de carga antes de descartar um arquivo com erro
+
+# Previsão em lote no monitoramento: acima deste número de leituras, modelos de árvores
+# carregados do .pkl usam o predict do sklearn (Cython), mais rápido que o preditor compilado
+FAST_PREDICTOR_MAX_ROWS = 512
+
+# Otimizador de setpoint (setpoint_optimizer.py)
+OPTIMIZER_SAMPLES = 2048        # candidatos da amostra Latin hypercube inicial
+OPTIMIZER_TIME_BUDGET = 0.05    # orçamento (s) por otimização
+OPTIMIZER_MOVE_PENALTY = 0.5    # penalidade (pontos de PDI) por mover uma variável a faixa inteira
+OPTIMIZER_FINOS_WEIGHT = 1.0    # peso de cada ponto de Finos previsto no objetivo
+OPTIMIZER_MIN_GAIN = 0.2        # ganho mínimo de PDI previsto para recomendar um ajuste
+
+# Superfície de resposta (consultas "e se" sem chamar o modelo)
+SURFACE_VARIABLES = ['Amperagem_Peletizadora', 'Taxa_Compressao', 'Velocidade_Alimentador', 'Temp_Condicionador']
+SURFACE_POINTS = 21             # pontos por eixo da grade (21^4 ≈ 194 mil previsões por versão do modelo)
+
+# Importância por permutação (queda de R² ao embaralhar cada feature)
+PERMUTATION_REPEATS = 5         # embaralhamentos por feature
+PERMUTATION_MAX_SAMPLES = 5_000 # linhas avaliadas (custo fixo mesmo em bases grandes)
+
+# Benchmark do pipeline (benchmark.py)
+BENCHMARK_DIR = "output/benchmarks"
+BENCHMARK_SIZES = [1_000, 100_000, 10_000_000]   # linhas dos dados sintéticos
+BENCHMARK_TRAIN_ROWS = 20_000   # linhas usadas no treino (amostra, nas bases maiores)
+BENCHMARK_SEARCH_CANDIDATES = 2 # candidatos da busca random no treino
+BENCHMARK_BATCH_ROWS = 200_000  # linhas usadas para medir a vazão da previsão em lote
+BENCHMARK_LATENCY_READINGS = 1_000  # leituras individuais para medir p50/p99
+BENCHMARK_TOLERANCE = 0.2       # piora máxima (20%) em relação à referência antes de falhar
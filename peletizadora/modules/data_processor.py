@@ -1,80 +1,252 @@
-import pandas as pd
-import numpy as np
-from sklearn.impute import SimpleImputer
-from config import DATA_PATH
-
-class DataProcessor:
-
-    def __init__(self, filepath=DATA_PATH):
-        self.filepath = filepath
-        self.df = None
-        
-    def load_data(self):
-        """Carrega e prepara os dados iniciais"""
-        try:
-            self.df = pd.read_csv(self.filepath, sep=';', decimal=',', encoding='utf-8')
-            self._rename_columns()
-            print(f"Dados carregados com sucesso de {self.filepath}")
-            return True
-        except Exception as e:
-            print(f"Erro ao carregar dados: {e}")
-            return False
-    
-    def _rename_columns(self):
-        """Padroniza os nomes das colunas"""
-        column_mapping = {
-            'Porc Pdi Tyl6': 'PDI',
-            'Pres Vapor Caldeira': 'Pressao_Caldeira',
-            'Tx Compressao Matriz': 'Taxa_Compressao',
-            'Afastamento Rolos': 'Afastamento_Rolos',
-            'Amperagem Condicionador': 'Amperagem_Condicionador',
-            'Velocidade Alimentador': 'Velocidade_Alimentador',
-            'Porc Temp Condicionador': 'Temp_Condicionador',
-            'Pressao Vapor': 'Pressao_Vapor',
-            'Amperagem Peletizadora': 'Amperagem_Peletizadora',
-            'Porc Finos Tyl6': 'Finos'
-        }
-        self.df = self.df.rename(columns=column_mapping)
-    
-    def preprocess_data(self):
-        """Executa todo o pré-processamento dos dados"""
-        if self.df is None:
-            raise ValueError("Dados não carregados. Execute load_data() primeiro.")
-        
-        self._handle_outliers()
-        self._impute_missing_values()
-
-        # Verifica se as colunas essenciais estão presentes
-        required_columns = ['PDI', 'Finos']
-        for col in required_columns:
-            if col not in self.df.columns:
-                raise ValueError(f"Coluna obrigatória '{col}' não encontrada nos dados.")
-
-        print("Pré-processamento concluído.")
-        return self.df
-    
-    def _handle_outliers(self):
-        """Trata outliers usando o método IQR"""
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            Q1 = self.df[col].quantile(0.25)
-            Q3 = self.df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            self.df[col] = np.where(
-                self.df[col] < lower_bound, lower_bound, 
-                np.where(
-                    self.df[col] > upper_bound, upper_bound, self.df[col]
-                )
-            )
-    
-    def _impute_missing_values(self):
-        """Preenche valores faltantes com a mediana"""
-        imputer = SimpleImputer(strategy='median')
-        self.df = pd.DataFrame(imputer.fit_transform(self.df), columns=self.df.columns)
-    
-    def get_processed_data(self):
-        """Retorna os dados processados"""
-        return self.df.copy()
+import json
+import os
+from pathlib import Path
+import pandas as pd
+import numpy as np
+from config import DATA_PATH, CHUNK_SIZE, QUANTILE_BINS, CACHE_DIR
+from fingerprint import file_fingerprint, path_fingerprint, content_fingerprint
+from preprocessor import Preprocessor
+from summary_stats import SummaryStats, cached_stats
+from instrumentation import instrumented
+
+class DataProcessor:
+
+    COLUMN_MAPPING = {
+        'Porc Pdi Tyl6': 'PDI',
+        'Pres Vapor Caldeira': 'Pressao_Caldeira',
+        'Tx Compressao Matriz': 'Taxa_Compressao',
+        'Afastamento Rolos': 'Afastamento_Rolos',
+        'Amperagem Condicionador': 'Amperagem_Condicionador',
+        'Velocidade Alimentador': 'Velocidade_Alimentador',
+        'Porc Temp Condicionador': 'Temp_Condicionador',
+        'Pressao Vapor': 'Pressao_Vapor',
+        'Amperagem Peletizadora': 'Amperagem_Peletizadora',
+        'Porc Finos Tyl6': 'Finos'
+    }
+
+    def __init__(self, filepath=DATA_PATH):
+        self.filepath = filepath
+        self.df = None
+        # Limites IQR e medianas ajustados no pré-processamento
+        self.preprocessor = None
+        
+    @instrumented(memory=True)
+    def load_data(self, use_cache=True, dtype=np.float64):
+        """
+        Carrega e prepara os dados iniciais.
+        Com use_cache, reaproveita a cópia colunar em CACHE_DIR quando o CSV não mudou.
+        """
+        try:
+            if use_cache and self._load_cache(dtype):
+                print(f"Dados carregados do cache de {self.filepath}")
+                return True
+            self.df = pd.read_csv(self.filepath, sep=';', decimal=',', encoding='utf-8')
+            self._rename_columns()
+            if use_cache and self._write_cache(dtype):
+                self._load_cache(dtype)
+            print(f"Dados carregados com sucesso de {self.filepath}")
+            return True
+        except Exception as e:
+            print(f"Erro ao carregar dados: {e}")
+            return False
+    
+    def _cache_paths(self, dtype):
+        """Arquivos do cache, identificados pelo caminho, tamanho e data de modificação do CSV"""
+        prefix = f"{Path(self.filepath).stem}_{path_fingerprint(self.filepath)}_{np.dtype(dtype).name}_"
+        name = f"{prefix}{file_fingerprint(self.filepath)}"
+        return prefix, Path(CACHE_DIR) / f"{name}.npy", Path(CACHE_DIR) / f"{name}.json"
+
+    def _load_cache(self, dtype):
+        """
+        Lê o cache mapeado em memória. O array é gravado em ordem de colunas
+        (Fortran), então o DataFrame usa o próprio mapeamento, sem cópia.
+        """
+        _, data_path, columns_path = self._cache_paths(dtype)
+        if not (data_path.exists() and columns_path.exists()):
+            return False
+        with open(columns_path, encoding='utf-8') as file:
+            columns = json.load(file)
+        # 'c' (copy-on-write): alterações ficam na memória e não tocam o arquivo
+        values = np.load(data_path, mmap_mode='c')
+        self.df = pd.DataFrame(values, columns=columns, copy=False)
+        return True
+
+    def _write_cache(self, dtype):
+        """Grava a cópia colunar dos dados e remove caches antigos do mesmo CSV"""
+        try:
+            prefix, data_path, columns_path = self._cache_paths(dtype)
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            for old in data_path.parent.glob(f"{prefix}*"):
+                old.unlink()
+            values = np.asfortranarray(self.df.to_numpy(dtype=dtype))
+            tmp_path = data_path.with_suffix('.tmp.npy')
+            np.save(tmp_path, values)
+            os.replace(tmp_path, data_path)
+            with open(columns_path, 'w', encoding='utf-8') as file:
+                json.dump(list(self.df.columns), file)
+            return True
+        except (OSError, ValueError, TypeError) as e:
+            # Colunas não numéricas não cabem no array do cache: os dados seguem só em memória
+            print(f"Aviso: não foi possível gravar o cache de dados - {e}")
+            return False
+
+    def _rename_columns(self):
+        """Padroniza os nomes das colunas"""
+        self.df = self.df.rename(columns=self.COLUMN_MAPPING)
+    
+    @instrumented(rows=lambda self: len(self.df) if self.df is not None else None, memory=True)
+    def preprocess_data(self):
+        """Executa todo o pré-processamento dos dados"""
+        if self.df is None:
+            raise ValueError("Dados não carregados. Execute load_data() primeiro.")
+        
+        self.preprocessor = Preprocessor.fit(self.df)
+        self.df = self.preprocessor.transform_frame(self.df)
+
+        # Verifica se as colunas essenciais estão presentes
+        required_columns = ['PDI', 'Finos']
+        for col in required_columns:
+            if col not in self.df.columns:
+                raise ValueError(f"Coluna obrigatória '{col}' não encontrada nos dados.")
+
+        print("Pré-processamento concluído.")
+        return self.df
+    
+    def get_processed_data(self):
+        """Retorna os dados processados"""
+        return self.df.copy()
+
+    def iter_chunks(self, chunksize=CHUNK_SIZE):
+        """Lê o CSV em blocos, com colunas renomeadas e valores em float"""
+        reader = pd.read_csv(self.filepath, sep=';', decimal=',', encoding='utf-8', chunksize=chunksize)
+        for chunk in reader:
+            yield chunk.rename(columns=self.COLUMN_MAPPING).astype(np.float64)
+
+    @instrumented(memory=True)
+    def fit_streaming(self, chunksize=CHUNK_SIZE, bins=QUANTILE_BINS):
+        """
+        Calcula limites IQR e medianas sem carregar o arquivo inteiro na memória.
+
+        1ª passada: mínimo, máximo e contagem de cada coluna.
+        2ª passada: histograma com `bins` faixas por coluna, que localiza a faixa
+        de cada posição de quantil.
+        3ª passada: valores distintos apenas dessas faixas, para obter os quantis
+        exatos (mesma interpolação linear do pandas).
+        A memória fica limitada ao bloco e aos valores distintos de poucas faixas.
+        """
+        columns, col_min, col_max, col_count = None, None, None, None
+        for chunk in self.iter_chunks(chunksize):
+            if columns is None:
+                columns = chunk.columns
+                col_min, col_max, col_count = chunk.min(), chunk.max(), chunk.count()
+            else:
+                col_min = np.fmin(col_min, chunk.min())
+                col_max = np.fmax(col_max, chunk.max())
+                col_count += chunk.count()
+
+        if columns is None:
+            raise ValueError(f"Nenhum dado encontrado em {self.filepath}.")
+        for col in ['PDI', 'Finos']:
+            if col not in columns:
+                raise ValueError(f"Coluna obrigatória '{col}' não encontrada nos dados.")
+
+        # Mesma convenção do np.histogram para colunas constantes
+        col_min = col_min.fillna(0.0)
+        col_max = col_max.fillna(0.0)
+        constant = col_min == col_max
+        col_min[constant] -= 0.5
+        col_max[constant] += 0.5
+        edges = {col: np.linspace(col_min[col], col_max[col], bins + 1) for col in columns}
+
+        counts = {col: np.zeros(bins, dtype=np.int64) for col in columns}
+        for chunk in self.iter_chunks(chunksize):
+            for col in columns:
+                values = chunk[col].to_numpy()
+                counts[col] += np.histogram(values[~np.isnan(values)], bins=edges[col])[0]
+
+        # Posições (0-based) de cada quantil e faixa do histograma que contém cada posição
+        quantiles = (0.25, 0.5, 0.75)
+        cumulative = {col: np.cumsum(counts[col]) for col in columns}
+        needed = {}
+        for col in columns:
+            n = col_count[col]
+            ranks = set()
+            for q in quantiles:
+                pos = q * (n - 1)
+                ranks.update((int(np.floor(pos)), int(np.ceil(pos))))
+            needed[col] = {rank: int(np.searchsorted(cumulative[col], rank, side='right')) for rank in ranks if n}
+
+        # Valores distintos (com contagem) apenas das faixas necessárias
+        bin_values = {col: {b: {} for b in set(needed[col].values())} for col in columns}
+        for chunk in self.iter_chunks(chunksize):
+            for col in columns:
+                values = chunk[col].to_numpy()
+                for b, value_counts in bin_values[col].items():
+                    lo, hi = edges[col][b], edges[col][b + 1]
+                    in_bin = (values >= lo) & ((values <= hi) if b == bins - 1 else (values < hi))
+                    unique, unique_counts = np.unique(values[in_bin], return_counts=True)
+                    for value, count in zip(unique, unique_counts):
+                        value_counts[value] = value_counts.get(value, 0) + count
+
+        lower, upper, medians = {}, {}, {}
+        for col in columns:
+            n = col_count[col]
+            if n == 0:
+                lower[col], upper[col], medians[col] = -np.inf, np.inf, np.nan
+                continue
+
+            def value_at(rank):
+                """Valor na posição `rank` da coluna ordenada"""
+                b = needed[col][rank]
+                remaining = rank - (cumulative[col][b - 1] if b > 0 else 0)
+                for value in sorted(bin_values[col][b]):
+                    remaining -= bin_values[col][b][value]
+                    if remaining < 0:
+                        return value
+
+            def quantile(q):
+                pos = q * (n - 1)
+                below, above = value_at(int(np.floor(pos))), value_at(int(np.ceil(pos)))
+                return below + (pos - np.floor(pos)) * (above - below)
+
+            q1, median, q3 = (quantile(q) for q in quantiles)
+            iqr = q3 - q1
+            lower[col] = q1 - 1.5 * iqr
+            upper[col] = q3 + 1.5 * iqr
+            # Q1 <= mediana <= Q3, então a mediana dos dados limitados é a própria mediana
+            medians[col] = median
+
+        self.preprocessor = Preprocessor(columns, list(lower.values()), list(upper.values()), list(medians.values()))
+        print(f"Estatísticas de pré-processamento calculadas em blocos de {chunksize} linhas.")
+        return self
+
+    def iter_preprocessed(self, chunksize=CHUNK_SIZE):
+        """Gera blocos já pré-processados (outliers limitados e faltantes imputados) com memória limitada"""
+        if self.preprocessor is None:
+            self.fit_streaming(chunksize)
+        columns = self.preprocessor.feature_names
+        for chunk in self.iter_chunks(chunksize):
+            values = chunk[columns].to_numpy(dtype=np.float64)
+            self.preprocessor.transform(values, out=values)
+            yield pd.DataFrame(values, columns=columns, index=chunk.index)
+
+    def summary_stats(self, chunksize=CHUNK_SIZE):
+        """
+        Estatísticas dos dados pré-processados (SummaryStats) em uma passada por blocos,
+        sem carregar o arquivo; reaproveitadas de CACHE_DIR enquanto o CSV e o pré-processamento não mudarem.
+        """
+        if self.preprocessor is None:
+            self.fit_streaming(chunksize)
+        key = content_fingerprint(path_fingerprint(self.filepath), file_fingerprint(self.filepath),
+                                  vars(self.preprocessor))
+        return cached_stats(key, lambda: SummaryStats.from_chunks(self.iter_preprocessed(chunksize)))
+
+    def preprocess_to_csv(self, output_path, chunksize=CHUNK_SIZE):
+        """Escreve os dados pré-processados em um CSV (mesmo formato de entrada), bloco a bloco"""
+        n_rows = 0
+        for i, chunk in enumerate(self.iter_preprocessed(chunksize)):
+            chunk.to_csv(output_path, sep=';', decimal=',', index=False,
+                         mode='w' if i == 0 else 'a', header=(i == 0), encoding='utf-8')
+            n_rows += len(chunk)
+        print(f"{n_rows} linhas pré-processadas salvas em {output_path}")
+        return n_rows
@@ -1,60 +1,100 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-from pathlib import Path
-from config import PLOT_DIR
-
-class ExploratoryAnalysis:
-    
-    def __init__(self, dataframe):
-        self.df = dataframe
-    
-    def generate_summary(self):
-        summary = {
-            'info': self.df.info(),
-            'describe': self.df.describe(),
-            'null_values': self.df.isnull().sum(),
-            'correlation': self.df.corr()
-        }
-        return summary
-    
-    def plot_distributions(self, save=False):
-        numeric_cols = self.df.select_dtypes(include=['float64', 'int64']).columns
-        
-        Path(PLOT_DIR).mkdir(parents=True, exist_ok=True)
-        
-        for col in numeric_cols:
-            plt.figure(figsize=(8, 4))
-            sns.histplot(self.df[col], kde=True)
-            plt.title(f'Distribuição de {col}')
-            if save:
-                plt.savefig(f"{PLOT_DIR}/distribution_{col}.png")
-                plt.close()
-            else:
-                plt.show()
-    
-    def plot_correlation_matrix(self, save=False):
-        plt.figure(figsize=(12, 8))
-        corr = self.df.corr()
-        sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
-        plt.title('Matriz de Correlação')
-        if save:
-            plt.savefig(f"{PLOT_DIR}/correlation_matrix.png")
-            plt.close()
-        else:
-            plt.show()
-    
-    def plot_key_relationships(self, target_var='PDI', save=False):
-        key_vars = ['Finos', 'Amperagem_Peletizadora', 'Taxa_Compressao', 'Velocidade_Alimentador']
-        
-        Path(PLOT_DIR).mkdir(parents=True, exist_ok=True)
-        
-        for var in key_vars:
-            plt.figure(figsize=(8, 4))
-            sns.regplot(x=var, y=target_var, data=self.df)
-            plt.title(f'Relação entre {var} e {target_var}')
-            if save:
-                plt.savefig(f"{PLOT_DIR}/relation_{var}_vs_{target_var}.png")
-                plt.close()
-            else:
-                plt.show()
+import matplotlib.pyplot as plt
+import seaborn as sns
+import pandas as pd
+from pathlib import Path
+from config import PLOT_DIR
+from plot_aggregation import is_large, plot_distribution, plot_relationship
+from summary_stats import frame_stats
+
+KEY_VARIABLES = ['Finos', 'Amperagem_Peletizadora', 'Taxa_Compressao', 'Velocidade_Alimentador']
+
+class ExploratoryAnalysis:
+    
+    def __init__(self, dataframe):
+        self.df = dataframe
+        self._stats = None
+
+    @property
+    def stats(self):
+        """Estatísticas de uma passada (SummaryStats), compartilhadas pelo resumo e pelos gráficos"""
+        if self._stats is None:
+            self._stats = frame_stats(self.df)
+        return self._stats
+    
+    def generate_summary(self):
+        summary = {
+            'info': self.df.info(),
+            'describe': self.stats.describe(),
+            'null_values': self.stats.null_counts(),
+            'correlation': self.stats.correlation()
+        }
+        return summary
+    
+    def plot_distributions(self, save=False, columns=None):
+        numeric_cols = columns if columns is not None else self.df.select_dtypes(include='number').columns
+        
+        Path(PLOT_DIR).mkdir(parents=True, exist_ok=True)
+        
+        paths = []
+        for col in numeric_cols:
+            plt.figure(figsize=(8, 4))
+            if is_large(len(self.df)):
+                plot_distribution(self.df[col])
+                plt.xlabel(col)
+            else:
+                sns.histplot(self.df[col], kde=True)
+            plt.title(f'Distribuição de {col}')
+            if save:
+                paths.append(f"{PLOT_DIR}/distribution_{col}.png")
+                plt.savefig(paths[-1])
+                plt.close()
+            else:
+                plt.show()
+        return paths
+    
+    def plot_correlation_matrix(self, save=False):
+        plt.figure(figsize=(12, 8))
+        corr = self.stats.correlation()
+        sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
+        plt.title('Matriz de Correlação')
+        if save:
+            path = f"{PLOT_DIR}/correlation_matrix.png"
+            plt.savefig(path)
+            plt.close()
+            return path
+        plt.show()
+    
+    def plot_key_relationships(self, target_var='PDI', save=False, key_vars=KEY_VARIABLES):
+        Path(PLOT_DIR).mkdir(parents=True, exist_ok=True)
+        
+        paths = []
+        for var in key_vars:
+            plt.figure(figsize=(8, 4))
+            if is_large(len(self.df)):
+                plot_relationship(self.df[var], self.df[target_var])
+                plt.xlabel(var)
+                plt.ylabel(target_var)
+            else:
+                sns.regplot(x=var, y=target_var, data=self.df)
+            plt.title(f'Relação entre {var} e {target_var}')
+            if save:
+                paths.append(f"{PLOT_DIR}/relation_{var}_vs_{target_var}.png")
+                plt.savefig(paths[-1])
+                plt.close()
+            else:
+                plt.show()
+        return paths
+
+    def submit_plots(self, renderer, target_var='PDI'):
+        """
+        Agenda todas as figuras da análise exploratória no PlotRenderer, uma tarefa
+        por figura; cada tarefa recebe apenas as colunas que vai desenhar.
+        """
+        # Calculadas antes de agendar: a tarefa da matriz de correlação já leva as estatísticas prontas
+        self.stats
+        for col in self.df.select_dtypes(include='number').columns:
+            renderer.submit(ExploratoryAnalysis(self.df[[col]]).plot_distributions)
+        renderer.submit(self.plot_correlation_matrix)
+        for var in KEY_VARIABLES:
+            renderer.submit(ExploratoryAnalysis(self.df[[var, target_var]]).plot_key_relationships,
+                            target_var=target_var, key_vars=[var])
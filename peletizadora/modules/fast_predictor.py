@@ -0,0 +1,268 @@
+import os
+import numpy as np
+
+
+class LinearPredictor:
+    """
+    Preditor compilado para pipelines RobustScaler + regressor linear (ex.: BayesianRidge).
+
+    O centro/escala do scaler são incorporados aos coeficientes, de modo que a
+    previsão de uma leitura é um único produto escalar sobre um buffer
+    pré-alocado, na ordem fixa de feature_names, sem pandas nem validação do sklearn.
+    """
+
+    def __init__(self, coef, intercept, feature_names, preprocessor=None):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.feature_names = list(feature_names)
+        # Preprocessor (limites IQR + medianas) aplicado antes da previsão, na ordem de feature_names
+        self.preprocessor = preprocessor
+        self._buffer = np.empty(len(self.feature_names), dtype=np.float64)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, feature_names=None):
+        scaler = pipeline.named_steps['scaler']
+        regressor = pipeline.named_steps['regressor']
+        if feature_names is None:
+            feature_names = pipeline.feature_names_in_
+
+        center = scaler.center_ if scaler.with_centering else 0.0
+        scale = scaler.scale_ if scaler.with_scaling else 1.0
+
+        # y = w · (x - c) / s + b  =>  y = (w / s) · x + (b - (w / s) · c)
+        coef = np.asarray(regressor.coef_, dtype=np.float64) / scale
+        intercept = regressor.intercept_ - np.dot(coef, center)
+        return cls(coef, intercept, feature_names)
+
+    def predict_one(self, current_params):
+        """Prevê o PDI de uma única leitura (dicionário com as features)"""
+        buffer = self._buffer
+        for i, name in enumerate(self.feature_names):
+            buffer[i] = current_params.get(name, np.nan)
+        if self.preprocessor is not None:
+            self.preprocessor.transform(buffer, out=buffer)
+        return self.intercept + buffer.dot(self.coef)
+
+    def predict(self, X):
+        """Prevê um lote de leituras (DataFrame ou array 2D na ordem de feature_names)"""
+        return _as_array(X, self.feature_names, self.preprocessor) @ self.coef + self.intercept
+
+    def to_arrays(self):
+        return {
+            'coef': self.coef,
+            'intercept': np.array(self.intercept),
+            'feature_names': np.array(self.feature_names),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['coef'], arrays['intercept'], arrays['feature_names'].tolist())
+
+
+class TreeEnsemblePredictor:
+    """
+    Avaliador vetorizado para RandomForestRegressor/GradientBoostingRegressor precedidos de RobustScaler.
+
+    Todas as árvores são achatadas em arrays contíguos de nós (feature, threshold,
+    left, right, value). As folhas apontam para si mesmas com threshold infinito,
+    então um lote de leituras percorre todas as árvores nível a nível, com
+    max_depth passos de indexação vetorizada e sem laços por árvore.
+    A previsão é bias + tree_scale * soma dos valores das folhas.
+
+    Para uma leitura ou lotes pequenos é bem mais rápido que o sklearn (sem
+    validação nem threads); em lotes grandes o predict do sklearn, em Cython,
+    ganha, e o PDIMonitor o usa quando o pipeline do sklearn está carregado
+    (ver FAST_PREDICTOR_MAX_ROWS).
+    """
+
+    # Pares (leitura, árvore) percorridos por bloco: limita a memória e mantém os índices no cache
+    CHUNK_PAIRS = 1 << 17
+
+    def __init__(self, feature, threshold, left, right, value, roots, center, scale,
+                 bias, tree_scale, max_depth, feature_names, preprocessor=None):
+        # Arrays já inteiros/float (ex.: float32 mapeados em memória pelo registro) são usados sem cópia
+        self.feature = _contiguous(feature, np.int32)
+        self.threshold = _contiguous(threshold, np.float64)
+        self.left = _contiguous(left, np.int32)
+        self.right = _contiguous(right, np.int32)
+        self.value = _contiguous(value, np.float64)
+        self.roots = _contiguous(roots, np.int32)
+        self.center = np.asarray(center, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.bias = float(bias)
+        self.tree_scale = float(tree_scale)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self.preprocessor = preprocessor
+        self._buffer = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        # Filhos intercalados (direito, esquerdo) e índices nativos: cada nível é
+        # node = children[2 * node + vai_para_esquerda], sem np.where nem conversão de índices
+        self._children = np.stack([self.right, self.left], axis=1).ravel().astype(np.intp)
+        self._feature = self.feature.astype(np.intp)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, feature_names=None):
+        scaler = pipeline.named_steps['scaler']
+        regressor = pipeline.named_steps['regressor']
+        if feature_names is None:
+            feature_names = pipeline.feature_names_in_
+        n_features = len(feature_names)
+
+        if hasattr(regressor, 'init_'):
+            # Gradient boosting: previsão inicial + learning_rate * soma das árvores
+            trees = [estimator.tree_ for estimator in np.ravel(regressor.estimators_)]
+            if isinstance(regressor.init_, str):
+                bias = 0.0
+            else:
+                bias = float(np.ravel(regressor.init_.predict(np.zeros((1, n_features))))[0])
+            tree_scale = regressor.learning_rate
+        else:
+            # Random forest: média das árvores
+            trees = [estimator.tree_ for estimator in regressor.estimators_]
+            bias = 0.0
+            tree_scale = 1.0 / len(trees)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        center = scaler.center_ if scaler.with_centering else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_scaling else np.ones(n_features)
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+            np.concatenate(rights), np.concatenate(values), roots, center, scale,
+            bias, tree_scale, max(tree.max_depth for tree in trees), feature_names
+        )
+
+    def predict_one(self, current_params):
+        """Prevê o PDI de uma única leitura (dicionário com as features)"""
+        buffer = self._buffer
+        for i, name in enumerate(self.feature_names):
+            buffer[0, i] = current_params.get(name, np.nan)
+        if self.preprocessor is not None:
+            self.preprocessor.transform(buffer, out=buffer)
+        return self._predict_chunk(buffer)[0]
+
+    def predict(self, X):
+        """Prevê um lote de leituras (DataFrame ou array 2D), em blocos para limitar a memória"""
+        X = _as_array(X, self.feature_names, self.preprocessor)
+        out = np.empty(X.shape[0], dtype=np.float64)
+        chunk_size = max(1, self.CHUNK_PAIRS // len(self.roots))
+        for start in range(0, X.shape[0], chunk_size):
+            out[start:start + chunk_size] = self._predict_chunk(X[start:start + chunk_size])
+        return out
+
+    def _predict_chunk(self, X):
+        # Mesmo arredondamento do sklearn: escala em float64 e comparação em float32
+        X_scaled = ((X - self.center) / self.scale).astype(np.float32).ravel()
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        # Um par (leitura, árvore) por posição, com o deslocamento da leitura no array achatado
+        node = np.tile(self.roots.astype(np.intp), n_rows)
+        offset = np.repeat(np.arange(0, n_rows * n_features, n_features, dtype=np.intp), n_trees)
+        children, feature, threshold = self._children, self._feature, self.threshold
+        for _ in range(self.max_depth):
+            go_left = X_scaled[offset + feature[node]] <= threshold[node]
+            node = children[2 * node + go_left]
+        leaves = self.value[node].reshape(n_rows, n_trees)
+        return self.bias + self.tree_scale * leaves.sum(axis=1, dtype=np.float64)
+
+    def to_arrays(self):
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'center': self.center,
+            'scale': self.scale,
+            'bias': np.array(self.bias),
+            'tree_scale': np.array(self.tree_scale),
+            'max_depth': np.array(self.max_depth),
+            'feature_names': np.array(self.feature_names),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+            arrays['value'], arrays['roots'], arrays['center'], arrays['scale'],
+            arrays['bias'], arrays['tree_scale'], arrays['max_depth'],
+            arrays['feature_names'].tolist()
+        )
+
+
+PREDICTOR_KINDS = {
+    'linear': LinearPredictor,
+    'tree_ensemble': TreeEnsemblePredictor,
+}
+
+
+def _contiguous(array, dtype):
+    """Array contíguo em dtype; arrays do mesmo tipo e menores (ex.: float32, int8) são mantidos como estão"""
+    array = np.asarray(array)
+    dtype = np.dtype(dtype)
+    if array.dtype.kind != dtype.kind or array.dtype.itemsize > dtype.itemsize:
+        array = array.astype(dtype)
+    return np.ascontiguousarray(array)
+
+
+def _as_array(X, feature_names, preprocessor=None):
+    if hasattr(X, 'columns'):
+        X = X[feature_names].to_numpy(dtype=np.float64)
+    X = np.asarray(X, dtype=np.float64)
+    if preprocessor is not None:
+        X = preprocessor.transform(X)
+    return X
+
+
+def compile_predictor(pipeline):
+    """
+    Deriva um preditor compilado a partir de um pipeline carregado.
+    Retorna None quando o pipeline não tem um formato suportado.
+    """
+    if isinstance(pipeline, tuple(PREDICTOR_KINDS.values())):
+        return pipeline
+    steps = getattr(pipeline, 'named_steps', None)
+    if not steps or 'scaler' not in steps or 'regressor' not in steps:
+        return None
+    if not hasattr(pipeline, 'feature_names_in_'):
+        return None
+    if type(steps['scaler']).__name__ != 'RobustScaler':
+        return None
+
+    regressor = steps['regressor']
+    coef = getattr(regressor, 'coef_', None)
+    if coef is not None and np.ndim(coef) == 1 and hasattr(regressor, 'intercept_'):
+        return LinearPredictor.from_pipeline(pipeline)
+    if hasattr(regressor, 'estimators_') and type(regressor).__name__ in (
+            'RandomForestRegressor', 'GradientBoostingRegressor'):
+        return TreeEnsemblePredictor.from_pipeline(pipeline)
+    return None
+
+
+def save_compact(predictor, filepath):
+    """Salva um preditor compilado em formato compacto (.npz)"""
+    kind = next(name for name, cls in PREDICTOR_KINDS.items() if isinstance(predictor, cls))
+    # Grava em arquivo temporário e renomeia: quem observa MODEL_DIR nunca vê um arquivo pela metade
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, kind=np.array(kind), **predictor.to_arrays())
+    os.replace(tmp_path, filepath)
+
+
+def load_compact(filepath):
+    """Carrega um preditor compilado salvo com save_compact"""
+    with np.load(filepath, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    return PREDICTOR_KINDS[str(arrays.pop('kind'))].from_arrays(arrays)
@@ -0,0 +1,45 @@
+import hashlib
+import importlib
+import inspect
+import os
+
+
+def file_fingerprint(filepath):
+    """
+    Identificador barato de um arquivo: caminho absoluto, tamanho e data de modificação.
+    Muda sempre que o arquivo é reescrito, sem precisar ler seu conteúdo.
+    """
+    stat = os.stat(filepath)
+    key = f"{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def path_fingerprint(filepath):
+    """Identificador apenas do caminho absoluto do arquivo"""
+    return hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:8]
+
+
+def content_fingerprint(*objects):
+    """
+    Hash do conteúdo de objetos Python (DataFrames, arrays, modelos, parâmetros).
+    Os arrays são lidos diretamente da memória, sem serializar cópias.
+    """
+    import joblib  # file_fingerprint é usado pelo monitoramento, que não precisa do joblib
+    return joblib.hash(objects)
+
+
+def source_fingerprint(*objects):
+    """
+    Versão do código: hash do código-fonte de funções e, para classes e módulos
+    (objetos ou nomes), do arquivo inteiro, que inclui as funções auxiliares do módulo.
+    """
+    digest = hashlib.sha1()
+    for obj in objects:
+        if isinstance(obj, str):
+            obj = importlib.import_module(obj)
+        if inspect.isfunction(obj):
+            digest.update(inspect.getsource(obj).encode('utf-8'))
+        else:
+            with open(inspect.getsourcefile(obj), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
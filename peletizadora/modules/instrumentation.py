@@ -0,0 +1,209 @@
+import functools
+import io
+import json
+import os
+import sys
+import threading
+import time
+from config import PROFILE_DIR
+
+# Desligada por padrão: os métodos instrumentados só fazem um teste de booleano por chamada
+_enabled = False
+_profile = False
+_profile_dir = PROFILE_DIR
+# cProfile mede só a thread que o ligou: a etapa mais externa de cada thread tem o seu perfil
+_local = threading.local()
+_lock = threading.Lock()
+_registry = {}
+
+
+def enable(profile=False, profile_dir=PROFILE_DIR):
+    """Liga o registro de duração, linhas e memória das etapas; com profile, cada etapa gera um dump do cProfile"""
+    global _enabled, _profile, _profile_dir
+    _enabled, _profile, _profile_dir = True, profile, profile_dir
+
+
+def disable():
+    global _enabled, _profile
+    _enabled, _profile = False, False
+
+
+def is_enabled():
+    return _enabled
+
+
+def is_profiling():
+    return _enabled and _profile
+
+
+def reset():
+    with _lock:
+        _registry.clear()
+
+
+def _rss_bytes():
+    """Memória residente atual (Linux: /proc/self/statm); fora do Linux, o pico (ru_maxrss); None se indisponível"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class stage:
+    """
+    Mede uma etapa: with stage('treino', rows=len(X)): ...
+    Registra chamadas, duração total e máxima, linhas processadas e a variação
+    de memória residente. rows também pode ser definido dentro do bloco
+    (with stage('carga') as s: ...; s.rows = n). Sem enable(), entrar e sair não faz nada.
+    """
+
+    __slots__ = ('name', 'rows', 'memory', '_start', '_rss', '_profiler')
+
+    def __init__(self, name, rows=None, memory=True):
+        self.name = name
+        self.rows = rows
+        self.memory = memory
+        self._start = None
+        self._profiler = None
+
+    def __enter__(self):
+        if not _enabled:
+            return self
+        self._rss = _rss_bytes() if self.memory else None
+        if _profile and not getattr(_local, 'profiling', False):
+            # cProfile não pode ser aninhado: etapas internas aparecem no perfil da etapa externa
+            _local.profiling = True
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is None:
+            return False
+        elapsed = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+            _local.profiling = False
+            _dump_profile(self.name, self._profiler)
+        rss_delta = None
+        if self._rss is not None:
+            # A leitura final também pode falhar: nesse caso a variação fica sem valor
+            rss = _rss_bytes()
+            rss_delta = rss - self._rss if rss is not None else None
+        _record(self.name, elapsed, self.rows, rss_delta)
+        return False
+
+
+def instrumented(name=None, rows=None, memory=False):
+    """
+    Decorador equivalente a stage para funções e métodos. rows, se informado,
+    recebe os mesmos argumentos da função e retorna o número de linhas.
+    Por padrão não mede memória (a leitura custa alguns microssegundos, muito para o monitoramento).
+    """
+    def decorate(function):
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with stage(label, _count_rows(rows, args, kwargs), memory):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _count_rows(rows, args, kwargs):
+    """Linhas da chamada; se rows falhar (ex.: dados ainda não carregados), a chamada segue sem contagem"""
+    if rows is None:
+        return None
+    try:
+        return rows(*args, **kwargs)
+    except Exception:
+        return None
+
+
+def _record(name, elapsed, rows, rss_delta):
+    with _lock:
+        entry = _registry.get(name)
+        if entry is None:
+            entry = _registry[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'rows': 0,
+                                       'rss_delta_bytes': 0}
+        entry['calls'] += 1
+        entry['total_s'] += elapsed
+        entry['max_s'] = max(entry['max_s'], elapsed)
+        if rows is not None:
+            entry['rows'] += int(rows)
+        if rss_delta is not None:
+            entry['rss_delta_bytes'] += int(rss_delta)
+
+
+def _dump_profile(name, profiler):
+    """Salva o .prof (abrir com pstats ou snakeviz) e um resumo em texto das 30 funções mais caras"""
+    os.makedirs(_profile_dir, exist_ok=True)
+    base = os.path.join(_profile_dir, ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name))
+    profiler.dump_stats(base + '.prof')
+    import pstats
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(30)
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(text.getvalue())
+
+
+def snapshot():
+    """Cópia do registro: {etapa: {calls, total_s, max_s, mean_s, rows, rows_per_s, rss_delta_mb}}"""
+    with _lock:
+        entries = {name: dict(entry) for name, entry in _registry.items()}
+    for entry in entries.values():
+        entry['mean_s'] = entry['total_s'] / entry['calls']
+        entry['rows_per_s'] = entry['rows'] / entry['total_s'] if entry['rows'] and entry['total_s'] > 0 else None
+        entry['rss_delta_mb'] = entry.pop('rss_delta_bytes') / 2 ** 20
+    return entries
+
+
+def summary():
+    """Tabela das etapas ordenada pelo tempo total, para imprimir ao fim da execução"""
+    entries = sorted(snapshot().items(), key=lambda item: item[1]['total_s'], reverse=True)
+    lines = [f"{'Etapa':<45} {'Chamadas':>8} {'Total (s)':>10} {'Máx (s)':>9} {'Linhas':>10} {'Mem (MB)':>9}"]
+    for name, entry in entries:
+        lines.append(f"{name:<45} {entry['calls']:>8} {entry['total_s']:>10.3f} {entry['max_s']:>9.3f} "
+                     f"{entry['rows']:>10} {entry['rss_delta_mb']:>9.1f}")
+    return "\n".join(lines)
+
+
+def export_json(path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': time.time(), 'stages': snapshot()}, f, ensure_ascii=False, indent=2)
+
+
+def export_prometheus(path, prefix='pdi'):
+    """Formato texto do Prometheus (para o textfile collector do node_exporter)"""
+    metrics = [
+        ('stage_calls_total', 'counter', 'Execuções da etapa', 'calls'),
+        ('stage_duration_seconds_total', 'counter', 'Tempo total da etapa (s)', 'total_s'),
+        ('stage_duration_seconds_max', 'gauge', 'Maior duração de uma execução (s)', 'max_s'),
+        ('stage_rows_total', 'counter', 'Linhas processadas pela etapa', 'rows'),
+        ('stage_memory_delta_megabytes', 'gauge', 'Variação acumulada da memória residente (MB)', 'rss_delta_mb'),
+    ]
+    entries = snapshot()
+    lines = []
+    for metric, kind, description, key in metrics:
+        lines.append(f"# HELP {prefix}_{metric} {description}")
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for name, entry in entries.items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{prefix}_{metric}{{stage="{label}"}} {entry[key]}')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + '.tmp', path)
@@ -1,100 +1,338 @@
-from data_processor import DataProcessor
-from exploratory_analysis import ExploratoryAnalysis
-from model_trainer import ModelTrainer
-from visualization import Visualization
-from monitoring_system import PDIMonitor
-from report import PDIReport
-from config import DATA_PATH, IMPORTANCE_THRESHOLD, MODEL_DIR
-import argparse
-import os
-import numpy as np
-
-parser = argparse.ArgumentParser()
-parser.add_argument('--model', choices=['bayesian', 'random_forest', 'gradient_boosting'], default='random_forest')
-args = parser.parse_args()
-
-def find_ideal_settings(df, target_pdi='PDI', target_finos='Finos'):
-    # Filtro de linhas onde o PDI é alto e Finos são baixos
-    filtered = df[(df[target_pdi] >= 82) & (df[target_finos] <= 10)]
-    if filtered.empty:
-        print("Nenhum dado encontrado com PDI >= 82 e Finos <= 10 para definir configurações ideais.")
-        return {}
-
-    # Calcular a mediana das variáveis de controle (excluir PDI e Finos)
-    cols = [col for col in df.columns if col not in [target_pdi, target_finos]]
-    ideal_settings = filtered[cols].median().to_dict()
-    return ideal_settings
-
-def run_training_and_evaluation(model_type, X, y, df, features):
-    print(f"\n=== Treinando e avaliando modelo: {model_type} ===")
-    trainer = ModelTrainer(model_type=model_type)
-    model = trainer.train_model(X, y)
-
-    trainer.save_model(f'pdi_model_{model_type}.pkl')
-
-    feature_importance = trainer.get_feature_importance()
-    if feature_importance is not None:
-        print(feature_importance.head())
-    trainer._print_feature_importance()
-
-    df_vis = df.copy()
-    Visualization.plot_combined_results(model, df_vis, features, model_step_name='regressor')
-    Visualization._plot_feature_importance(model, features, model_step_name='regressor')
-
-    y_pred = model.predict(X)
-    Visualization.plot_actual_vs_predicted(y, y_pred)
-    Visualization.plot_residuals(y, y_pred)
-
-    recommendations = PDIReport.generate_recommendation(feature_importance, threshold=IMPORTANCE_THRESHOLD)
-    PDIReport.save_report(recommendations, model_type)
-
-    # Gerar e salvar configurações ideais com base nos dados
-    ideal_settings = find_ideal_settings(df)
-    PDIReport.save_ideal_settings(ideal_settings, model_type)
-
-def main():
-    data_processor = DataProcessor(DATA_PATH)
-    if not data_processor.load_data():
-        return
-
-    df = data_processor.preprocess_data()
-
-    explorer = ExploratoryAnalysis(df)
-    explorer.plot_distributions(save=True)
-    explorer.plot_correlation_matrix(save=True)
-    explorer.plot_key_relationships(save=True)
-
-    X = df.drop(['PDI', 'Finos'], axis=1)
-    y = df['PDI']
-    features = X.columns.tolist()
-
-    run_training_and_evaluation(args.model, X, y, df, features)
-
-    model_path = os.path.join(MODEL_DIR, f'pdi_model_{args.model}.pkl')
-    monitor = PDIMonitor(model_path)
-    current_operation = {
-        'Pressao_Caldeira': 8.9,
-        'Taxa_Compressao': 18.75,
-        'Afastamento_Rolos': 0,
-        'Amperagem_Condicionador': 38,
-        'Velocidade_Alimentador': 76,
-        'Temp_Condicionador': 80,
-        'Pressao_Vapor': 1.4,
-        'Amperagem_Peletizadora': 630,
-        'Finos': 11.0
-    }
-    report = monitor.full_analysis(current_operation)
-
-    print("\nRelatório de Monitoramento:")
-    print(f"PDI Previsto: {report['predicted_pdi']}%")
-    print("\nAlertas:")
-    print("\n".join(report['alerts']) if report['alerts'] else "Nenhum alerta")
-    print("\nRecomendações:")
-    print("\n".join(report['recommendations']) if report['recommendations'] else "Nenhuma recomendação")
-
-    ideal_pdi = report['predicted_pdi'] > 82
-    ideal_finos = current_operation['Finos'] < 10
-    print("\nCenário ideal atingido:", "Sim" if ideal_pdi and ideal_finos else "Não")
-
-if __name__ == "__main__":
-    main()
+from data_processor import DataProcessor
+from exploratory_analysis import ExploratoryAnalysis
+from model_trainer import ModelTrainer, SEARCH_MODES
+from parallel_training import train_models_parallel, build_leaderboard
+from visualization import Visualization
+from plot_renderer import PlotRenderer, shutdown_executor
+from artifact_manifest import ArtifactManifest
+from monitoring_system import PDIMonitor
+from report import PDIReport
+from preprocessor import Preprocessor
+from response_surface import surface_spec
+from sensitivity import SensitivityAnalysis, rank_features
+from fingerprint import file_fingerprint, content_fingerprint, source_fingerprint
+from model_registry import ModelRegistry
+from pipeline_runner import Pipeline
+import instrumentation
+from instrumentation import stage, instrumented
+from config import (DATA_PATH, IMPORTANCE_THRESHOLD, MODEL_DIR, PLOT_DIR, METRICS_PATH, PROFILE_DIR, PIPELINE_DIR,
+                    LARGE_PLOT_ROWS, PLOT_BINS, PLOT_SAMPLE_POINTS, PERMUTATION_REPEATS, PERMUTATION_MAX_SAMPLES,
+                    SURFACE_VARIABLES, SURFACE_POINTS)
+import argparse
+import functools
+import os
+import time
+import numpy as np
+
+MODEL_TYPES = ['bayesian', 'random_forest', 'gradient_boosting']
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--model', choices=MODEL_TYPES + ['all'], default='random_forest',
+                    help="Modelo a treinar; 'all' treina e compara todos em paralelo")
+parser.add_argument('--search', choices=SEARCH_MODES, default='grid',
+                    help="Busca de hiperparâmetros: grid (exaustiva), halving (successive halving) ou random")
+parser.add_argument('--n-candidates', type=int, default=None,
+                    help="Número de candidatos para as buscas halving/random")
+parser.add_argument('--time-budget', type=float, default=None,
+                    help="Tempo máximo (s) para a busca random (não aceito nos modos grid e halving)")
+parser.add_argument('--n-jobs', type=int, default=None,
+                    help="Total de núcleos para o treino (padrão: todos)")
+parser.add_argument('--update', metavar='CSV', default=None,
+                    help="Atualiza incrementalmente o modelo --model (bayesian ou random_forest) com os dados do CSV")
+parser.add_argument('--instrument', action='store_true',
+                    help="Mede tempo, linhas e memória de cada etapa e salva em METRICS_PATH (.json e .prom)")
+parser.add_argument('--profile', action='store_true',
+                    help="Como --instrument, e salva um perfil do cProfile por etapa em PROFILE_DIR")
+parser.add_argument('--no-cache', action='store_true',
+                    help=f"Executa todas as etapas, sem reaproveitar os resultados salvos em {PIPELINE_DIR}")
+args = parser.parse_args()
+if args.time_budget is not None and args.search != 'random':
+    parser.error(f"--time-budget só vale para --search random (a busca {args.search} não pode ser interrompida)")
+
+PREPROCESSOR_PATH = os.path.join(MODEL_DIR, 'preprocessor.npz')
+
+def find_ideal_settings(df, target_pdi='PDI', target_finos='Finos'):
+    # Filtro de linhas onde o PDI é alto e Finos são baixos
+    filtered = df[(df[target_pdi] >= 82) & (df[target_finos] <= 10)]
+    if filtered.empty:
+        print("Nenhum dado encontrado com PDI >= 82 e Finos <= 10 para definir configurações ideais.")
+        return {}
+
+    # Calcular a mediana das variáveis de controle (excluir PDI e Finos)
+    cols = [col for col in df.columns if col not in [target_pdi, target_finos]]
+    ideal_settings = filtered[cols].median().to_dict()
+    return ideal_settings
+
+def split_features(df):
+    X = df.drop(['PDI', 'Finos'], axis=1)
+    return X, df['PDI'], X.columns.tolist()
+
+def load_stage():
+    """Etapa 'dados': carrega e pré-processa o CSV e salva o pré-processador usado pelo monitoramento"""
+    data_processor = DataProcessor(DATA_PATH)
+    if not data_processor.load_data():
+        raise ValueError(f"Não foi possível carregar os dados de {DATA_PATH}")
+    df = data_processor.preprocess_data()
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    data_processor.preprocessor.save(PREPROCESSOR_PATH)
+    return df
+
+def exploratory_stage(df):
+    """Etapa 'eda': gráficos da análise exploratória, renderizados em processos separados"""
+    with PlotRenderer(n_jobs=args.n_jobs, manifest=ArtifactManifest()) as renderer:
+        with stage('ExploratoryAnalysis.submit_plots'):
+            ExploratoryAnalysis(df).submit_plots(renderer)
+        return wait_plots(renderer, "da análise exploratória")
+
+def wait_plots(renderer, label):
+    """Espera os gráficos agendados; os que já existem com as mesmas entradas não são refeitos"""
+    with stage('PlotRenderer.wait'):
+        written = renderer.wait()
+    print(f"\nGráficos {label} em {PLOT_DIR}: {len(written)} gerados, {len(renderer.skipped)} sem alterações")
+    return written + renderer.skipped
+
+def training_stage(df, model_type, search, n_candidates, time_budget):
+    """Etapa 'treino': treina o modelo (ou todos, com 'all') e salva os arquivos usados pelo monitoramento"""
+    X, y, _ = split_features(df)
+    if model_type == 'all':
+        results = run_all_models(X, y, search, n_candidates, time_budget)
+    else:
+        results = [run_training(model_type, X, y, search, n_candidates, time_budget)]
+
+    registry = ModelRegistry()
+    preprocessor = Preprocessor.load(PREPROCESSOR_PATH)
+    data_fingerprint = content_fingerprint(X, y)
+    for result in results:
+        # Superfície de resposta para consultas "e se" do monitoramento, com o mesmo pré-processamento
+        PDIMonitor(model_file(result['model_type'], '.npz'), PREPROCESSOR_PATH,
+                   optimize_setpoints=False).build_surface(surface_spec(X))
+
+        # Nova versão no registro, com as features, o pré-processamento, os dados e as métricas do treino
+        metrics = {'cv_r2': result['cv_r2'], 'search': result['search'], 'fit_time_s': result['fit_time_s'],
+                   'n_rows': len(X)}
+        entry = registry.register(result['model'], result['model_type'], preprocessor, metrics, data_fingerprint,
+                                  validation=X)
+        result['registry_id'] = entry['id']
+        print(f"Modelo registrado: {entry['id']} ({entry['size_bytes'] / 1024:.1f} KB, carga em "
+              f"{entry['load_ms']:.2f} ms, diferença máxima do float32: {entry.get('max_abs_error', 0):.2e})")
+    return results
+
+def model_file(model_type, extension):
+    return os.path.join(MODEL_DIR, f'pdi_model_{model_type}{extension}')
+
+def model_files(results):
+    files = [model_file(result['model_type'], extension) for result in results for extension in ('.pkl', '.npz')]
+    return files + [ModelRegistry().artifact_path(result['registry_id']) for result in results]
+
+@instrumented()
+def run_training(model_type, X, y, search, n_candidates, time_budget):
+    print(f"\n=== Treinando modelo: {model_type} ===")
+    trainer = ModelTrainer(model_type=model_type, search=search, n_candidates=n_candidates,
+                           time_budget=time_budget, n_jobs=args.n_jobs or -1)
+    start = time.perf_counter()
+    model = trainer.train_model(X, y)
+    fit_time = time.perf_counter() - start
+    trainer.compute_permutation_importance(X, y)
+
+    trainer.save_model(f'pdi_model_{model_type}.pkl')
+    trainer.export_compact(f'pdi_model_{model_type}.npz')
+
+    feature_importance = trainer.get_feature_importance()
+    if feature_importance is not None:
+        print(feature_importance.head())
+    trainer._print_feature_importance()
+
+    permutation_importance = trainer.get_permutation_importance()
+    print("\nImportância por permutação (queda de R²):")
+    print(permutation_importance.to_string(index=False))
+    return {
+        'model_type': model_type,
+        'cv_r2': trainer.search_report['best_score'],
+        'search': trainer.search_report['search'],
+        'fit_time_s': fit_time,
+        'model': model,
+        'feature_importance': feature_importance,
+        'permutation_importance': permutation_importance,
+    }
+
+def run_all_models(X, y, search, n_candidates, time_budget):
+    """Treina todos os modelos em paralelo sobre os mesmos dados"""
+    print(f"\n=== Treinando e comparando modelos: {', '.join(MODEL_TYPES)} ===")
+    with stage('train_models_parallel', rows=len(X)):
+        results = train_models_parallel(X, y, MODEL_TYPES, n_jobs=args.n_jobs, search=search,
+                                        n_candidates=n_candidates, time_budget=time_budget)
+    print("\nComparação entre modelos:")
+    print(build_leaderboard(results).to_string(index=False))
+    return results
+
+def evaluation_stage(df, results):
+    """Etapa 'avaliacao': gráficos de avaliação e análise de sensibilidade de cada modelo treinado"""
+    X, y, features = split_features(df)
+    with PlotRenderer(n_jobs=args.n_jobs, manifest=ArtifactManifest()) as renderer:
+        for result in results:
+            print(f"\n=== Avaliando modelo: {result['model_type']} ===")
+            evaluate_model(result['model_type'], result['model'], X, y, df, features, renderer)
+        return wait_plots(renderer, "de avaliação")
+
+@instrumented(rows=lambda model_type, model, X, *args: len(X))
+def evaluate_model(model_type, model, X, y, df, features, renderer):
+    # Figuras geradas em segundo plano pelo renderer, com o nome do modelo no arquivo
+    renderer.submit(Visualization.plot_combined_results, model, df, features, model_step_name='regressor',
+                    filename=f'combined_results_{model_type}')
+
+    y_pred = model.predict(X)
+    renderer.submit(Visualization.plot_actual_vs_predicted, y, y_pred, filename=f'actual_vs_predicted_{model_type}')
+    renderer.submit(Visualization.plot_residuals, y, y_pred, filename=f'residuals_{model_type}')
+
+    # Análise de sensibilidade: PD/ICE de todas as features e mapa do par amperagem x compressão
+    with stage('SensitivityAnalysis.run'):
+        sensitivity = SensitivityAnalysis(model, X).run(pairs=[], n_jobs=args.n_jobs or 1)
+    print("\nSensibilidade do PDI previsto (amplitude da dependência parcial):")
+    print(rank_features(sensitivity).to_string(index=False))
+    renderer.submit(Visualization.plot_sensitivity_analysis, df, 'Amperagem_Peletizadora', 'Taxa_Compressao', 'PDI', model,
+                    filename=f'sensitivity_{model_type}')
+
+def report_stage(df, results, threshold):
+    """Etapa 'relatorios': recomendações, configurações ideais e, com vários modelos, a comparação entre eles"""
+    # Cada relatório só é montado se as suas entradas (dados, versão do modelo, parâmetros e código) mudaram
+    paths = []
+    if len(results) > 1:
+        paths.append(PDIReport.save_leaderboard(
+            lambda: build_leaderboard(results),
+            inputs=([result['registry_id'] for result in results], source_fingerprint('parallel_training'))))
+    # Configurações ideais com base nos dados, calculadas uma vez e só se algum arquivo precisar ser refeito
+    ideal_settings = functools.cache(functools.partial(find_ideal_settings, df))
+    data = file_fingerprint(DATA_PATH)
+    for result in results:
+        paths.append(PDIReport.save_report(
+            lambda: PDIReport.generate_recommendation(result['permutation_importance'], threshold=threshold),
+            result['model_type'], inputs=(result['registry_id'], threshold)))
+        paths.append(PDIReport.save_ideal_settings(
+            ideal_settings, result['model_type'], inputs=(data, source_fingerprint(find_ideal_settings))))
+    return paths
+
+def monitoring_stage(results):
+    """Etapa 'monitoramento': análise de um conjunto atual de parâmetros com o melhor modelo treinado"""
+    monitored_model = max(results, key=lambda result: result['cv_r2'])['model_type']
+    if len(results) > 1:
+        print(f"\nMonitoramento com o melhor modelo: {monitored_model}")
+
+    monitor = PDIMonitor(model_file(monitored_model, '.npz'), PREPROCESSOR_PATH)
+    current_operation = {
+        'Pressao_Caldeira': 8.9,
+        'Taxa_Compressao': 18.75,
+        'Afastamento_Rolos': 0,
+        'Amperagem_Condicionador': 38,
+        'Velocidade_Alimentador': 76,
+        'Temp_Condicionador': 80,
+        'Pressao_Vapor': 1.4,
+        'Amperagem_Peletizadora': 630,
+        'Finos': 11.0
+    }
+    report = monitor.full_analysis(current_operation)
+
+    print("\nRelatório de Monitoramento:")
+    print(f"PDI Previsto: {report['predicted_pdi']}%")
+    print("\nAlertas:")
+    print("\n".join(report['alerts']) if report['alerts'] else "Nenhum alerta")
+    print("\nRecomendações:")
+    print("\n".join(report['recommendations']) if report['recommendations'] else "Nenhuma recomendação")
+
+    what_if = {'Amperagem_Peletizadora': 645, 'Taxa_Compressao': 18.9}
+    print(f"\nConsulta 'e se' {what_if}: PDI previsto {monitor.what_if(what_if):.2f}%")
+
+    ideal_pdi = report['predicted_pdi'] > 82
+    ideal_finos = current_operation['Finos'] < 10
+    print("\nCenário ideal atingido:", "Sim" if ideal_pdi and ideal_finos else "Não")
+
+def build_pipeline():
+    """
+    Etapas do fluxo principal e o que entra na chave de cada uma: com os mesmos
+    dados, parâmetros e código, a etapa é pulada (ex.: mudar só IMPORTANCE_THRESHOLD
+    refaz apenas os relatórios). 'eda' roda ao mesmo tempo que o treino.
+    """
+    pipeline = Pipeline(use_cache=not args.no_cache)
+    pipeline.add('dados', load_stage, params={},
+                 constants={'data': file_fingerprint(DATA_PATH)},
+                 code=[DataProcessor, Preprocessor], outputs=[PREPROCESSOR_PATH])
+    pipeline.add('eda', exploratory_stage, inputs=['dados'],
+                 constants={'plots': (LARGE_PLOT_ROWS, PLOT_BINS, PLOT_SAMPLE_POINTS)},
+                 code=[ExploratoryAnalysis, PlotRenderer, 'plot_aggregation', 'summary_stats'],
+                 outputs=lambda paths: paths)
+    pipeline.add(f'treino_{args.model}', training_stage, inputs=['dados'],
+                 params={'model_type': args.model, 'search': args.search, 'n_candidates': args.n_candidates,
+                         'time_budget': args.time_budget},
+                 constants={'permutation': (PERMUTATION_REPEATS, PERMUTATION_MAX_SAMPLES),
+                            'surface': (SURFACE_VARIABLES, SURFACE_POINTS)},
+                 code=[ModelTrainer, 'parallel_training', 'permutation_importance', 'fast_predictor', 'response_surface',
+                       'model_registry', run_training, run_all_models, split_features],
+                 outputs=model_files)
+    pipeline.add(f'avaliacao_{args.model}', evaluation_stage, inputs=['dados', f'treino_{args.model}'],
+                 constants={'plots': (LARGE_PLOT_ROWS, PLOT_BINS, PLOT_SAMPLE_POINTS)},
+                 code=[Visualization, SensitivityAnalysis, PlotRenderer, 'plot_aggregation', 'summary_stats',
+                       evaluate_model, split_features],
+                 outputs=lambda paths: paths)
+    pipeline.add(f'relatorios_{args.model}', report_stage, inputs=['dados', f'treino_{args.model}'],
+                 params={'threshold': IMPORTANCE_THRESHOLD},
+                 code=[PDIReport, find_ideal_settings, 'parallel_training'],
+                 outputs=lambda paths: paths)
+    # Consulta ao vivo do monitoramento: sempre executada
+    pipeline.add('monitoramento', monitoring_stage, inputs=[f'treino_{args.model}'], cache=False)
+    return pipeline
+
+@instrumented()
+def run_incremental_update(model_type, data_path):
+    """Atualiza a última versão do modelo com novos dados, usando o pré-processamento do treino"""
+    print(f"\n=== Atualizando modelo {model_type} com {data_path} ===")
+    new_data = DataProcessor(data_path)
+    if not new_data.load_data():
+        return
+    preprocessor = Preprocessor.load(PREPROCESSOR_PATH)
+    df_new = preprocessor.transform_frame(new_data.df)
+
+    trainer = ModelTrainer(model_type=model_type)
+    trainer.load_latest()
+    trainer.update(df_new.drop(['PDI', 'Finos'], axis=1), df_new['PDI'])
+
+def report_stage_metrics():
+    """Imprime a tabela das etapas medidas e exporta para METRICS_PATH (.json e .prom)"""
+    print("\nTempo por etapa:")
+    print(instrumentation.summary())
+    instrumentation.export_json(METRICS_PATH + '.json')
+    instrumentation.export_prometheus(METRICS_PATH + '.prom')
+    print(f"Métricas das etapas salvas em {METRICS_PATH}.json e {METRICS_PATH}.prom")
+    if args.profile:
+        print(f"Perfis do cProfile salvos em {PROFILE_DIR}")
+
+def main():
+    if args.instrument or args.profile:
+        instrumentation.enable(profile=args.profile)
+    try:
+        run_pipeline()
+    finally:
+        shutdown_executor()
+        if instrumentation.is_enabled():
+            report_stage_metrics()
+
+def run_pipeline():
+    if args.update:
+        if args.model == 'all':
+            print("A atualização incremental exige um único modelo (--model bayesian ou random_forest).")
+            return
+        run_incremental_update(args.model, args.update)
+        return
+
+    if not os.path.exists(DATA_PATH):
+        print(f"Erro ao carregar dados: arquivo {DATA_PATH} não encontrado")
+        return
+    pipeline = build_pipeline()
+    try:
+        pipeline.run()
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
+    print(f"\nEtapas executadas: {', '.join(pipeline.executed) or 'nenhuma'}; "
+          f"sem alterações: {', '.join(pipeline.cached) or 'nenhuma'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import numpy as np
+from config import REGISTRY_DIR, REGISTRY_FLOAT32
+from fast_predictor import PREDICTOR_KINDS, compile_predictor
+from preprocessor import Preprocessor
+
+# Registros feitos por threads diferentes do pipeline não podem intercalar a leitura e a escrita do índice
+_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Registro versionado dos modelos em REGISTRY_DIR.
+
+    Cada versão é um diretório <tipo>_v<N> com um .npy por array do preditor
+    compilado e do pré-processamento (carregados com mapeamento em memória, sem
+    pickle) e um meta.json com a ordem das features, a impressão digital dos
+    dados de treino, as métricas de validação cruzada e os tempos de treino.
+
+    O index.json guarda os metadados de todas as versões e os ponteiros para a
+    última versão e a melhor (maior R² de CV; no empate, a mais recente) de cada
+    tipo e no geral, atualizados a cada registro: escolher o modelo do
+    monitoramento é uma consulta ao índice, sem abrir nenhum modelo.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+
+    def _read_index(self):
+        """Índice do registro; sem index.json, ou com um ilegível, é reconstruído a partir dos meta.json"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Aviso: índice {self.index_path} ilegível, reconstruído a partir das versões - {e}")
+        return self._rebuild_index()
+
+    def _rebuild_index(self):
+        index = {'models': {}, 'latest': {}, 'best': {}}
+        versions = []
+        for model_id in self._version_dirs():
+            path = os.path.join(self.root, model_id)
+            try:
+                started = time.perf_counter()
+                _, meta = load_artifact(path)
+                load_s = time.perf_counter() - started
+            except Exception as e:
+                print(f"Aviso: {path} ignorado na reconstrução do índice - {str(e) or type(e).__name__}")
+                continue
+            entry = {key: meta[key] for key in ('id', 'model_type', 'version', 'kind', 'created',
+                                                'data_fingerprint', 'metrics')}
+            entry.update(path=model_id, size_bytes=_directory_size(path), load_ms=round(load_s * 1000, 3))
+            versions.append(entry)
+        for entry in sorted(versions, key=lambda entry: entry['created']):
+            _add_entry(index, entry)
+        return index
+
+    def _version_dirs(self, model_type=None):
+        """Diretórios <tipo>_v<N> existentes (do tipo informado, ou de todos)"""
+        if not os.path.isdir(self.root):
+            return []
+        pattern = re.compile(rf"{re.escape(model_type) if model_type else '.+'}_v\d+")
+        return [entry.name for entry in os.scandir(self.root) if entry.is_dir() and pattern.fullmatch(entry.name)]
+
+    def _write_index(self, index):
+        with open(self.index_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def register(self, model, model_type, preprocessor=None, metrics=None, data_fingerprint=None,
+                 validation=None, float32=REGISTRY_FLOAT32):
+        """
+        Registra uma nova versão do modelo (pipeline do sklearn ou preditor compilado).
+        Com validation (amostra de X), mede a diferença máxima de previsão causada pelo float32.
+        Retorna a entrada do índice.
+        """
+        predictor = compile_predictor(model)
+        if predictor is None:
+            raise ValueError(f"Modelo '{model_type}' não tem formato compacto para o registro")
+        kind = next(name for name, cls in PREDICTOR_KINDS.items() if isinstance(predictor, cls))
+        arrays = predictor.to_arrays()
+        feature_names = arrays.pop('feature_names').tolist()
+        if float32 and kind == 'tree_ensemble':
+            arrays['threshold'] = _float32_thresholds(arrays['threshold'])
+            arrays['value'] = arrays['value'].astype(np.float32)
+            arrays['feature'] = arrays['feature'].astype(_smallest_int(len(feature_names)))
+        if preprocessor is not None:
+            preprocessor = preprocessor.subset(feature_names)
+            arrays.update(preprocessor_lower=preprocessor.lower, preprocessor_upper=preprocessor.upper,
+                          preprocessor_medians=preprocessor.medians)
+
+        with _lock:
+            os.makedirs(self.root, exist_ok=True)
+            index = self._read_index()
+            # Os diretórios também contam: o índice pode ter sido apagado ou estar desatualizado
+            version = max([entry['version'] for entry in index['models'].values()
+                           if entry['model_type'] == model_type] +
+                          [int(name.rsplit('_v', 1)[1]) for name in self._version_dirs(model_type)], default=0) + 1
+            model_id = f"{model_type}_v{version}"
+            path = os.path.join(self.root, model_id)
+            meta = {
+                'id': model_id,
+                'model_type': model_type,
+                'version': version,
+                'kind': kind,
+                'feature_names': feature_names,
+                'created': time.time(),
+                'data_fingerprint': data_fingerprint,
+                'metrics': dict(metrics or {}),
+                # Escalares ficam no JSON; só os arrays viram arquivos .npy
+                'scalars': {name: array.item() for name, array in arrays.items() if np.ndim(array) == 0},
+                'arrays': {name: str(array.dtype) for name, array in arrays.items() if np.ndim(array) > 0},
+            }
+            # Escreve em um diretório temporário e renomeia: o monitor nunca vê uma versão pela metade
+            tmp_path = path + '.tmp'
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            for name in meta['arrays']:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), arrays[name], allow_pickle=False)
+            with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+
+            started = time.perf_counter()
+            loaded, _ = load_artifact(path)
+            load_s = time.perf_counter() - started
+            entry = {key: meta[key] for key in ('id', 'model_type', 'version', 'kind', 'created',
+                                                'data_fingerprint', 'metrics')}
+            entry.update(path=model_id, size_bytes=_directory_size(path), load_ms=round(load_s * 1000, 3))
+            if validation is not None:
+                # Mesma entrada para os dois preditores: a diferença vem só do armazenamento em float32
+                loaded.preprocessor = None
+                sample = np.asarray(validation[feature_names] if hasattr(validation, 'columns') else validation,
+                                    dtype=np.float64)[:1000]
+                entry['max_abs_error'] = float(np.max(np.abs(loaded.predict(sample) - predictor.predict(sample)),
+                                                      initial=0.0))
+
+            _add_entry(index, entry)
+            self._write_index(index)
+        return entry
+
+    def entries(self):
+        """Metadados de todas as versões registradas, da mais antiga para a mais recente"""
+        return sorted(self._read_index()['models'].values(), key=lambda entry: entry['created'])
+
+    def latest(self, model_type):
+        index = self._read_index()
+        return index['models'].get(index['latest'].get(model_type))
+
+    def best(self, model_type=None):
+        """Melhor versão do tipo informado (ou de todos), pelo ponteiro do índice; None se não houver"""
+        index = self._read_index()
+        return index['models'].get(index['best'].get(model_type or '*'))
+
+    def artifact_path(self, entry_or_id):
+        model_id = entry_or_id['id'] if isinstance(entry_or_id, dict) else entry_or_id
+        return os.path.join(self.root, model_id)
+
+    def load(self, entry_or_id, mmap_mode='r'):
+        """Preditor compilado da versão, com o pré-processamento do treino (predictor.preprocessor)"""
+        predictor, _ = load_artifact(self.artifact_path(entry_or_id), mmap_mode)
+        return predictor
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(str(path), 'meta.json'))
+
+
+def load_artifact(path, mmap_mode='r'):
+    """
+    Carrega uma versão do registro: os .npy são mapeados em memória (mmap_mode=None lê tudo).
+    Retorna o preditor compilado, com o pré-processamento do treino, e os metadados.
+    """
+    with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+              for name in meta['arrays']}
+    arrays.update({name: np.array(value) for name, value in meta['scalars'].items()})
+    arrays['feature_names'] = np.array(meta['feature_names'])
+    preprocessor = None
+    if 'preprocessor_lower' in arrays:
+        preprocessor = Preprocessor(meta['feature_names'], arrays.pop('preprocessor_lower'),
+                                    arrays.pop('preprocessor_upper'), arrays.pop('preprocessor_medians'))
+    predictor = PREDICTOR_KINDS[meta['kind']].from_arrays(arrays)
+    predictor.preprocessor = preprocessor
+    return predictor, meta
+
+
+def _float32_thresholds(threshold):
+    """
+    Limiares em float32 arredondados para baixo: as leituras são comparadas em float32,
+    e x <= t vale exatamente quando x <= maior float32 que não passa de t.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _smallest_int(max_value):
+    return next(dtype for dtype in (np.int8, np.int16, np.int32) if np.iinfo(dtype).max >= max_value)
+
+
+def _add_entry(index, entry):
+    """Inclui a versão no índice e atualiza os ponteiros de última e melhor versão"""
+    model_id, model_type = entry['id'], entry['model_type']
+    index['models'][model_id] = entry
+    index['latest'][model_type] = model_id
+    for key in (model_type, '*'):
+        current = index['models'].get(index['best'].get(key))
+        if current is None or _score(entry) >= _score(current):
+            index['best'][key] = model_id
+
+
+def _score(entry):
+    score = entry['metrics'].get('cv_r2')
+    return -np.inf if score is None else score
+
+
+def _directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def import_models(paths, model_type, registry=None, preprocessor_path=None):
+    """Registra pickles antigos (pipelines RobustScaler + regressor) sem metadados de treino"""
+    import joblib
+    registry = registry or ModelRegistry()
+    preprocessor = Preprocessor.load(preprocessor_path) if preprocessor_path else None
+    for path in paths:
+        try:
+            model = joblib.load(path)
+            entry = registry.register(model, model_type, preprocessor, metrics={'source': os.path.abspath(path)})
+        except Exception as e:
+            print(f"Aviso: {path} não foi registrado - {str(e) or type(e).__name__}")
+            continue
+        print(f"{path} registrado como {entry['id']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de modelos")
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('list', help="Lista as versões com tamanho em disco e tempo de carga")
+    importer = subparsers.add_parser('import', help="Registra modelos salvos em pickle (.pkl)")
+    importer.add_argument('paths', nargs='+')
+    importer.add_argument('--model-type', required=True)
+    importer.add_argument('--preprocessor', default=None, help="preprocessor.npz usado no treino desses modelos")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'import':
+        import_models(args.paths, args.model_type, registry, args.preprocessor)
+        return
+
+    entries = registry.entries()
+    if not entries:
+        print(f"Nenhum modelo registrado em {args.root}")
+        return
+    best = registry.best()
+    print(f"{'Versão':<28} {'R² CV':>7} {'Treino (s)':>10} {'Tamanho (KB)':>12} {'Carga (ms)':>10} {'Carga agora (ms)':>16}")
+    for entry in entries:
+        started = time.perf_counter()
+        registry.load(entry)
+        load_ms = (time.perf_counter() - started) * 1000
+        cv_r2 = entry['metrics'].get('cv_r2')
+        fit_time = entry['metrics'].get('fit_time_s')
+        marker = " *" if best is not None and entry['id'] == best['id'] else ""
+        print(f"{entry['id'] + marker:<28} {cv_r2 if cv_r2 is not None else float('nan'):>7.3f} "
+              f"{fit_time if fit_time is not None else float('nan'):>10.1f} {entry['size_bytes'] / 1024:>12.1f} "
+              f"{entry['load_ms']:>10.2f} {load_ms:>16.2f}")
+    print("* melhor modelo (usado pelo monitoramento com --registry)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,121 +1,401 @@
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import RobustScaler
-from sklearn.model_selection import KFold, cross_val_score, GridSearchCV
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import BayesianRidge
-import joblib
-import pandas as pd
-import numpy as np
-import os
-from config import MODEL_DIR
-
-class ModelTrainer:
-    def __init__(self, model_type='bayesian'):
-        self.model = None
-        self.feature_importance = None
-        self.model_type = model_type.lower()
-
-    def train_model(self, X, y):
-        if self.model_type == 'random_forest':
-            base_model = RandomForestRegressor(random_state=42)
-            param_grid = {
-                'regressor__n_estimators': [100, 200],
-                'regressor__max_depth': [None, 10, 20],
-                'regressor__min_samples_split': [2, 5],
-                'regressor__min_samples_leaf': [1, 2]
-            }
-        elif self.model_type == 'gradient_boosting':
-            base_model = GradientBoostingRegressor(random_state=42)
-            param_grid = {
-                'regressor__n_estimators': [100, 200],
-                'regressor__learning_rate': [0.05, 0.1],
-                'regressor__max_depth': [3, 5],
-                'regressor__min_samples_split': [2, 5],
-                'regressor__min_samples_leaf': [1, 2]
-            }
-        else:
-            base_model = BayesianRidge()
-            param_grid = None
-
-        pipeline = Pipeline([
-            ('scaler', RobustScaler()),
-            ('regressor', base_model)
-        ])
-
-        if param_grid:
-            grid_search = GridSearchCV(pipeline, param_grid, cv=5, scoring='r2', n_jobs=-1)
-            grid_search.fit(X, y)
-            pipeline = grid_search.best_estimator_
-            print("Melhores parâmetros:", grid_search.best_params_)
-            print(f"Melhor R²: {grid_search.best_score_:.3f}")
-        else:
-            cv = KFold(n_splits=5, shuffle=True, random_state=42)
-            cv_scores = cross_val_score(pipeline, X, y, cv=cv, scoring='r2')
-            print(f"Performance CV: R² médio = {np.mean(cv_scores):.3f} (±{np.std(cv_scores):.3f})")
-            pipeline.fit(X, y)
-
-        self.model = pipeline
-        self._calculate_feature_importance(X.columns)
-        return pipeline
-
-    def _calculate_feature_importance(self, feature_names):
-        reg = self.model.named_steps['regressor']
-        if hasattr(reg, 'feature_importances_'):
-            importances = reg.feature_importances_
-            self.feature_importance = pd.DataFrame({
-                'Feature': feature_names,
-                'Importance': importances
-            }).sort_values('Importance', ascending=False)
-        elif hasattr(reg, 'coef_'):
-            coefs = reg.coef_
-            self.feature_importance = pd.DataFrame({
-                'Feature': feature_names,
-                'Coefficient': coefs
-            }).sort_values('Coefficient', ascending=False)
-        else:
-            self.feature_importance = None
-
-    def get_ideal_settings(self, features, df):
-        """
-        Calcula configurações ideais baseadas na média ponderada das features importantes,
-        excluindo variáveis de saída ('PDI' e 'Finos').
-        """
-        if self.feature_importance is None:
-            return {}
-
-        # Remove 'PDI' e 'Finos' das features para considerar só entradas válidas
-        valid_features = [f for f in features if f not in ['PDI', 'Finos'] and f in df.columns]
-
-        weighted_avgs = {}
-        total_weight = self.feature_importance.iloc[:, 1].abs().sum()
-
-        for _, row in self.feature_importance.iterrows():
-            feature = row['Feature']
-            if feature in valid_features:
-                weight = abs(row[self.feature_importance.columns[1]]) / total_weight
-                weighted_avgs[feature] = (df[feature] * weight).mean()
-
-        return weighted_avgs
-
-    def save_model(self, filename):
-        if self.model is not None:
-            os.makedirs(MODEL_DIR, exist_ok=True)
-            filepath = os.path.join(MODEL_DIR, filename)
-            joblib.dump(self.model, filepath)
-            print(f"Modelo salvo em {filepath}")
-        else:
-            raise ValueError("Nenhum modelo treinado para salvar")
-
-    def load_model(self, filepath):
-        self.model = joblib.load(filepath)
-        return self.model
-
-    def get_feature_importance(self):
-        return self.feature_importance.copy() if self.feature_importance is not None else None
-
-    def _print_feature_importance(self):
-        if self.feature_importance is not None:
-            print("\nImportância das Features:")
-            print(self.feature_importance.head(10))
-        else:
-            print("\nNão foi possível determinar a importância das features")
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import RobustScaler
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (habilita HalvingRandomSearchCV)
+from sklearn.model_selection import (KFold, cross_val_score, GridSearchCV, HalvingRandomSearchCV,
+                                     ParameterSampler)
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.linear_model import BayesianRidge
+from scipy.stats import randint, loguniform
+import joblib
+import pandas as pd
+import numpy as np
+import os
+import re
+import time
+from config import MODEL_DIR
+from fast_predictor import compile_predictor, save_compact
+from permutation_importance import permutation_importance
+from instrumentation import instrumented
+
+SEARCH_MODES = ('grid', 'halving', 'random')
+
+class ModelTrainer:
+    def __init__(self, model_type='bayesian', search='grid', n_candidates=None, time_budget=None, n_jobs=-1):
+        self.model = None
+        self.feature_importance = None
+        # Importância por permutação (comparável entre modelos), salva ao lado do modelo
+        self.permutation_importance = None
+        self.model_type = model_type.lower()
+        # Estratégia de busca de hiperparâmetros (modelos de árvore)
+        if search not in SEARCH_MODES:
+            raise ValueError(f"Modo de busca inválido: {search}. Use um de {SEARCH_MODES}.")
+        self.search = search
+        self.n_candidates = n_candidates
+        # Só a busca random avalia um candidato por vez e pode parar no tempo limite
+        if time_budget is not None and search != 'random':
+            raise ValueError(f"time_budget só é suportado na busca random, não em '{search}'")
+        self.time_budget = time_budget
+        # Núcleos usados pela busca/validação cruzada (-1 = todos)
+        self.n_jobs = n_jobs
+        # Tempo total e melhor score da última busca
+        self.search_report = None
+        # Estatísticas suficientes (X^T X, X^T y, ...) no espaço escalado, para atualização incremental
+        self.sufficient_stats = None
+
+    @instrumented(rows=lambda self, X, y: len(X), memory=True)
+    def train_model(self, X, y):
+        param_distributions = None
+        if self.model_type == 'random_forest':
+            base_model = RandomForestRegressor(random_state=42)
+            param_grid = {
+                'regressor__n_estimators': [100, 200],
+                'regressor__max_depth': [None, 10, 20],
+                'regressor__min_samples_split': [2, 5],
+                'regressor__min_samples_leaf': [1, 2]
+            }
+            param_distributions = {
+                'regressor__n_estimators': randint(50, 301),
+                'regressor__max_depth': [None, 5, 10, 15, 20, 30],
+                'regressor__min_samples_split': randint(2, 11),
+                'regressor__min_samples_leaf': randint(1, 5),
+                'regressor__max_features': [1.0, 'sqrt', 0.5]
+            }
+        elif self.model_type == 'gradient_boosting':
+            base_model = GradientBoostingRegressor(random_state=42)
+            param_grid = {
+                'regressor__n_estimators': [100, 200],
+                'regressor__learning_rate': [0.05, 0.1],
+                'regressor__max_depth': [3, 5],
+                'regressor__min_samples_split': [2, 5],
+                'regressor__min_samples_leaf': [1, 2]
+            }
+            if self.search != 'grid':
+                # Early stopping pela perda na validação: n_estimators é só um teto
+                base_model = GradientBoostingRegressor(
+                    n_estimators=1000, n_iter_no_change=10, validation_fraction=0.1, random_state=42
+                )
+            param_distributions = {
+                'regressor__learning_rate': loguniform(0.01, 0.3),
+                'regressor__max_depth': randint(2, 7),
+                'regressor__min_samples_split': randint(2, 11),
+                'regressor__min_samples_leaf': randint(1, 5),
+                'regressor__subsample': [0.7, 0.85, 1.0]
+            }
+        else:
+            base_model = BayesianRidge()
+            param_grid = None
+
+        pipeline = Pipeline([
+            ('scaler', RobustScaler()),
+            ('regressor', base_model)
+        ])
+
+        start = time.perf_counter()
+        if param_grid:
+            pipeline, best_params, best_score, n_evaluated = self._search(
+                pipeline, param_grid, param_distributions, X, y
+            )
+            print("Melhores parâmetros:", best_params)
+            print(f"Melhor R²: {best_score:.3f}")
+            search = self.search
+        else:
+            cv = KFold(n_splits=5, shuffle=True, random_state=42)
+            cv_scores = cross_val_score(pipeline, X, y, cv=cv, scoring='r2')
+            print(f"Performance CV: R² médio = {np.mean(cv_scores):.3f} (±{np.std(cv_scores):.3f})")
+            pipeline.fit(X, y)
+            best_score, n_evaluated, search = np.mean(cv_scores), 1, 'cv'
+
+        self.search_report = {
+            'search': search,
+            'n_candidates': n_evaluated,
+            'best_score': float(best_score),
+            'wall_time': time.perf_counter() - start
+        }
+        print(f"Busca '{search}': {n_evaluated} candidato(s) em {self.search_report['wall_time']:.1f}s, "
+              f"melhor R² = {best_score:.3f}")
+
+        self.model = pipeline
+        self.permutation_importance = None
+        if self.model_type == 'bayesian':
+            self.sufficient_stats = None
+            self._accumulate_stats(pipeline.named_steps['scaler'].transform(X), y)
+        self._calculate_feature_importance(X.columns)
+        return pipeline
+
+    @instrumented(rows=lambda self, X_new, *args, **kwargs: len(X_new), memory=True)
+    def update(self, X_new, y_new, n_new_trees=50, max_trees=None):
+        """
+        Atualiza o modelo treinado com novos dados de produção, sem retreinar do zero,
+        e salva uma nova versão (pdi_model_<tipo>_v<N>) em MODEL_DIR.
+
+        O scaler ajustado no treino é mantido. No bayesian, as estatísticas
+        suficientes dos dados novos são somadas às do histórico e o BayesianRidge
+        é reajustado a partir delas em O(features²), sem revisitar o histórico.
+        No random_forest, n_new_trees árvores são treinadas nos dados novos
+        (warm_start); com max_trees, as árvores mais antigas são descartadas.
+        Retorna o caminho do modelo salvo.
+        """
+        if self.model is None:
+            raise ValueError("Nenhum modelo treinado para atualizar")
+        scaler = self.model.named_steps['scaler']
+        regressor = self.model.named_steps['regressor']
+        X_scaled = scaler.transform(X_new)
+        y_new = np.asarray(y_new, dtype=np.float64)
+
+        if self.model_type == 'bayesian':
+            if self.sufficient_stats is None:
+                raise ValueError("Estatísticas suficientes não disponíveis para este modelo; retreine com train_model")
+            self._accumulate_stats(X_scaled, y_new)
+            self._refit_bayesian(regressor)
+            print(f"BayesianRidge reajustado com {self.sufficient_stats['n']:.0f} amostras acumuladas")
+        elif self.model_type == 'random_forest':
+            n_trees = len(regressor.estimators_)
+            regressor.set_params(warm_start=True, n_estimators=n_trees + n_new_trees)
+            regressor.fit(X_scaled, y_new)
+            regressor.set_params(warm_start=False)
+            if max_trees is not None and len(regressor.estimators_) > max_trees:
+                regressor.estimators_ = regressor.estimators_[-max_trees:]
+                regressor.set_params(n_estimators=max_trees)
+            print(f"Random forest atualizado: {len(regressor.estimators_)} árvores")
+        else:
+            raise ValueError(f"Atualização incremental não suportada para '{self.model_type}'")
+
+        self._calculate_feature_importance(list(scaler.feature_names_in_))
+        # A importância por permutação do modelo anterior não vale para a nova versão
+        self.permutation_importance = None
+        version = self._next_version()
+        model_path = self.save_model(f'pdi_model_{self.model_type}_v{version}.pkl')
+        self.export_compact(f'pdi_model_{self.model_type}_v{version}.npz')
+        return model_path
+
+    def _accumulate_stats(self, X_scaled, y):
+        """Soma as estatísticas suficientes de um bloco de dados (já escalado) às acumuladas"""
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        block = {
+            'n': np.float64(len(y)),
+            'sum_x': X_scaled.sum(axis=0),
+            'sum_y': y.sum(),
+            'xtx': X_scaled.T @ X_scaled,
+            'xty': X_scaled.T @ y,
+            'yty': y @ y,
+        }
+        if self.sufficient_stats is None:
+            self.sufficient_stats = block
+        else:
+            for key, value in block.items():
+                self.sufficient_stats[key] = self.sufficient_stats[key] + value
+
+    def _refit_bayesian(self, regressor):
+        """
+        Reajusta o BayesianRidge apenas a partir das estatísticas suficientes.
+        Mesmo procedimento iterativo do sklearn (maximização da evidência para
+        alpha e lambda), usando a decomposição de X^T X centrado em vez do SVD de X.
+        """
+        stats = self.sufficient_stats
+        n = stats['n']
+        x_mean = stats['sum_x'] / n
+        y_mean = stats['sum_y'] / n
+        xtx = stats['xtx'] - n * np.outer(x_mean, x_mean)
+        xty = stats['xty'] - n * x_mean * y_mean
+        yty = stats['yty'] - n * y_mean ** 2
+
+        eigen_vals, eigen_vecs = np.linalg.eigh(xtx)
+        eigen_vals = np.clip(eigen_vals, 0.0, None)
+        projected = eigen_vecs.T @ xty
+        alpha, lambda_ = regressor.alpha_, regressor.lambda_
+
+        coef_old = None
+        for _ in range(regressor.max_iter):
+            coef = eigen_vecs @ (projected / (eigen_vals + lambda_ / alpha))
+            rmse = yty - 2 * coef @ xty + coef @ xtx @ coef
+            gamma = np.sum(alpha * eigen_vals / (lambda_ + alpha * eigen_vals))
+            lambda_ = (gamma + 2 * regressor.lambda_1) / (coef @ coef + 2 * regressor.lambda_2)
+            alpha = (n - gamma + 2 * regressor.alpha_1) / (rmse + 2 * regressor.alpha_2)
+            if coef_old is not None and np.sum(np.abs(coef_old - coef)) < regressor.tol:
+                break
+            coef_old = coef
+
+        coef = eigen_vecs @ (projected / (eigen_vals + lambda_ / alpha))
+        regressor.coef_ = coef
+        regressor.intercept_ = y_mean - x_mean @ coef
+        regressor.alpha_ = alpha
+        regressor.lambda_ = lambda_
+        regressor.sigma_ = (eigen_vecs / (alpha * eigen_vals + lambda_)) @ eigen_vecs.T
+        regressor.X_offset_ = x_mean
+        regressor.X_scale_ = np.ones_like(x_mean)
+
+    def _next_version(self):
+        """Próximo número de versão livre para este tipo de modelo em MODEL_DIR"""
+        pattern = re.compile(rf"pdi_model_{self.model_type}_v(\d+)\.pkl$")
+        versions = [int(m.group(1)) for m in map(pattern.match, os.listdir(MODEL_DIR)) if m] \
+            if os.path.isdir(MODEL_DIR) else []
+        return max(versions, default=0) + 1
+
+    def load_latest(self):
+        """Carrega a versão mais recente do modelo (ou o modelo base, se não houver versões)"""
+        latest = self._next_version() - 1
+        filename = f'pdi_model_{self.model_type}_v{latest}.pkl' if latest else f'pdi_model_{self.model_type}.pkl'
+        return self.load_model(os.path.join(MODEL_DIR, filename))
+
+    def _search(self, pipeline, param_grid, param_distributions, X, y):
+        """
+        Executa a busca de hiperparâmetros conforme self.search e retorna
+        (melhor pipeline, melhores parâmetros, melhor R² de CV, candidatos avaliados).
+
+        - grid: GridSearchCV exaustivo sobre param_grid.
+        - halving: successive halving sobre o número de amostras; os candidatos
+          começam com poucas linhas e só os melhores (1/3 por rodada) recebem mais.
+        - random: amostras aleatórias de param_distributions avaliadas uma a uma,
+          até n_candidates ou até esgotar time_budget (segundos).
+        """
+        if self.search == 'grid':
+            search = GridSearchCV(pipeline, param_grid, cv=5, scoring='r2', n_jobs=self.n_jobs)
+            search.fit(X, y)
+            return search.best_estimator_, search.best_params_, search.best_score_, len(search.cv_results_['params'])
+
+        if self.search == 'halving':
+            search = HalvingRandomSearchCV(
+                pipeline, param_distributions, n_candidates=self.n_candidates or 'exhaust',
+                resource='n_samples', factor=3, cv=5, scoring='r2', n_jobs=self.n_jobs, random_state=42
+            )
+            search.fit(X, y)
+            return search.best_estimator_, search.best_params_, search.best_score_, search.n_candidates_[0]
+
+        cv = KFold(n_splits=5, shuffle=True, random_state=42)
+        sampler = ParameterSampler(param_distributions, n_iter=self.n_candidates or 20, random_state=42)
+        deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        best_params, best_score, n_evaluated = None, -np.inf, 0
+        for params in sampler:
+            # O primeiro candidato é sempre avaliado, mesmo com o tempo esgotado
+            if n_evaluated and deadline is not None and time.perf_counter() >= deadline:
+                print(f"Tempo limite de {self.time_budget}s atingido após {n_evaluated} candidato(s).")
+                break
+            candidate = clone(pipeline).set_params(**params)
+            score = np.mean(cross_val_score(candidate, X, y, cv=cv, scoring='r2', n_jobs=self.n_jobs))
+            n_evaluated += 1
+            if score > best_score:
+                best_params, best_score = params, score
+        if best_params is None:
+            raise ValueError(f"Nenhum dos {n_evaluated} candidato(s) da busca aleatória obteve R² de CV válido")
+        best_pipeline = clone(pipeline).set_params(**best_params).fit(X, y)
+        return best_pipeline, best_params, best_score, n_evaluated
+
+    def _calculate_feature_importance(self, feature_names):
+        reg = self.model.named_steps['regressor']
+        if hasattr(reg, 'feature_importances_'):
+            importances = reg.feature_importances_
+            self.feature_importance = pd.DataFrame({
+                'Feature': feature_names,
+                'Importance': importances
+            }).sort_values('Importance', ascending=False)
+        elif hasattr(reg, 'coef_'):
+            coefs = reg.coef_
+            self.feature_importance = pd.DataFrame({
+                'Feature': feature_names,
+                'Coefficient': coefs
+            }).sort_values('Coefficient', ascending=False)
+        else:
+            self.feature_importance = None
+
+    @instrumented(rows=lambda self, X, *args, **kwargs: len(X), memory=True)
+    def compute_permutation_importance(self, X, y, n_jobs=None):
+        """Calcula a importância por permutação do modelo treinado (guardada por save_model)"""
+        if self.model is None:
+            raise ValueError("Nenhum modelo treinado para calcular a importância")
+        start = time.perf_counter()
+        self.permutation_importance = permutation_importance(
+            self.model, X, y, n_jobs=n_jobs if n_jobs is not None else self.n_jobs)
+        print(f"Importância por permutação calculada em {time.perf_counter() - start:.1f}s")
+        return self.permutation_importance
+
+    def get_permutation_importance(self):
+        return self.permutation_importance.copy() if self.permutation_importance is not None else None
+
+    def get_ideal_settings(self, features, df):
+        """
+        Calcula configurações ideais baseadas na média ponderada das features importantes,
+        excluindo variáveis de saída ('PDI' e 'Finos').
+        """
+        if self.feature_importance is None:
+            return {}
+
+        # Remove 'PDI' e 'Finos' das features para considerar só entradas válidas
+        valid_features = [f for f in features if f not in ['PDI', 'Finos'] and f in df.columns]
+
+        weighted_avgs = {}
+        total_weight = self.feature_importance.iloc[:, 1].abs().sum()
+
+        for _, row in self.feature_importance.iterrows():
+            feature = row['Feature']
+            if feature in valid_features:
+                weight = abs(row[self.feature_importance.columns[1]]) / total_weight
+                weighted_avgs[feature] = (df[feature] * weight).mean()
+
+        return weighted_avgs
+
+    @instrumented()
+    def save_model(self, filename):
+        if self.model is not None:
+            os.makedirs(MODEL_DIR, exist_ok=True)
+            filepath = os.path.join(MODEL_DIR, filename)
+            # Troca atômica: o hot-reload do monitor nunca lê um pickle incompleto
+            joblib.dump(self.model, filepath + '.tmp')
+            os.replace(filepath + '.tmp', filepath)
+            if self.sufficient_stats is not None:
+                np.savez(self._stats_path(filepath), **self.sufficient_stats)
+            if self.permutation_importance is not None:
+                self.permutation_importance.to_csv(self._importance_path(filepath), index=False)
+            print(f"Modelo salvo em {filepath}")
+            return filepath
+        else:
+            raise ValueError("Nenhum modelo treinado para salvar")
+
+    @instrumented()
+    def export_compact(self, filename):
+        """
+        Exporta o pipeline treinado (scaler + regressor) para o formato compacto
+        de arrays NumPy (.npz) usado pelo PDIMonitor, sem depender de pickle/sklearn.
+        """
+        if self.model is None:
+            raise ValueError("Nenhum modelo treinado para exportar")
+        predictor = compile_predictor(self.model)
+        if predictor is None:
+            raise ValueError(f"Modelo '{self.model_type}' não suporta exportação compacta")
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        filepath = os.path.join(MODEL_DIR, filename)
+        save_compact(predictor, filepath)
+        print(f"Modelo compacto salvo em {filepath}")
+        return filepath
+
+    def load_model(self, filepath):
+        self.model = joblib.load(filepath)
+        self.sufficient_stats = None
+        stats_path = self._stats_path(filepath)
+        if os.path.exists(stats_path):
+            with np.load(stats_path) as data:
+                self.sufficient_stats = {key: data[key] for key in data.files}
+        importance_path = self._importance_path(filepath)
+        self.permutation_importance = pd.read_csv(importance_path) if os.path.exists(importance_path) else None
+        return self.model
+
+    @staticmethod
+    def _stats_path(model_path):
+        """Arquivo com as estatísticas suficientes salvo ao lado do modelo"""
+        return os.path.splitext(model_path)[0] + '_stats.npz'
+
+    @staticmethod
+    def _importance_path(model_path):
+        """Importância por permutação salva ao lado do modelo"""
+        return os.path.splitext(model_path)[0] + '_importance.csv'
+
+    def get_feature_importance(self):
+        return self.feature_importance.copy() if self.feature_importance is not None else None
+
+    def _print_feature_importance(self):
+        if self.feature_importance is not None:
+            print("\nImportância das Features:")
+            print(self.feature_importance.head(10))
+        else:
+            print("\nNão foi possível determinar a importância das features")
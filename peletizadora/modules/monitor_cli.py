@@ -0,0 +1,104 @@
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+from config import MODEL_DIR
+from monitoring_system import PDIMonitor
+
+_imported = time.perf_counter()
+
+# Módulos pesados que o monitoramento de uma leitura não deve carregar (conferidos em --startup-profile)
+HEAVY_MODULES = ['pandas', 'joblib', 'sklearn', 'scipy', 'matplotlib', 'seaborn']
+
+
+def process_age():
+    """Segundos desde o início do processo, incluindo a inicialização do interpretador (só Linux; senão None)"""
+    try:
+        with open('/proc/self/stat', 'rb') as f:
+            # O nome do processo pode ter espaços: os campos começam depois do último ')'
+            start_ticks = int(f.read().rsplit(b')', 1)[1].split()[19])
+        with open('/proc/uptime', 'rb') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def parse_reading(line):
+    """Converte uma linha JSON ({"Parametro": valor, ...}) em dicionário de leitura; valores são números ou null"""
+    reading = json.loads(line)
+    if not isinstance(reading, dict):
+        raise ValueError("Leitura deve ser um objeto JSON")
+    for name, value in reading.items():
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"Valor não numérico para {name}: {value!r}")
+    return reading
+
+
+def analyze(monitor, reading, predict_only):
+    if predict_only:
+        return {'predicted_pdi': round(float(monitor.predict_pdi(reading)), 2)}
+    return monitor.full_analysis(reading)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Monitoramento do PDI de leituras avulsas, sem carregar as bibliotecas de treino e gráficos")
+    parser.add_argument('--model', default=os.path.join(MODEL_DIR, 'pdi_model_bayesian.npz'),
+                        help="Modelo (.npz compacto; um .pkl carrega joblib e scikit-learn)")
+    parser.add_argument('--preprocessor', default=os.path.join(MODEL_DIR, 'preprocessor.npz'))
+    parser.add_argument('--registry', nargs='?', const='*', metavar='TIPO',
+                        help="Usa a melhor versão do registro de modelos (de todos ou do tipo informado) no lugar de --model")
+    parser.add_argument('--reading', help="Leitura em JSON; sem ela, lê uma leitura JSON por linha da entrada padrão")
+    parser.add_argument('--predict-only', action='store_true',
+                        help="Só o PDI previsto, sem alertas nem otimização do setpoint")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="Mostra na saída de erro o tempo de inicialização, carga do modelo e primeira leitura")
+    args = parser.parse_args()
+
+    loading = time.perf_counter()
+    if args.registry is not None:
+        # O registro guarda o pré-processamento de cada versão
+        try:
+            monitor = PDIMonitor.from_registry(None if args.registry == '*' else args.registry,
+                                               optimize_setpoints=not args.predict_only)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        preprocessor_path = args.preprocessor if os.path.exists(args.preprocessor) else None
+        monitor = PDIMonitor(args.model, preprocessor_path, optimize_setpoints=not args.predict_only)
+    loaded = time.perf_counter()
+
+    lines = [args.reading] if args.reading is not None else sys.stdin
+    first_reading = None
+    until_first_reading = None
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            report = analyze(monitor, parse_reading(line), args.predict_only)
+        except (ValueError, TypeError) as e:
+            report = {'error': str(e)}
+        print(json.dumps(report, ensure_ascii=False, default=float), flush=True)
+        if first_reading is None:
+            first_reading = time.perf_counter() - loaded
+            until_first_reading = process_age() if args.startup_profile else None
+
+    if args.startup_profile:
+        profile = {
+            'imports_s': round(_imported - _started, 4),
+            'model_load_s': round(loaded - loading, 4),
+            'first_reading_s': round(first_reading, 4) if first_reading is not None else None,
+            # Desde o início do processo (inclui o interpretador), com a resolução do relógio do kernel (~10 ms)
+            'process_until_first_reading_s': round(until_first_reading, 3) if until_first_reading is not None else None,
+            'heavy_modules_loaded': [name for name in HEAVY_MODULES if name in sys.modules],
+        }
+        print(json.dumps({'startup_profile': profile}, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,540 @@
-import pandas as pd
-import joblib
-from config import CONTROL_LIMITS
-import numpy as np
-
-class PDIMonitor:
-    def __init__(self, model_path):
-        self.model = joblib.load(model_path)
-        self.control_limits = CONTROL_LIMITS
-    
-    def check_parameters(self, current_params):
-        """Verifica se os parâmetros estão dentro dos limites recomendados"""
-        alerts = []
-        for param, (lower, upper) in self.control_limits.items():
-            value = current_params.get(param)
-            if value is None:
-                alerts.append(f"Parâmetro {param} não informado.")
-                continue
-            if value < lower:
-                alerts.append(f"{param} abaixo do mínimo ({value} < {lower})")
-            elif value > upper:
-                alerts.append(f"{param} acima do máximo ({value} > {upper})")
-        return alerts
-    
-    def predict_pdi(self, current_params):
-        """Faz a previsão do PDI com os parâmetros atuais"""
-        input_df = pd.DataFrame([current_params])
-        if 'Finos' in input_df.columns:
-            input_df = input_df.drop(columns=['Finos'])
-        return self.model.predict(input_df)[0]
-    
-    def predict_pdi_and_finos(self, current_params):
-        """Tenta prever PDI e Finos, tratando caso o modelo retorne apenas PDI"""
-        input_df = pd.DataFrame([current_params])
-        if 'Finos' in input_df.columns:
-            input_df = input_df.drop(columns=['Finos'])
-        preds = self.model.predict(input_df)
-        
-        # Se for uma predição multi-output com dois valores, retorne ambos
-        if isinstance(preds, (list, tuple, pd.Series, np.ndarray)):
-            first_pred = preds[0]
-            if hasattr(first_pred, '__len__') and len(first_pred) == 2:
-                return first_pred[0], first_pred[1]
-            else:
-                # Retorna PDI e None para Finos
-                return preds[0], None
-        else:
-            # Caso inesperado, retorna PDI e None
-            return preds, None
-    
-    def generate_recommendations(self, current_params, predicted_pdi):
-        """Gera recomendações para melhorar o PDI"""
-        recs = []
-        
-        if predicted_pdi is not None and predicted_pdi < 80:
-            if current_params.get('Amperagem_Peletizadora', 0) < 640:
-                recs.append("Aumentar amperagem da peletizadora para >640A")
-            if current_params.get('Taxa_Compressao', 0) < 18.9:
-                recs.append("Aumentar taxa de compressão para ~18.94")
-            if current_params.get('Velocidade_Alimentador', 0) > 60:
-                recs.append("Reduzir velocidade do alimentador para <60")
-        
-        elif predicted_pdi is not None and predicted_pdi > 85:
-            recs.append("Parâmetros ótimos - manter configuração atual")
-        
-        return recs
-    
-    def full_analysis(self, current_params):
-        """Executa análise completa e retorna relatório"""
-        alerts = self.check_parameters(current_params)
-        predicted_pdi, predicted_finos = self.predict_pdi_and_finos(current_params)
-        recommendations = self.generate_recommendations(current_params, predicted_pdi)
-        
-        report = {
-            'predicted_pdi': round(predicted_pdi, 2) if predicted_pdi is not None else None,
-            'predicted_finos': round(predicted_finos, 2) if predicted_finos is not None else None,
-            'alerts': alerts,
-            'recommendations': recommendations,
-            'status': 'OK' if not alerts and (predicted_pdi is not None and predicted_pdi >= 80) else 'ALERT'
-        }
-        
-        return report
+import operator
+import os
+import re
+import threading
+import time
+from collections import deque
+from config import (CONTROL_LIMITS, MODEL_DIR, RELOAD_POLL_INTERVAL, RELOAD_R2_TOLERANCE, RELOAD_MAX_ATTEMPTS,
+                    OPTIMIZER_MIN_GAIN, FAST_PREDICTOR_MAX_ROWS)
+from fast_predictor import LinearPredictor, compile_predictor, load_compact
+from model_registry import ModelRegistry, is_artifact, load_artifact
+from preprocessor import Preprocessor
+from setpoint_optimizer import SetpointOptimizer
+from response_surface import ResponseSurface, load_or_build_surface
+from instrumentation import instrumented
+from fingerprint import file_fingerprint
+import numpy as np
+
+# Regras heurísticas de recomendação: (parâmetro, comparação, referência, mensagem)
+RECOMMENDATION_RULES = [
+    ('Amperagem_Peletizadora', operator.lt, 640, "Aumentar amperagem da peletizadora para >640A"),
+    ('Taxa_Compressao', operator.lt, 18.9, "Aumentar taxa de compressão para ~18.94"),
+    ('Velocidade_Alimentador', operator.gt, 60, "Reduzir velocidade do alimentador para <60"),
+]
+
+# pdi_model_<tipo>.pkl, pdi_model_<tipo>_v<N>.npz, ...
+MODEL_FILE_PATTERN = re.compile(r"pdi_model_(?P<type>.+?)(?:_v(?P<version>\d+))?\.(?P<ext>npz|pkl)$")
+
+
+class ActiveModel:
+    """Tudo que a previsão usa de um modelo carregado; trocado por inteiro no hot-reload"""
+
+    def __init__(self, model, feature_names, preprocessor, fast_predictor, path, version):
+        self.model = model
+        self.feature_names = feature_names
+        self.preprocessor = preprocessor
+        self.fast_predictor = fast_predictor
+        self.path = path
+        self.version = version
+        self.optimizer = None  # SetpointOptimizer criado no primeiro uso
+        self.surface = None  # ResponseSurface desta versão do modelo
+
+
+class PDIMonitor:
+    def __init__(self, model_path, preprocessor_path=None, optimize_setpoints=True):
+        self.control_limits = CONTROL_LIMITS
+        # Recomendações a partir do setpoint ótimo segundo o modelo (False: regras fixas)
+        self.optimize_setpoints = optimize_setpoints
+        # Limites IQR e medianas do treino, aplicados às leituras antes da previsão
+        self._preprocessor_source = None
+        if preprocessor_path is not None:
+            self._preprocessor_source = Preprocessor.load(preprocessor_path)
+        match = MODEL_FILE_PATTERN.match(os.path.basename(str(model_path)))
+        self.model_type = match.group('type') if match else None
+
+        started = time.perf_counter()
+        self._active = self._load_model(model_path, int(match.group('version') or 0) if match else 0)
+        self._previous = None
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._validation_data = None
+        self._rejected = set()
+        self._skip_through = 0  # após um rollback, versões até esta não são recarregadas
+        self._failed_attempts = {}
+        self.reload_stats = {
+            'initial_load_s': time.perf_counter() - started,
+            'reloads': 0,
+            'rollbacks': 0,
+            'rejections': 0,
+            'failures': 0,
+            'last_load_s': None,
+            'last_validation_s': None,
+            'events': deque(maxlen=50),
+        }
+
+    @classmethod
+    def from_registry(cls, model_type=None, registry=None, **kwargs):
+        """
+        Monitor com a melhor versão do registro (do tipo informado ou de todos),
+        escolhida pelo índice sem carregar as demais
+        """
+        registry = registry or ModelRegistry()
+        entry = registry.best(model_type)
+        if entry is None:
+            raise ValueError(f"Nenhum modelo{' ' + model_type if model_type else ''} registrado em {registry.root}")
+        monitor = cls(registry.artifact_path(entry), **kwargs)
+        monitor.model_type = entry['model_type']
+        return monitor
+
+    # O modelo ativo é lido uma única vez por chamada (self._active); a troca é a
+    # atribuição dessa referência, então uma previsão em andamento nunca mistura versões
+    @property
+    def model(self):
+        return self._active.model
+
+    @property
+    def feature_names(self):
+        return self._active.feature_names
+
+    @property
+    def preprocessor(self):
+        return self._active.preprocessor
+
+    @property
+    def fast_predictor(self):
+        return self._active.fast_predictor
+
+    @property
+    def model_version(self):
+        return self._active.version
+
+    def _load_model(self, model_path, version):
+        """Carrega um modelo (versão do registro, .npz compacto ou .pkl) e prepara o preditor compilado"""
+        trained_preprocessor = None
+        if is_artifact(model_path):
+            # Versão do ModelRegistry: arrays mapeados em memória e o pré-processamento do próprio treino
+            model, _ = load_artifact(model_path)
+            feature_names = list(model.feature_names)
+            trained_preprocessor = model.preprocessor
+        elif str(model_path).endswith('.npz'):
+            # Formato compacto exportado por ModelTrainer.export_compact
+            model = load_compact(model_path)
+            feature_names = list(model.feature_names)
+        else:
+            import joblib  # só os modelos .pkl dependem de joblib/sklearn
+            model = joblib.load(model_path)
+            feature_names = list(getattr(model, 'feature_names_in_', []))
+        preprocessor = trained_preprocessor
+        if self._preprocessor_source is not None:
+            preprocessor = self._preprocessor_source.subset(feature_names)
+        # Preditor compilado (sem pandas/sklearn) quando o modelo permite
+        fast_predictor = compile_predictor(model)
+        if fast_predictor is not None:
+            fast_predictor.preprocessor = preprocessor
+        return ActiveModel(model, feature_names, preprocessor, fast_predictor, str(model_path), version)
+    
+    def check_parameters(self, current_params):
+        """Verifica se os parâmetros estão dentro dos limites recomendados"""
+        alerts = []
+        for param, (lower, upper) in self.control_limits.items():
+            value = current_params.get(param)
+            if value is None:
+                alerts.append(f"Parâmetro {param} não informado.")
+                continue
+            if value < lower:
+                alerts.append(f"{param} abaixo do mínimo ({value} < {lower})")
+            elif value > upper:
+                alerts.append(f"{param} acima do máximo ({value} > {upper})")
+        return alerts
+    
+    @instrumented()
+    def predict_pdi(self, current_params):
+        """Faz a previsão do PDI com os parâmetros atuais"""
+        active = self._active
+        if active.fast_predictor is not None:
+            return active.fast_predictor.predict_one(current_params)
+        import pandas as pd  # só sem o preditor compilado: a previsão de uma leitura não carrega o pandas
+        input_df = pd.DataFrame([current_params])
+        if 'Finos' in input_df.columns:
+            input_df = input_df.drop(columns=['Finos'])
+        if active.preprocessor is not None:
+            input_df = active.preprocessor.transform_frame(input_df)
+        return active.model.predict(input_df)[0]
+    
+    @instrumented()
+    def predict_pdi_and_finos(self, current_params):
+        """Tenta prever PDI e Finos, tratando caso o modelo retorne apenas PDI"""
+        active = self._active
+        if active.fast_predictor is not None:
+            return active.fast_predictor.predict_one(current_params), None
+        import pandas as pd
+        input_df = pd.DataFrame([current_params])
+        if 'Finos' in input_df.columns:
+            input_df = input_df.drop(columns=['Finos'])
+        if active.preprocessor is not None:
+            input_df = active.preprocessor.transform_frame(input_df)
+        preds = active.model.predict(input_df)
+        
+        # Se for uma predição multi-output com dois valores, retorne ambos
+        if isinstance(preds, (list, tuple, pd.Series, np.ndarray)):
+            first_pred = preds[0]
+            if hasattr(first_pred, '__len__') and len(first_pred) == 2:
+                return first_pred[0], first_pred[1]
+            else:
+                # Retorna PDI e None para Finos
+                return preds[0], None
+        else:
+            # Caso inesperado, retorna PDI e None
+            return preds, None
+    
+    @instrumented()
+    def optimize_setpoint(self, current_params, current_pdi=None):
+        """
+        Setpoint das variáveis de CONTROL_LIMITS que maximiza o PDI previsto para a leitura atual.
+        current_pdi é o PDI já previsto para a leitura, base do ganho reportado.
+        """
+        active = self._active
+        if active.optimizer is None:
+            # Variáveis não informadas partem da mesma mediana que o pré-processamento usa na previsão
+            fill_values = active.preprocessor.medians if active.preprocessor is not None else None
+            active.optimizer = SetpointOptimizer(
+                lambda X: self._predict_array(X, active), active.feature_names, self.control_limits,
+                fill_values=fill_values)
+        return active.optimizer.optimize(current_params, current_pdi)
+
+    @instrumented()
+    def what_if(self, params):
+        """
+        PDI previsto para valores das variáveis da superfície de resposta (SURFACE_VARIABLES),
+        com as demais nas medianas do treino, por interpolação na grade pré-calculada
+        """
+        return self._surface(self._active).query(params)
+
+    @instrumented(memory=True)
+    def build_surface(self, spec):
+        """Calcula e salva a superfície de resposta do modelo ativo (etapa após o treino)"""
+        active = self._active
+        active.surface = ResponseSurface.build(
+            lambda X: self._predict_array(X, active)[0], active.feature_names, spec, file_fingerprint(active.path))
+        active.surface.save(active.path)
+        return active.surface
+
+    def _surface(self, active):
+        """Superfície do modelo indicado; recalculada se o arquivo do modelo mudou desde a última grade"""
+        if active.surface is None:
+            active.surface = load_or_build_surface(
+                active.path, lambda X: self._predict_array(X, active)[0], active.feature_names)
+        return active.surface
+
+    def _predict_array(self, X, active):
+        """Previsão de um array 2D na ordem de feature_names do modelo indicado"""
+        if self._fast_batch(active, len(X)):
+            return active.fast_predictor.predict(X), None
+        return self.predict_batch(self._as_frame(X, active), active)
+
+    @staticmethod
+    def _fast_batch(active, n_rows):
+        """
+        Usa o preditor compilado no lote? Sempre para modelos lineares e para os
+        carregados só no formato compacto; árvores com o pipeline do sklearn
+        carregado só em lotes de até FAST_PREDICTOR_MAX_ROWS leituras.
+        """
+        if active.fast_predictor is None:
+            return False
+        return (active.model is active.fast_predictor or isinstance(active.fast_predictor, LinearPredictor)
+                or n_rows <= FAST_PREDICTOR_MAX_ROWS)
+
+    def generate_recommendations(self, current_params, predicted_pdi, setpoint=None):
+        """Gera recomendações para melhorar o PDI"""
+        recs = []
+        
+        if setpoint is not None and predicted_pdi is not None:
+            if setpoint['gain'] >= OPTIMIZER_MIN_GAIN:
+                for param, target in setpoint['setpoint'].items():
+                    value = current_params.get(param)
+                    lower, upper = self.control_limits[param]
+                    if value is None or np.isnan(value):
+                        recs.append(f"Definir {param} em {target:.2f}")
+                    elif abs(target - value) > 0.01 * (upper - lower):
+                        recs.append(f"Ajustar {param} de {value} para {target:.2f}")
+                recs.append(f"PDI previsto com o ajuste: {setpoint['predicted_pdi']:.2f}% (+{setpoint['gain']:.2f})")
+            elif predicted_pdi > 85:
+                recs.append("Parâmetros ótimos - manter configuração atual")
+            return recs
+        
+        if predicted_pdi is not None and predicted_pdi < 80:
+            for param, compare, reference, message in RECOMMENDATION_RULES:
+                if compare(current_params.get(param, 0), reference):
+                    recs.append(message)
+        
+        elif predicted_pdi is not None and predicted_pdi > 85:
+            recs.append("Parâmetros ótimos - manter configuração atual")
+        
+        return recs
+    
+    @instrumented()
+    def full_analysis(self, current_params):
+        """Executa análise completa e retorna relatório"""
+        alerts = self.check_parameters(current_params)
+        predicted_pdi, predicted_finos = self.predict_pdi_and_finos(current_params)
+        setpoint = None
+        if self.optimize_setpoints and predicted_pdi is not None:
+            setpoint = self.optimize_setpoint(current_params, predicted_pdi)
+        recommendations = self.generate_recommendations(current_params, predicted_pdi, setpoint)
+        
+        report = {
+            'predicted_pdi': round(predicted_pdi, 2) if predicted_pdi is not None else None,
+            'predicted_finos': round(predicted_finos, 2) if predicted_finos is not None else None,
+            'alerts': alerts,
+            'recommendations': recommendations,
+            'setpoint': setpoint,
+            'status': 'OK' if not alerts and (predicted_pdi is not None and predicted_pdi >= 80) else 'ALERT'
+        }
+        
+        return report
+
+    def _as_frame(self, readings, active=None):
+        """Converte um lote de leituras (DataFrame ou array 2D na ordem de feature_names) em DataFrame"""
+        import pandas as pd
+        if isinstance(readings, pd.DataFrame):
+            return readings
+        feature_names = (active or self._active).feature_names
+        values = np.asarray(readings, dtype=float)
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        if not feature_names or values.shape[1] != len(feature_names):
+            raise ValueError(
+                f"Array de leituras deve ter as colunas {feature_names} nesta ordem "
+                f"(recebido shape {values.shape})."
+            )
+        return pd.DataFrame(values, columns=feature_names)
+
+    def check_parameters_batch(self, frame):
+        """Versão vetorizada de check_parameters: retorna uma lista de alertas por leitura e a máscara de alerta"""
+        n_rows = len(frame)
+        alerts = [[] for _ in range(n_rows)]
+        alert_mask = np.zeros(n_rows, dtype=bool)
+        for param, (lower, upper) in self.control_limits.items():
+            if param not in frame.columns:
+                for row_alerts in alerts:
+                    row_alerts.append(f"Parâmetro {param} não informado.")
+                alert_mask[:] = True
+                continue
+            column = frame[param]
+            values = column.to_numpy(dtype=float)
+            missing = np.isnan(values)
+            below = values < lower
+            above = values > upper
+            for i in np.flatnonzero(missing):
+                alerts[i].append(f"Parâmetro {param} não informado.")
+            for i in np.flatnonzero(below):
+                alerts[i].append(f"{param} abaixo do mínimo ({column.iat[i]} < {lower})")
+            for i in np.flatnonzero(above):
+                alerts[i].append(f"{param} acima do máximo ({column.iat[i]} > {upper})")
+            alert_mask |= missing | below | above
+        return alerts, alert_mask
+
+    @instrumented(rows=lambda self, frame, active=None: len(frame))
+    def predict_batch(self, frame, active=None):
+        """Prevê PDI (e Finos, se o modelo for multi-output) para todas as leituras em uma única chamada"""
+        active = active or self._active
+        if self._fast_batch(active, len(frame)):
+            return active.fast_predictor.predict(frame), None
+        if active.feature_names:
+            input_df = frame[active.feature_names]
+        else:
+            input_df = frame.drop(columns=['Finos'], errors='ignore')
+        if active.preprocessor is not None:
+            input_df = active.preprocessor.transform_frame(input_df)
+        preds = np.asarray(active.model.predict(input_df), dtype=float)
+        if preds.ndim == 2 and preds.shape[1] == 2:
+            return preds[:, 0], preds[:, 1]
+        return preds.reshape(-1), None
+
+    def generate_recommendations_batch(self, frame, predicted_pdi):
+        """Versão vetorizada das regras de generate_recommendations (sem otimização de setpoint, para manter a vazão)"""
+        n_rows = len(frame)
+        recs = [[] for _ in range(n_rows)]
+        low_pdi = predicted_pdi < 80
+        for param, compare, reference, message in RECOMMENDATION_RULES:
+            if param in frame.columns:
+                values = frame[param].to_numpy(dtype=float)
+            else:
+                values = np.zeros(n_rows)
+            for i in np.flatnonzero(low_pdi & compare(values, reference)):
+                recs[i].append(message)
+        for i in np.flatnonzero(predicted_pdi > 85):
+            recs[i].append("Parâmetros ótimos - manter configuração atual")
+        return recs
+
+    @instrumented(rows=lambda self, readings: len(readings))
+    def full_analysis_batch(self, readings):
+        """
+        Executa a análise completa para um lote de leituras (DataFrame ou array 2D)
+        em uma única passada vetorizada. Retorna um dicionário de arrays/listas
+        alinhados com as linhas de entrada.
+        """
+        active = self._active
+        frame = self._as_frame(readings, active)
+        alerts, alert_mask = self.check_parameters_batch(frame)
+        predicted_pdi, predicted_finos = self.predict_batch(frame, active)
+        recommendations = self.generate_recommendations_batch(frame, predicted_pdi)
+
+        return {
+            'predicted_pdi': np.round(predicted_pdi, 2),
+            'predicted_finos': np.round(predicted_finos, 2) if predicted_finos is not None else None,
+            'alerts': alerts,
+            'recommendations': recommendations,
+            'status': np.where(~alert_mask & (predicted_pdi >= 80), 'OK', 'ALERT')
+        }
+
+    @instrumented(memory=True)
+    def reload(self, model_path, version=None):
+        """
+        Carrega um novo modelo, valida na amostra reservada e, se aprovado, troca o
+        modelo ativo de forma atômica. O modelo anterior fica guardado para rollback().
+        Retorna True se a troca foi feita.
+        """
+        if version is None:
+            match = MODEL_FILE_PATTERN.match(os.path.basename(str(model_path)))
+            version = int(match.group('version') or 0) if match else 0
+        started = time.perf_counter()
+        try:
+            candidate = self._load_model(model_path, version)
+        except Exception as e:
+            attempts = self._failed_attempts.get(model_path, 0) + 1
+            self._failed_attempts[model_path] = attempts
+            if attempts >= RELOAD_MAX_ATTEMPTS:
+                self._rejected.add(version)
+            self.reload_stats['failures'] += 1
+            self._record_event('falha', model_path, version, error=str(e))
+            print(f"Erro ao carregar o modelo {model_path}: {e}")
+            return False
+        load_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        accepted, candidate_r2, active_r2 = self._validate(candidate)
+        validation_s = time.perf_counter() - started
+        if accepted:
+            # Superfície de resposta da nova versão calculada aqui, fora do caminho das previsões
+            try:
+                self._surface(candidate)
+            except ValueError:
+                pass
+        surface_s = time.perf_counter() - started - validation_s
+        self.reload_stats['last_load_s'] = load_s
+        self.reload_stats['last_validation_s'] = validation_s
+        if not accepted:
+            self._rejected.add(version)
+            self.reload_stats['rejections'] += 1
+            self._record_event('rejeitado', model_path, version, load_s=load_s,
+                               validation_s=validation_s, r2=candidate_r2, active_r2=active_r2)
+            print(f"Modelo {model_path} rejeitado na validação (R² {candidate_r2} vs ativo {active_r2})")
+            return False
+
+        with self._swap_lock:
+            self._previous = self._active
+            self._active = candidate
+        self.reload_stats['reloads'] += 1
+        self._record_event('ativo', model_path, version, load_s=load_s, validation_s=validation_s,
+                           surface_s=surface_s, r2=candidate_r2, active_r2=active_r2)
+        print(f"Modelo recarregado: {model_path} (v{version}) em {load_s + validation_s:.3f}s")
+        return True
+
+    def rollback(self):
+        """Volta ao modelo anterior; o observador só recarrega versões mais novas que a descartada"""
+        with self._swap_lock:
+            if self._previous is None:
+                raise ValueError("Nenhuma versão anterior para restaurar")
+            discarded = self._active
+            self._active, self._previous = self._previous, None
+            self._skip_through = max(self._skip_through, discarded.version)
+        self.reload_stats['rollbacks'] += 1
+        self._record_event('rollback', discarded.path, discarded.version)
+        print(f"Rollback: modelo {discarded.path} substituído por {self._active.path}")
+        return self._active.path
+
+    def _validate(self, candidate):
+        """
+        Compara candidato e modelo ativo na amostra reservada (R²).
+        Rejeita previsões não finitas ou R² abaixo do ativo menos RELOAD_R2_TOLERANCE.
+        """
+        if self._validation_data is None:
+            return True, None, None
+        X_val, y_val = self._validation_data
+        frame = self._as_frame(X_val, candidate)
+        candidate_pred, _ = self.predict_batch(frame, candidate)
+        if not np.all(np.isfinite(candidate_pred)):
+            return False, None, None
+        candidate_r2 = _r2_score(y_val, candidate_pred)
+        active_pred, _ = self.predict_batch(self._as_frame(X_val, self._active), self._active)
+        active_r2 = _r2_score(y_val, active_pred)
+        return candidate_r2 >= active_r2 - RELOAD_R2_TOLERANCE, candidate_r2, active_r2
+
+    def _record_event(self, status, path, version, **details):
+        self.reload_stats['events'].append({
+            'time': time.time(), 'status': status, 'path': str(path), 'version': version, **details
+        })
+
+    def newest_model_file(self, model_dir=MODEL_DIR):
+        """Arquivo da versão mais nova deste tipo de modelo em model_dir (prefere .npz), ou None"""
+        candidates = {}
+        for filename in os.listdir(model_dir):
+            match = MODEL_FILE_PATTERN.match(filename)
+            if not match or match.group('type') != self.model_type or match.group('version') is None:
+                continue
+            version = int(match.group('version'))
+            if version <= max(self._active.version, self._skip_through) or version in self._rejected:
+                continue
+            if version not in candidates or match.group('ext') == 'npz':
+                candidates[version] = os.path.join(model_dir, filename)
+        if not candidates:
+            return None
+        version = max(candidates)
+        return candidates[version], version
+
+    def start_watching(self, model_dir=MODEL_DIR, validation_data=None, poll_interval=RELOAD_POLL_INTERVAL):
+        """
+        Observa model_dir em uma thread de fundo e recarrega automaticamente novas
+        versões (pdi_model_<tipo>_v<N>) do modelo monitorado. validation_data é um
+        par (X, y) reservado do treino, usado para aprovar cada nova versão.
+        """
+        if self.model_type is None:
+            raise ValueError("Nome do modelo fora do padrão pdi_model_<tipo>; não é possível observar novas versões")
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._validation_data = validation_data
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(model_dir, poll_interval),
+                                         name='pdi-model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, model_dir, poll_interval):
+        while not self._stop_watching.wait(poll_interval):
+            newest = self.newest_model_file(model_dir)
+            if newest is not None:
+                self.reload(*newest)
+
+    def reload_status(self):
+        """Versão ativa/anterior e métricas de recarga"""
+        previous = self._previous
+        status = {key: value for key, value in self.reload_stats.items() if key != 'events'}
+        status['active_version'] = self._active.version
+        status['active_path'] = self._active.path
+        status['previous_version'] = previous.version if previous is not None else None
+        status['events'] = list(self.reload_stats['events'])
+        return status
+
+
+def _r2_score(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=float)
+    ss_res = np.sum((y_true - y_pred) ** 2)
+    ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+    return float(1 - ss_res / ss_tot) if ss_tot > 0 else 0.0
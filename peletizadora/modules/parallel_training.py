@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from model_trainer import ModelTrainer
+
+
+def train_models_parallel(X, y, model_types, n_jobs=None, **trainer_kwargs):
+    """
+    Treina vários tipos de modelo ao mesmo tempo, um processo por modelo.
+
+    X e y são copiados uma única vez para um bloco de memória compartilhada;
+    cada processo apenas se conecta a ele (sem serializar os dados por worker).
+    n_jobs é o total de núcleos: cada processo recebe n_jobs // nº de modelos
+    para a sua busca de hiperparâmetros.
+    Retorna uma lista de dicionários (métricas, modelo, importância das features e por permutação).
+    """
+    total_jobs = n_jobs or os.cpu_count() or 1
+    n_workers = max(1, min(len(model_types), total_jobs))
+    jobs_per_model = max(1, total_jobs // n_workers)
+
+    data = np.column_stack([X.to_numpy(dtype=np.float64), y.to_numpy(dtype=np.float64)])
+    shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+        del data
+        print(f"Treinando {len(model_types)} modelos em {n_workers} processo(s), "
+              f"{jobs_per_model} núcleo(s) por modelo")
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(_train_worker, shm.name, (len(X), X.shape[1] + 1), list(X.columns),
+                                y.name, model_type, jobs_per_model, trainer_kwargs)
+                for model_type in model_types
+            ]
+            return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _train_worker(shm_name, shape, columns, target_name, model_type, n_jobs, trainer_kwargs):
+    """Treina, salva e mede um modelo a partir dos dados em memória compartilhada"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        X = pd.DataFrame(data[:, :-1], columns=columns, copy=False)
+        y = pd.Series(data[:, -1], name=target_name, copy=False)
+
+        trainer = ModelTrainer(model_type=model_type, n_jobs=n_jobs, **trainer_kwargs)
+        start = time.perf_counter()
+        model = trainer.train_model(X, y)
+        fit_time = time.perf_counter() - start
+        # Um processo por modelo já ocupa os núcleos: a permutação roda sequencial aqui
+        trainer.compute_permutation_importance(X, y, n_jobs=1)
+
+        model_path = trainer.save_model(f'pdi_model_{model_type}.pkl')
+        compact_path = trainer.export_compact(f'pdi_model_{model_type}.npz')
+        predict_latency = _predict_latency(model, X.iloc[[0]].copy())
+
+        result = {
+            'model_type': model_type,
+            'cv_r2': trainer.search_report['best_score'],
+            'search': trainer.search_report['search'],
+            'fit_time_s': fit_time,
+            'predict_latency_ms': predict_latency * 1000,
+            'model_size_kb': os.path.getsize(model_path) / 1024,
+            'compact_size_kb': os.path.getsize(compact_path) / 1024,
+            'model': model,
+            'feature_importance': trainer.get_feature_importance(),
+            'permutation_importance': trainer.get_permutation_importance(),
+        }
+        del X, y, data
+        return result
+    finally:
+        shm.close()
+
+
+def _predict_latency(model, row, repeats=50):
+    """Mediana do tempo de previsão de uma única leitura pelo pipeline"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def build_leaderboard(results):
+    """Tabela comparativa dos modelos, ordenada pelo R² de validação cruzada"""
+    columns = ['model_type', 'cv_r2', 'search', 'fit_time_s', 'predict_latency_ms',
+               'model_size_kb', 'compact_size_kb']
+    leaderboard = pd.DataFrame([{col: result[col] for col in columns} for result in results])
+    return leaderboard.sort_values('cv_r2', ascending=False).reset_index(drop=True)
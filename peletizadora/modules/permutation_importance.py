@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import PERMUTATION_REPEATS, PERMUTATION_MAX_SAMPLES
+
+
+def permutation_importance(model, X, y, n_repeats=PERMUTATION_REPEATS, max_samples=PERMUTATION_MAX_SAMPLES,
+                           n_jobs=None, random_state=42):
+    """
+    Importância por permutação, independente do tipo de modelo: queda do R² quando
+    os valores de uma feature são embaralhados (média e desvio entre n_repeats).
+
+    O custo é fixo: no máximo max_samples linhas, avaliadas n_features x n_repeats
+    vezes. A previsão e o R² de referência são calculados uma única vez. As
+    tarefas (feature, repetição) são distribuídas entre processos que leem X e y
+    de um bloco de memória compartilhada, somente leitura. A permutação de cada
+    tarefa depende apenas de (random_state, feature, repetição), então o resultado
+    não muda com n_jobs.
+
+    Retorna um DataFrame (Feature, Importance, Std, Effect), ordenado pela importância.
+    Effect é o sinal da correlação entre a feature e a previsão (+1 aumenta o PDI).
+    """
+    columns = list(X.columns)
+    values = X.to_numpy(dtype=np.float64)
+    target = np.asarray(y, dtype=np.float64)
+    if len(values) > max_samples:
+        rows = np.sort(np.random.default_rng(random_state).choice(len(values), max_samples, replace=False))
+        values, target = values[rows], target[rows]
+
+    predict = _make_predict(model, columns)
+    baseline = predict(values)
+    baseline_r2 = _r2(target, baseline)
+
+    tasks = [(j, r) for j in range(len(columns)) for r in range(n_repeats)]
+    total_jobs = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count() or 1
+    n_workers = max(1, min(total_jobs, len(tasks)))
+    if n_workers == 1:
+        scores = _score_tasks(model, columns, values, target, tasks, random_state)
+    else:
+        data = np.column_stack([values, target])
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+            chunks = [tasks[i::n_workers] for i in range(n_workers)]
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(_permutation_worker, shm.name, data.shape, model, columns, chunk, random_state)
+                    for chunk in chunks
+                ]
+                scores = {}
+                for future in futures:
+                    scores.update(future.result())
+        finally:
+            shm.close()
+            shm.unlink()
+
+    drops = np.array([[baseline_r2 - scores[(j, r)] for r in range(n_repeats)] for j in range(len(columns))])
+    effect = np.sign([_correlation(values[:, j], baseline) for j in range(len(columns))])
+    return pd.DataFrame({
+        'Feature': columns,
+        'Importance': drops.mean(axis=1),
+        'Std': drops.std(axis=1),
+        'Effect': effect.astype(int),
+    }).sort_values('Importance', ascending=False).reset_index(drop=True)
+
+
+def _make_predict(model, columns):
+    """
+    Previsão sobre arrays pelo próprio pipeline (via DataFrame com os nomes das features).
+    Em lotes grandes o predict do sklearn é mais rápido que o preditor compilado,
+    que é otimizado para a latência de uma leitura.
+    """
+    return lambda values: np.asarray(model.predict(pd.DataFrame(values, columns=columns)), dtype=np.float64)
+
+
+def _score_tasks(model, columns, values, target, tasks, random_state):
+    """R² com a coluna j permutada para cada tarefa (j, repetição), em uma cópia local de X"""
+    predict = _make_predict(model, columns)
+    work = values.copy()
+    scores = {}
+    for j, r in tasks:
+        original = work[:, j].copy()
+        permutation = np.random.default_rng([random_state, j, r]).permutation(len(work))
+        work[:, j] = original[permutation]
+        scores[(j, r)] = _r2(target, predict(work))
+        work[:, j] = original
+    return scores
+
+
+def _permutation_worker(shm_name, shape, model, columns, tasks, random_state):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        scores = _score_tasks(model, columns, data[:, :-1], data[:, -1].copy(), tasks, random_state)
+        del data
+        return scores
+    finally:
+        shm.close()
+
+
+def _r2(y_true, y_pred):
+    ss_res = np.sum((y_true - y_pred) ** 2)
+    ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+    return float(1 - ss_res / ss_tot) if ss_tot > 0 else 0.0
+
+
+def _correlation(a, b):
+    if np.std(a) == 0 or np.std(b) == 0:
+        return 0.0
+    return float(np.corrcoef(a, b)[0, 1])
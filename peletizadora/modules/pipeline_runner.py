@@ -0,0 +1,199 @@
+import inspect
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import joblib
+from config import PIPELINE_DIR
+from artifact_manifest import ArtifactManifest
+from fingerprint import content_fingerprint, source_fingerprint
+from instrumentation import stage, is_profiling
+
+
+class PipelineStage:
+    """Uma etapa do pipeline: função, etapas de entrada e o que entra na sua chave"""
+
+    def __init__(self, name, function, inputs=(), params=None, constants=None, code=(), outputs=None, cache=True):
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.constants = dict(constants or {})
+        self.code = list(code)
+        self.outputs = outputs
+        self.cache = cache
+
+    def output_files(self, value):
+        """Arquivos gerados pela etapa: lista fixa ou função do resultado"""
+        files = self.outputs(value) if callable(self.outputs) else self.outputs or []
+        return [str(path) for path in files if path is not None]
+
+
+class _StageOutput:
+    """
+    sys.stdout durante Pipeline.run: o que uma etapa imprime vai para o buffer
+    da sua thread; o resto (thread principal) vai direto para o terminal.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        if getattr(self.local, 'buffer', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Pipeline:
+    """
+    Executa etapas em ordem de dependência, reaproveitando resultados em disco.
+
+    Cada etapa é chamada como function(*resultados_das_entradas, **params). Sua
+    chave é o hash do nome, dos params, das constants (valores do config.py lidos
+    pelo código da etapa, que entram só na chave), do código-fonte da função e
+    dos arquivos das classes/módulos em code, e das chaves das etapas de entrada.
+    Assim a chave muda quando algo acima dela muda, sem precisar hashear os dados.
+
+    O resultado de cada etapa é salvo em cache_dir/<nome>.joblib e registrado
+    com os arquivos que ela gera (outputs). Uma etapa com a mesma chave e todos
+    os arquivos presentes não é executada; o resultado só é lido do disco se
+    alguma etapa a executar depende dele. Etapas independentes rodam ao mesmo
+    tempo, em threads (o trabalho pesado já é feito em processos ou em código
+    NumPy/sklearn que libera o GIL); a saída de cada etapa é guardada e impressa
+    na ordem das etapas, como numa execução sequencial. Com o cProfile ligado
+    (instrumentation --profile), as etapas rodam uma de cada vez, para cada
+    perfil medir só a sua etapa.
+    """
+
+    def __init__(self, cache_dir=PIPELINE_DIR, use_cache=True):
+        self.cache_dir = cache_dir
+        self.manifest = ArtifactManifest(os.path.join(cache_dir, 'manifest.json'))
+        self.use_cache = use_cache
+        self.stages = {}
+        self.executed = []
+        self.cached = []
+
+    def add(self, name, function, inputs=(), params=None, constants=None, code=(), outputs=None, cache=True):
+        """Adiciona uma etapa; as entradas precisam ter sido adicionadas antes (o grafo fica sem ciclos)"""
+        if name in self.stages:
+            raise ValueError(f"Etapa '{name}' já existe no pipeline")
+        missing = [dependency for dependency in inputs if dependency not in self.stages]
+        if missing:
+            raise ValueError(f"Etapa '{name}' depende de etapas não definidas: {', '.join(missing)}")
+        self.stages[name] = PipelineStage(name, function, inputs, params, constants, code, outputs, cache)
+        return self
+
+    def keys(self):
+        """Chave de cada etapa, na ordem em que foram adicionadas (que já é uma ordem topológica)"""
+        keys = {}
+        for name, pipeline_stage in self.stages.items():
+            code = content_fingerprint(inspect.getsource(pipeline_stage.function),
+                                       source_fingerprint(*pipeline_stage.code))
+            keys[name] = content_fingerprint(name, pipeline_stage.params, pipeline_stage.constants, code,
+                                             [keys[dependency] for dependency in pipeline_stage.inputs])
+        return keys
+
+    def run(self, targets=None):
+        """
+        Executa as etapas necessárias para targets (padrão: todas) e retorna os
+        resultados que ficaram em memória, por nome de etapa.
+        """
+        keys = self.keys()
+        selected = self._with_dependencies(targets or list(self.stages))
+        to_run = [name for name in selected if not self._is_cached(name, keys[name])]
+        to_load = {dependency for name in to_run for dependency in self.stages[name].inputs} - set(to_run)
+        self.cached = [name for name in selected if name not in to_run]
+        self.executed = []
+        for name in self.cached:
+            print(f"Etapa '{name}': sem alterações" + (", resultado lido do cache" if name in to_load else ""))
+
+        values = {}
+        pending = list(to_run)
+        running = {}
+        # Saída impressa por etapa, liberada na ordem das etapas assim que as anteriores terminam
+        printed = {}
+        order = list(to_run)
+        workers = 1 if is_profiling() else max(1, len(to_run) + len(to_load))
+        output = _StageOutput(sys.stdout) if workers > 1 else None
+        if output is not None:
+            sys.stdout = output
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for name in to_load:
+                    running[executor.submit(self._load, name)] = name
+                while True:
+                    # Dispara cada etapa assim que os resultados de todas as suas entradas estão disponíveis
+                    for name in [name for name in pending
+                                 if all(dependency in values for dependency in self.stages[name].inputs)]:
+                        pending.remove(name)
+                        running[executor.submit(self._execute, name, keys[name], values, output, printed)] = name
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        values[name] = future.result()
+                        if name in to_run:
+                            self.executed.append(name)
+                    while order and order[0] in printed:
+                        output.stream.write(printed.pop(order.pop(0)))
+        finally:
+            if output is not None:
+                sys.stdout = output.stream
+                # Em caso de erro, mostra também a saída das etapas que já terminaram
+                for name in order:
+                    if name in printed:
+                        sys.stdout.write(printed.pop(name))
+                sys.stdout.flush()
+        self.executed.sort(key=to_run.index)
+        return values
+
+    def _with_dependencies(self, targets):
+        selected = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise ValueError(f"Etapa '{name}' não definida no pipeline")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.stages[name].inputs)
+        return [name for name in self.stages if name in selected]
+
+    def _value_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.joblib")
+
+    def _is_cached(self, name, key):
+        pipeline_stage = self.stages[name]
+        return self.use_cache and pipeline_stage.cache and self.manifest.outputs(key) is not None
+
+    def _load(self, name):
+        return joblib.load(self._value_path(name))
+
+    def _execute(self, name, key, values, output=None, printed=None):
+        pipeline_stage = self.stages[name]
+        if output is not None:
+            output.local.buffer = io.StringIO()
+        try:
+            with stage(f"pipeline.{name}"):
+                value = pipeline_stage.function(*[values[dependency] for dependency in pipeline_stage.inputs],
+                                                **pipeline_stage.params)
+        finally:
+            if output is not None:
+                printed[name] = output.local.buffer.getvalue()
+                output.local.buffer = None
+        if pipeline_stage.cache:
+            path = self._value_path(name)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            joblib.dump(value, path + '.tmp')
+            os.replace(path + '.tmp', path)
+            self.manifest.record(key, [path] + pipeline_stage.output_files(value))
+        return value
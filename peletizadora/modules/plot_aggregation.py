@@ -0,0 +1,104 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from config import LARGE_PLOT_ROWS, PLOT_BINS, PLOT_SAMPLE_POINTS
+
+
+def is_large(n_rows, threshold=LARGE_PLOT_ROWS):
+    return n_rows > threshold
+
+
+def histogram(values, bins=PLOT_BINS):
+    """Contagens e bordas de faixas fixas, ignorando NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.histogram(values[np.isfinite(values)], bins=bins)
+
+
+def smoothed_density(counts, edges, width=1.5):
+    """Densidade suavizada a partir do histograma (substitui o KDE: custo proporcional às faixas, não às linhas)"""
+    offsets = np.arange(-int(3 * width), int(3 * width) + 1)
+    kernel = np.exp(-0.5 * (offsets / width) ** 2)
+    smoothed = np.convolve(counts, kernel / kernel.sum(), mode='same')
+    area = smoothed.sum() * np.diff(edges).mean()
+    return smoothed / area if area > 0 else smoothed
+
+
+def binned_mean(x, y, bins=PLOT_BINS):
+    """Média de y por faixa de x: centros das faixas, médias e contagens (faixas vazias ficam de fora)"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    edges = np.histogram_bin_edges(x, bins=bins)
+    index = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, len(edges) - 2)
+    counts = np.bincount(index, minlength=len(edges) - 1)
+    sums = np.bincount(index, weights=y, minlength=len(edges) - 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    filled = counts > 0
+    return centers[filled], sums[filled] / counts[filled], counts[filled]
+
+
+def density_2d(x, y, bins=PLOT_BINS):
+    """Contagens em uma grade 2D (histogram2d) e as bordas dos dois eixos"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y)
+    return np.histogram2d(x[valid], y[valid], bins=bins)
+
+
+def reservoir_sample(chunks, k=PLOT_SAMPLE_POINTS, seed=0):
+    """
+    Amostra uniforme de k linhas de uma sequência de blocos (arrays 2D ou DataFrames),
+    em uma passada e com memória fixa: algoritmo R, vetorizado por bloco.
+    Aceita um único array ou DataFrame, ou os blocos de DataProcessor.iter_chunks.
+    """
+    if hasattr(chunks, 'shape'):
+        chunks = [chunks]
+    rng = np.random.default_rng(seed)
+    reservoir, seen = None, 0
+    for chunk in chunks:
+        rows = np.asarray(chunk, dtype=np.float64)
+        if rows.ndim == 1:
+            rows = rows[:, None]
+        if reservoir is None:
+            reservoir = np.empty((k, rows.shape[1]), dtype=np.float64)
+        # As primeiras k linhas preenchem o reservatório
+        fill = min(len(rows), max(0, k - seen))
+        reservoir[seen:seen + fill] = rows[:fill]
+        rest = rows[fill:]
+        if len(rest):
+            # Linha de posição global i substitui a posição j ~ U[0, i] quando j < k
+            positions = np.arange(seen + fill, seen + len(rows))
+            slots = rng.integers(0, positions + 1)
+            replace = np.flatnonzero(slots < k)
+            # Quando duas linhas caem na mesma posição, vale a última (como no algoritmo sequencial)
+            slots, last = np.unique(slots[replace][::-1], return_index=True)
+            reservoir[slots] = rest[replace[::-1][last]]
+        seen += len(rows)
+    if reservoir is None:
+        return np.empty((0, 0))
+    return reservoir[:min(seen, k)]
+
+
+def plot_distribution(values, bins=PLOT_BINS, color='royalblue'):
+    """Histograma de faixas fixas com a densidade suavizada, na escala das contagens"""
+    counts, edges = histogram(values, bins)
+    plt.stairs(counts, edges, fill=True, alpha=0.5, color=color)
+    density = smoothed_density(counts, edges) * counts.sum() * np.diff(edges).mean()
+    plt.plot((edges[:-1] + edges[1:]) / 2, density, color=color)
+    plt.ylabel('Contagem')
+
+
+def plot_relationship(x, y, bins=PLOT_BINS, sample=PLOT_SAMPLE_POINTS, seed=0):
+    """
+    Relação entre duas variáveis com muitas linhas: mapa de densidade (histogram2d),
+    amostra de pontos sobreposta e linha da média de y por faixa de x.
+    """
+    counts, x_edges, y_edges = density_2d(x, y, bins)
+    plt.pcolormesh(x_edges, y_edges, counts.T, cmap='Blues',
+                   norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)), shading='flat')
+    plt.colorbar(label='Leituras')
+    points = reservoir_sample(np.column_stack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)]),
+                              sample, seed)
+    plt.scatter(points[:, 0], points[:, 1], s=2, alpha=0.3, color='black')
+    centers, means, _ = binned_mean(x, y, bins)
+    plt.plot(centers, means, color='darkorange', linewidth=2, label='Média por faixa')
+    plt.legend()
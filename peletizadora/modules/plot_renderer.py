@@ -0,0 +1,122 @@
+import inspect
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+import matplotlib
+from config import LARGE_PLOT_ROWS, PLOT_BINS, PLOT_SAMPLE_POINTS
+from fingerprint import content_fingerprint, file_fingerprint, source_fingerprint
+
+# Módulos auxiliares chamados pelas funções de plotagem: mudanças neles também refazem os gráficos
+PLOT_HELPERS = ('plot_aggregation', 'summary_stats', 'sensitivity')
+
+# Pool único de processos, compartilhado por todos os PlotRenderer (etapas que rodam ao mesmo tempo)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def shared_executor(n_jobs=None):
+    """
+    Pool de processos dos gráficos, criado no primeiro uso com n_jobs processos
+    (padrão: os núcleos da máquina); as chamadas seguintes reaproveitam o mesmo pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            n_jobs = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count() or 1
+            _executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker)
+        return _executor
+
+
+def shutdown_executor():
+    """Encerra o pool compartilhado (o próximo PlotRenderer cria outro)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+class PlotRenderer:
+    """
+    Gera figuras em segundo plano, em processos com o backend Agg (sem janela).
+    Todos os renderers usam o mesmo pool (shared_executor): etapas de gráficos que
+    rodam ao mesmo tempo dividem os n_jobs processos em vez de criar um pool cada.
+
+    Cada submit envia uma função de plotagem, chamada no processo com save=True;
+    o processo principal segue (por exemplo, treinando os modelos) enquanto as
+    figuras são renderizadas. As funções retornam o caminho (ou a lista de
+    caminhos) dos PNGs salvos, e wait só retorna depois que todos foram escritos.
+
+    Com um ArtifactManifest, cada tarefa é identificada pelo hash da função, dos
+    argumentos (dados, modelo, parâmetros), do arquivo do código da função, dos
+    módulos auxiliares em code e das constantes de plotagem do config.py;
+    tarefas cujos PNGs já foram gerados com a mesma chave são puladas.
+    """
+
+    def __init__(self, n_jobs=None, manifest=None, code=PLOT_HELPERS):
+        self.executor = shared_executor(n_jobs)
+        self.manifest = manifest
+        self.code = None
+        if manifest is not None:
+            self.code = content_fingerprint(source_fingerprint(*code),
+                                            (LARGE_PLOT_ROWS, PLOT_BINS, PLOT_SAMPLE_POINTS))
+        self.futures = []
+        self.skipped = []
+
+    def submit(self, function, *args, **kwargs):
+        """Agenda function(*args, save=True, **kwargs); os argumentos são copiados para o processo"""
+        key = None
+        if self.manifest is not None:
+            key = content_fingerprint(function, args, kwargs, file_fingerprint(inspect.getsourcefile(function)),
+                                      self.code)
+            outputs = self.manifest.outputs(key)
+            if outputs is not None:
+                self.skipped.extend(outputs)
+                return
+        self.futures.append((key, self.executor.submit(_render, function, args, kwargs)))
+
+    def wait(self):
+        """Espera todas as figuras agendadas e retorna os caminhos dos arquivos salvos"""
+        paths = []
+        for key, future in self.futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Aviso: Não foi possível gerar um gráfico - {e}")
+                continue
+            paths.extend(result)
+            if key is not None:
+                self.manifest.record(key, result)
+        self.futures = []
+        return paths
+
+    def close(self):
+        """Cancela as tarefas deste renderer ainda não iniciadas e espera as em andamento; o pool continua"""
+        for _, future in self.futures:
+            future.cancel()
+        wait([future for _, future in self.futures])
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _init_worker():
+    # O backend precisa ser trocado antes de qualquer figura ser criada no processo
+    matplotlib.use('Agg', force=True)
+
+
+def _render(function, args, kwargs):
+    import matplotlib.pyplot as plt
+    kwargs.setdefault('save', True)
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        plt.close('all')
+    if isinstance(result, dict):
+        result = result.get('path')
+    paths = result if isinstance(result, list) else [result]
+    return [path for path in paths if isinstance(path, str)]
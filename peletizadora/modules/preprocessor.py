@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class Preprocessor:
+    """
+    Pré-processamento ajustado aos dados de treino: limites IQR e medianas por coluna.
+
+    Os mesmos parâmetros são aplicados em novas leituras com transform(), que
+    limita os outliers e imputa os faltantes em uma única passada NumPy,
+    podendo escrever em um buffer pré-alocado (inclusive o próprio array de entrada).
+    """
+
+    def __init__(self, feature_names, lower, upper, medians):
+        self.feature_names = list(feature_names)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.medians = np.asarray(medians, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, df):
+        """Calcula os limites IQR (Q1 - 1.5*IQR, Q3 + 1.5*IQR) e as medianas dos dados já limitados"""
+        values = df.to_numpy(dtype=np.float64)
+        q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        medians = np.nanmedian(np.clip(values, lower, upper), axis=0)
+        return cls(df.columns, lower, upper, medians)
+
+    def transform(self, X, out=None):
+        """Limita outliers e imputa faltantes em X (1D ou 2D, na ordem de feature_names)"""
+        if out is None:
+            out = np.array(X, dtype=np.float64)
+        elif out is not X:
+            np.copyto(out, X)
+        # minimum/maximum em vez de np.clip: mesmo resultado (NaN preservado), menos overhead por chamada
+        np.minimum(out, self.upper, out=out)
+        np.maximum(out, self.lower, out=out)
+        np.copyto(out, self.medians, where=np.isnan(out))
+        return out
+
+    def transform_frame(self, df):
+        """Aplica transform() a um DataFrame, preservando colunas e índice"""
+        import pandas as pd  # o monitoramento usa só transform(), sem carregar o pandas
+        values = self.transform(df[self.feature_names].to_numpy(dtype=np.float64))
+        return pd.DataFrame(values, columns=self.feature_names, index=df.index)
+
+    def subset(self, feature_names):
+        """Preprocessor restrito (e reordenado) às colunas informadas"""
+        idx = [self.feature_names.index(name) for name in feature_names]
+        return Preprocessor(feature_names, self.lower[idx], self.upper[idx], self.medians[idx])
+
+    def save(self, filepath):
+        np.savez(filepath, feature_names=np.array(self.feature_names),
+                 lower=self.lower, upper=self.upper, medians=self.medians)
+        print(f"Pré-processador salvo em {filepath}")
+
+    @classmethod
+    def load(cls, filepath):
+        with np.load(filepath, allow_pickle=False) as data:
+            return cls(data['feature_names'].tolist(), data['lower'], data['upper'], data['medians'])
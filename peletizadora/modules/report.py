@@ -1,49 +1,121 @@
-from pathlib import Path
-from config import REPORT_DIR
-import pandas as pd
-
-class PDIReport:
-    @staticmethod
-    def generate_recommendation(feature_importance_df, threshold=0.05):
-        recommendations = []
-        if 'Importance' in feature_importance_df.columns:
-            top_vars = feature_importance_df[feature_importance_df['Importance'] > threshold]
-            for _, row in top_vars.iterrows():
-                direction = "aumentar" if row['Importance'] > 0 else "reduzir"
-                recommendations.append(f"Tente {direction} a variável '{row['Feature']}' para melhorar o PDI.")
-        elif 'Coefficient' in feature_importance_df.columns:
-            top_vars = feature_importance_df[feature_importance_df['Coefficient'].abs() > threshold]
-            for _, row in top_vars.iterrows():
-                direction = "aumentar" if row['Coefficient'] > 0 else "reduzir"
-                recommendations.append(f"Tente {direction} a variável '{row['Feature']}' para melhorar o PDI.")
-        return recommendations
-
-    @staticmethod
-    def save_report(recommendations, model_name):
-        Path(REPORT_DIR).mkdir(parents=True, exist_ok=True)
-        report_path = Path(REPORT_DIR) / f"recomendacoes_{model_name}.txt"
-        with open(report_path, 'w', encoding='utf-8') as file:
-            file.write("Recomendações para melhorar o PDI:\n\n")
-            if recommendations:
-                for rec in recommendations:
-                    file.write(f"- {rec}\n")
-            else:
-                file.write("Nenhuma recomendação gerada.\n")
-        print(f"Relatório salvo em {report_path}")
-
-    @staticmethod
-    def save_ideal_settings(settings_dict, model_name):
-        """
-        Salva as configurações ideais em um arquivo txt, excluindo PDI e Finos.
-        """
-        if not settings_dict:
-            print("Nenhuma configuração ideal para salvar.")
-            return
-        Path(REPORT_DIR).mkdir(parents=True, exist_ok=True)
-        report_path = Path(REPORT_DIR) / f"configuracoes_ideais_{model_name}.txt"
-        with open(report_path, 'w', encoding='utf-8') as file:
-            file.write("Configurações Ideais para PDI Alto e Finos Baixos:\n\n")
-            for key, value in settings_dict.items():
-                if key not in ['PDI', 'Finos']:
-                    file.write(f"{key}: {value:.4f}\n")
-        print(f"Configurações ideais salvas em {report_path}")
+from pathlib import Path
+from config import REPORT_DIR
+from artifact_manifest import ArtifactManifest
+from fingerprint import content_fingerprint, source_fingerprint
+import pandas as pd
+
+class PDIReport:
+    @staticmethod
+    def generate_recommendation(feature_importance_df, threshold=0.05):
+        recommendations = []
+        if 'Effect' in feature_importance_df.columns:
+            # Importância por permutação: queda de R², com o sentido do efeito sobre o PDI previsto
+            top_vars = feature_importance_df[feature_importance_df['Importance'] > threshold]
+            for _, row in top_vars.iterrows():
+                direction = "aumentar" if row['Effect'] > 0 else "reduzir"
+                recommendations.append(f"Tente {direction} a variável '{row['Feature']}' para melhorar o PDI.")
+        elif 'Importance' in feature_importance_df.columns:
+            top_vars = feature_importance_df[feature_importance_df['Importance'] > threshold]
+            for _, row in top_vars.iterrows():
+                direction = "aumentar" if row['Importance'] > 0 else "reduzir"
+                recommendations.append(f"Tente {direction} a variável '{row['Feature']}' para melhorar o PDI.")
+        elif 'Coefficient' in feature_importance_df.columns:
+            top_vars = feature_importance_df[feature_importance_df['Coefficient'].abs() > threshold]
+            for _, row in top_vars.iterrows():
+                direction = "aumentar" if row['Coefficient'] > 0 else "reduzir"
+                recommendations.append(f"Tente {direction} a variável '{row['Feature']}' para melhorar o PDI.")
+        return recommendations
+
+    @staticmethod
+    def save_report(recommendations, model_name, inputs=None):
+        """
+        recommendations: lista, ou função que a gera. Com inputs (versão do modelo,
+        parâmetros), a função só é chamada se o relatório precisar ser refeito.
+        """
+        report_path = Path(REPORT_DIR) / f"recomendacoes_{model_name}.txt"
+
+        def build():
+            text = "Recomendações para melhorar o PDI:\n\n"
+            items = recommendations() if callable(recommendations) else recommendations
+            if items:
+                for rec in items:
+                    text += f"- {rec}\n"
+            else:
+                text += "Nenhuma recomendação gerada.\n"
+            return text
+
+        if PDIReport._write_report(report_path, build, inputs):
+            print(f"Relatório salvo em {report_path}")
+        return str(report_path)
+
+    @staticmethod
+    def save_ideal_settings(settings_dict, model_name, inputs=None):
+        """
+        Salva as configurações ideais em um arquivo txt, excluindo PDI e Finos.
+        settings_dict pode ser uma função que o calcula, chamada só se o arquivo precisar ser refeito.
+        """
+        report_path = Path(REPORT_DIR) / f"configuracoes_ideais_{model_name}.txt"
+
+        def build():
+            settings = settings_dict() if callable(settings_dict) else settings_dict
+            if not settings:
+                return None
+            text = "Configurações Ideais para PDI Alto e Finos Baixos:\n\n"
+            for key, value in settings.items():
+                if key not in ['PDI', 'Finos']:
+                    text += f"{key}: {value:.4f}\n"
+            return text
+
+        written = PDIReport._write_report(report_path, build, inputs)
+        if written is None:
+            print("Nenhuma configuração ideal para salvar.")
+            return
+        if written:
+            print(f"Configurações ideais salvas em {report_path}")
+        return str(report_path)
+
+    @staticmethod
+    def save_leaderboard(leaderboard_df, inputs=None):
+        """
+        Salva a comparação entre modelos (R² de CV, tempo de treino, latência e tamanho).
+        leaderboard_df pode ser uma função que a monta, chamada só se o arquivo precisar ser refeito.
+        """
+        report_path = Path(REPORT_DIR) / "comparacao_modelos.txt"
+
+        def build():
+            leaderboard = leaderboard_df() if callable(leaderboard_df) else leaderboard_df
+            return ("Comparação entre modelos:\n\n"
+                    + leaderboard.to_string(index=False, float_format=lambda v: f"{v:.3f}") + "\n")
+
+        if PDIReport._write_report(report_path, build, inputs):
+            print(f"Comparação entre modelos salva em {report_path}")
+        return str(report_path)
+
+    @staticmethod
+    def _write_report(report_path, build, inputs=None):
+        """
+        Gera (build() -> texto) e grava o relatório. Com inputs (impressão digital dos dados,
+        versão do modelo, parâmetros), a chave no manifesto vem deles e do código deste
+        módulo, e é conferida antes de gerar o texto; sem inputs, vem do próprio texto.
+        Retorna True se gravou, False se já estava atualizado e None se build não gerou texto.
+        """
+        manifest = ArtifactManifest()
+        key = None
+        if inputs is not None:
+            key = content_fingerprint(str(report_path), inputs, source_fingerprint(PDIReport))
+            if manifest.outputs(key) is not None:
+                print(f"Sem alterações: {report_path}")
+                return False
+        text = build()
+        if text is None:
+            return None
+        if key is None:
+            key = content_fingerprint(str(report_path), text)
+            if manifest.outputs(key) is not None:
+                print(f"Sem alterações: {report_path}")
+                return False
+        Path(REPORT_DIR).mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        manifest.record(key, [report_path])
+        return True
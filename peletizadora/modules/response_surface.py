@@ -0,0 +1,169 @@
+import itertools
+import json
+import os
+import re
+import numpy as np
+from config import CONTROL_LIMITS, SURFACE_VARIABLES, SURFACE_POINTS
+from fingerprint import file_fingerprint
+
+
+def surface_paths(model_path):
+    """Arquivos da superfície de resposta salvos ao lado do modelo (.npy com a grade e .json com metadados)"""
+    stem = os.path.splitext(str(model_path))[0]
+    return stem + '_surface.npy', stem + '_surface.json'
+
+
+def surface_spec(X, variables=SURFACE_VARIABLES, n_points=SURFACE_POINTS, control_limits=CONTROL_LIMITS):
+    """
+    Eixos da grade e valores fixos a partir dos dados de treino (já pré-processados).
+    Cada eixo cobre a faixa observada nos dados, estendida aos limites de controle;
+    fixed guarda as medianas de todas as variáveis (as dos eixos são usadas
+    quando uma consulta não informa a variável).
+    """
+    variables = [name for name in variables if name in X.columns]
+    if not variables:
+        raise ValueError("Nenhuma variável da superfície de resposta está nos dados")
+    axes = {}
+    for name in variables:
+        lower, upper = float(X[name].min()), float(X[name].max())
+        if name in control_limits:
+            lower = min(lower, control_limits[name][0])
+            upper = max(upper, control_limits[name][1])
+        if upper <= lower:
+            upper = lower + 1.0
+        axes[name] = (lower, upper, int(n_points))
+    fixed = {name: float(X[name].median()) for name in X.columns}
+    return {'axes': axes, 'fixed': fixed}
+
+
+class ResponseSurface:
+    """
+    PDI previsto em uma grade regular sobre as variáveis controláveis principais,
+    com as demais variáveis nas medianas do treino.
+
+    A grade é calculada uma vez por versão do modelo e salva em .npy (carregado
+    com mmap). Consultas "e se" são respondidas por interpolação multilinear
+    entre os 2^d vértices da célula que contém o ponto, sem chamar o modelo.
+    Pontos fora da grade são limitados à borda.
+    """
+
+    def __init__(self, axes, fixed, values, model_fingerprint=None):
+        self.variables = list(axes)
+        self.axes = {name: tuple(axis) for name, axis in axes.items()}
+        self.fixed = dict(fixed)
+        self.values = values
+        # Visão plana sem a subclasse memmap: indexação mais barata por consulta
+        self._flat = np.asarray(values).reshape(-1)
+        self.model_fingerprint = model_fingerprint
+        self.lower = np.array([axis[0] for axis in self.axes.values()], dtype=np.float64)
+        self.upper = np.array([axis[1] for axis in self.axes.values()], dtype=np.float64)
+        self.shape = np.array([axis[2] for axis in self.axes.values()], dtype=np.intp)
+        self.step = (self.upper - self.lower) / (self.shape - 1)
+        self._defaults = np.array([self.fixed.get(name, (axis[0] + axis[1]) / 2)
+                                   for name, axis in self.axes.items()], dtype=np.float64)
+        corners = np.array(list(itertools.product((0, 1), repeat=len(self.variables))), dtype=np.intp)
+        self._corners = corners.astype(bool)
+        # Deslocamento (no array plano) de cada vértice da célula em relação ao vértice inferior
+        self._strides = np.array([int(np.prod(self.shape[i + 1:])) for i in range(len(self.variables))],
+                                 dtype=np.intp)
+        self._corner_offsets = corners @ self._strides
+
+    @classmethod
+    def build(cls, predict, feature_names, spec, model_fingerprint=None, chunk_size=65536):
+        """Avalia o modelo (predict: array 2D na ordem de feature_names -> PDI) em todos os pontos da grade"""
+        axes, fixed = spec['axes'], spec['fixed']
+        feature_names = list(feature_names)
+        missing = [name for name in feature_names if name not in fixed and name not in axes]
+        if missing:
+            raise ValueError(f"Superfície de resposta sem valor para as features: {missing}")
+        grids = [np.linspace(lower, upper, n_points) for lower, upper, n_points in axes.values()]
+        shape = tuple(len(grid) for grid in grids)
+        n_rows = int(np.prod(shape))
+
+        base = np.array([fixed.get(name, np.nan) for name in feature_names], dtype=np.float64)
+        axis_idx = [feature_names.index(name) for name in axes]
+        values = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, n_rows))
+            X = np.repeat(base[None, :], len(flat), axis=0)
+            for column, grid, index in zip(axis_idx, grids, np.unravel_index(flat, shape)):
+                X[:, column] = grid[index]
+            values[start:start + len(flat)] = predict(X)
+        return cls(axes, fixed, values.reshape(shape), model_fingerprint)
+
+    def save(self, model_path):
+        """Salva a grade (.npy) e os metadados (.json) ao lado do modelo, com troca atômica"""
+        npy_path, json_path = surface_paths(model_path)
+        with open(npy_path + '.tmp', 'wb') as f:
+            np.save(f, np.asarray(self.values, dtype=np.float64))
+        os.replace(npy_path + '.tmp', npy_path)
+        metadata = {
+            'axes': {name: list(axis) for name, axis in self.axes.items()},
+            'fixed': self.fixed,
+            'model_fingerprint': self.model_fingerprint,
+        }
+        with open(json_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(json_path + '.tmp', json_path)
+        print(f"Superfície de resposta salva em {npy_path}")
+
+    @classmethod
+    def load(cls, model_path):
+        """Carrega a superfície do modelo (grade em mmap); None se ausente ou de outra versão do modelo"""
+        metadata = read_surface_metadata(model_path)
+        npy_path, _ = surface_paths(model_path)
+        if metadata is None or not os.path.exists(npy_path):
+            return None
+        if metadata.get('model_fingerprint') != file_fingerprint(model_path):
+            return None
+        values = np.load(npy_path, mmap_mode='r')
+        return cls(metadata['axes'], metadata['fixed'], values, metadata['model_fingerprint'])
+
+    def query(self, params):
+        """PDI previsto para um dicionário de valores; variáveis ausentes ficam nas medianas do treino"""
+        point = [params.get(name, np.nan) for name in self.variables]
+        return float(self.query_batch(np.array([point]))[0])
+
+    def query_batch(self, points):
+        """Interpolação multilinear para um array (n, d) na ordem de self.variables (NaN = mediana)"""
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        points = np.where(np.isnan(points), self._defaults, points)
+        position = (np.clip(points, self.lower, self.upper) - self.lower) / self.step
+        index = np.minimum(position.astype(np.intp), self.shape - 2)
+        fraction = position - index
+        # Pesos (n, 2^d): produto de fraction ou 1 - fraction conforme o vértice
+        weights = np.where(self._corners[None, :, :], fraction[:, None, :], 1.0 - fraction[:, None, :]).prod(axis=2)
+        vertices = self._flat[(index @ self._strides)[:, None] + self._corner_offsets]
+        return np.einsum('ij,ij->i', weights, vertices)
+
+
+def read_surface_metadata(model_path):
+    _, json_path = surface_paths(model_path)
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_or_build_surface(model_path, predict, feature_names, spec=None):
+    """
+    Superfície válida para o modelo em model_path. Se não existir ou tiver sido
+    calculada para outra versão do arquivo, é recalculada com predict e salva.
+    Sem spec, reaproveita a grade da superfície anterior deste modelo ou do modelo
+    base (pdi_model_<tipo>, sem o sufixo _v<N>).
+    """
+    surface = ResponseSurface.load(model_path)
+    if surface is not None:
+        return surface
+    if spec is None:
+        base_path = re.sub(r"_v\d+(\.\w+)$", r"\1", str(model_path))
+        for path in (model_path, base_path):
+            metadata = read_surface_metadata(path)
+            if metadata is not None:
+                spec = {'axes': metadata['axes'], 'fixed': metadata['fixed']}
+                break
+    if spec is None:
+        raise ValueError(f"Sem grade de superfície de resposta para {model_path}; execute o treino primeiro")
+    surface = ResponseSurface.build(predict, feature_names, spec, file_fingerprint(model_path))
+    surface.save(model_path)
+    return surface
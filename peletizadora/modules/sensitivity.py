@@ -0,0 +1,124 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+class ModelPredict:
+    """Adapta um modelo (pipeline sklearn ou preditor compilado) para receber arrays na ordem de columns"""
+
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = list(columns)
+
+    def __call__(self, values):
+        return np.asarray(self.model.predict(pd.DataFrame(values, columns=self.columns)), dtype=float).reshape(-1)
+
+
+class SensitivityAnalysis:
+    """
+    Curvas de dependência parcial (PD) e ICE do PDI previsto em relação às features.
+
+    Para cada feature (ou par de features), todas as linhas perturbadas
+    (amostra x pontos da grade) são montadas em um único lote e o modelo é
+    chamado uma vez. ICE é a curva de cada linha da amostra; PD é a média
+    das curvas ICE. Os resultados são arrays, sem depender de gráficos.
+    """
+
+    def __init__(self, model, X, n_grid=20, n_samples=200, percentiles=(0.05, 0.95), seed=0):
+        self.features = list(X.columns)
+        self.predict = model if callable(model) and not hasattr(model, 'predict') else ModelPredict(model, self.features)
+        self.n_grid = n_grid
+        self.percentiles = percentiles
+        if len(X) > n_samples:
+            rows = np.random.default_rng(seed).choice(len(X), n_samples, replace=False)
+            self.sample = X.to_numpy(dtype=np.float64)[np.sort(rows)]
+        else:
+            self.sample = X.to_numpy(dtype=np.float64)
+        # Grades calculadas aqui para não guardar X: só a amostra é enviada aos processos em run
+        self.grids = {feature: self._make_grid(X[feature]) for feature in self.features}
+
+    def _make_grid(self, column):
+        """Pontos da grade: valores distintos, se forem poucos, ou n_grid pontos entre os percentis"""
+        values = column.dropna().to_numpy(dtype=np.float64)
+        unique = np.unique(values)
+        if len(unique) <= self.n_grid:
+            return unique
+        lower, upper = np.quantile(values, self.percentiles)
+        if upper <= lower:
+            return unique[[0, -1]]
+        return np.linspace(lower, upper, self.n_grid)
+
+    def grid(self, feature):
+        return self.grids[feature]
+
+    def one_way(self, feature):
+        """PD e ICE de uma feature: {'feature', 'grid', 'ice' (amostras x grade), 'pd'}"""
+        grid = self.grid(feature)
+        column = self.features.index(feature)
+        batch = np.repeat(self.sample[:, None, :], len(grid), axis=1)
+        batch[:, :, column] = grid
+        ice = self.predict(batch.reshape(-1, len(self.features))).reshape(len(self.sample), len(grid))
+        return {'feature': feature, 'grid': grid, 'ice': ice, 'pd': ice.mean(axis=0)}
+
+    def two_way(self, feature_x, feature_y):
+        """PD conjunta de um par: {'features', 'grid_x', 'grid_y', 'pd' (grade_x x grade_y)}"""
+        grid_x, grid_y = self.grid(feature_x), self.grid(feature_y)
+        col_x, col_y = self.features.index(feature_x), self.features.index(feature_y)
+        batch = np.repeat(self.sample[:, None, None, :], len(grid_x), axis=1)
+        batch = np.repeat(batch, len(grid_y), axis=2)
+        batch[:, :, :, col_x] = grid_x[None, :, None]
+        batch[:, :, :, col_y] = grid_y[None, None, :]
+        predictions = self.predict(batch.reshape(-1, len(self.features)))
+        pd_values = predictions.reshape(len(self.sample), len(grid_x), len(grid_y)).mean(axis=0)
+        return {'features': (feature_x, feature_y), 'grid_x': grid_x, 'grid_y': grid_y, 'pd': pd_values}
+
+    def run(self, features=None, pairs=None, n_jobs=1):
+        """
+        Calcula PD/ICE de cada feature e a PD conjunta de cada par.
+        pairs=None usa todos os pares de features; n_jobs > 1 distribui as
+        tarefas em processos (o modelo e a amostra são enviados uma vez por processo).
+        Retorna {'one_way': {feature: ...}, 'two_way': {(f1, f2): ...}}.
+        """
+        features = list(features) if features is not None else self.features
+        pairs = list(pairs) if pairs is not None else list(itertools.combinations(features, 2))
+        tasks = [('one_way', (feature,)) for feature in features] + [('two_way', tuple(pair)) for pair in pairs]
+
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), initializer=_init_worker,
+                                     initargs=(self,)) as executor:
+                outputs = list(executor.map(_run_task, tasks))
+        else:
+            outputs = [getattr(self, method)(*args) for method, args in tasks]
+
+        results = {'one_way': {}, 'two_way': {}}
+        for (method, args), output in zip(tasks, outputs):
+            results[method][args[0] if method == 'one_way' else args] = output
+        return results
+
+
+def rank_features(results):
+    """Ordena as features pela amplitude da curva PD (máximo - mínimo do PDI previsto)"""
+    ranking = pd.DataFrame([
+        {'feature': feature, 'pd_range': float(np.ptp(result['pd'])),
+         'pd_min': float(result['pd'].min()), 'pd_max': float(result['pd'].max()),
+         'best_value': float(result['grid'][np.argmax(result['pd'])])}
+        for feature, result in results['one_way'].items()
+    ])
+    return ranking.sort_values('pd_range', ascending=False).reset_index(drop=True)
+
+
+_worker_analysis = None
+
+
+def _init_worker(analysis):
+    global _worker_analysis
+    _worker_analysis = analysis
+
+
+def _run_task(task):
+    method, args = task
+    return getattr(_worker_analysis, method)(*args)
@@ -0,0 +1,156 @@
+import time
+import numpy as np
+from config import (CONTROL_LIMITS, OPTIMIZER_SAMPLES, OPTIMIZER_TIME_BUDGET, OPTIMIZER_MOVE_PENALTY,
+                    OPTIMIZER_FINOS_WEIGHT)
+
+
+def latin_hypercube(n_samples, lower, upper, rng):
+    """Amostra Latin hypercube: cada variável tem exatamente uma amostra em cada uma das n faixas"""
+    n_dims = len(lower)
+    strata = rng.permuted(np.tile(np.arange(n_samples), (n_dims, 1)), axis=1).T
+    unit = (strata + rng.random((n_samples, n_dims))) / n_samples
+    return lower + unit * (upper - lower)
+
+
+class SetpointOptimizer:
+    """
+    Busca o setpoint das variáveis controláveis (CONTROL_LIMITS) que maximiza o PDI previsto.
+
+    As demais variáveis ficam fixas na leitura atual. Uma amostra Latin hypercube
+    das variáveis controláveis é avaliada em uma única chamada ao modelo, e os
+    melhores candidatos são refinados localmente (perturbações com passo
+    decrescente, também em lote) enquanto houver tempo no orçamento.
+
+    Objetivo: PDI - finos_weight * Finos (quando há previsão de Finos)
+    - move_penalty * soma(((x - atual) / faixa)²), para preferir ajustes pequenos
+    quando o ganho é equivalente. Variáveis fora dos limites contam a distância
+    a partir do limite mais próximo, já que voltar à faixa é obrigatório.
+
+    predict(X) recebe um array 2D na ordem de feature_names e retorna
+    (pdi, finos ou None). fill_values são os valores que predict usa no lugar
+    de variáveis não informadas (as medianas do pré-processamento), na mesma
+    ordem; a leitura atual é avaliada com eles, como na previsão reportada.
+    """
+
+    def __init__(self, predict, feature_names, control_limits=CONTROL_LIMITS,
+                 n_samples=OPTIMIZER_SAMPLES, time_budget=OPTIMIZER_TIME_BUDGET,
+                 move_penalty=OPTIMIZER_MOVE_PENALTY, finos_weight=OPTIMIZER_FINOS_WEIGHT,
+                 n_elite=8, n_neighbors=64, seed=0, fill_values=None):
+        self.predict = predict
+        self.feature_names = list(feature_names)
+        self.controls = [name for name in control_limits if name in self.feature_names]
+        if not self.controls:
+            raise ValueError("Nenhuma variável de CONTROL_LIMITS está entre as features do modelo")
+        self.control_idx = np.array([self.feature_names.index(name) for name in self.controls])
+        self.lower = np.array([control_limits[name][0] for name in self.controls], dtype=np.float64)
+        self.upper = np.array([control_limits[name][1] for name in self.controls], dtype=np.float64)
+        # Variável controlável não informada: o valor imputado na previsão ou, sem ele, o centro da faixa
+        self.fill = (self.lower + self.upper) / 2
+        if fill_values is not None:
+            self.fill = np.asarray(fill_values, dtype=np.float64)[self.control_idx]
+        self.n_samples = n_samples
+        self.time_budget = time_budget
+        self.move_penalty = move_penalty
+        self.finos_weight = finos_weight
+        self.n_elite = n_elite
+        self.n_neighbors = n_neighbors
+        self.rng = np.random.default_rng(seed)
+        # Custo medido por linha avaliada (s), usado para dimensionar os lotes ao orçamento
+        self._row_cost = None
+
+    def _evaluate(self, base, candidates, reference):
+        """Objetivo de cada candidato (linhas de variáveis controláveis) e o PDI previsto"""
+        X = np.repeat(base[None, :], len(candidates), axis=0)
+        X[:, self.control_idx] = candidates
+        started = time.perf_counter()
+        pdi, finos = self.predict(X)
+        elapsed = time.perf_counter() - started
+        cost = elapsed / len(candidates)
+        self._row_cost = cost if self._row_cost is None else 0.8 * self._row_cost + 0.2 * cost
+
+        pdi = np.asarray(pdi, dtype=np.float64)
+        score = pdi.copy()
+        if finos is not None:
+            score -= self.finos_weight * np.asarray(finos, dtype=np.float64)
+        moved = (candidates - reference) / (self.upper - self.lower)
+        score -= self.move_penalty * np.sum(moved ** 2, axis=1)
+        return score, pdi, finos
+
+    def _batch_size(self, remaining, default):
+        """Quantas linhas cabem no tempo restante, segundo o custo medido"""
+        if self._row_cost is None or self._row_cost <= 0:
+            return default
+        # Margem de 20% para a variação do custo entre chamadas
+        return int(min(default, max(0, 0.8 * remaining / self._row_cost)))
+
+    def optimize(self, current_params, current_pdi=None):
+        """
+        Retorna o setpoint recomendado para a leitura atual: dicionário com setpoint,
+        PDI previsto atual e no setpoint, ganho, avaliações e tempo gasto (ms).
+        Com current_pdi (a previsão já reportada para a leitura), o ganho é medido a partir dele.
+        """
+        started = time.perf_counter()
+        # 10% do orçamento reservado para o trabalho fora do modelo (montagem dos lotes, ordenação)
+        deadline = started + 0.9 * self.time_budget
+        base = np.array([current_params.get(name, np.nan) for name in self.feature_names], dtype=np.float64)
+        current = base[self.control_idx]
+        current = np.where(np.isnan(current), self.fill, current)
+        start = np.clip(current, self.lower, self.upper)
+        evaluations = 0
+        if self._row_cost is None:
+            # Primeira chamada: mede o custo do modelo em um lote pequeno antes de dimensionar a amostra
+            self._evaluate(base, latin_hypercube(64, self.lower, self.upper, self.rng), start)
+            evaluations += 64
+
+        # 1) Amostra global em um único lote; a primeira linha é a leitura atual (só para referência),
+        #    a segunda é a leitura trazida para dentro dos limites
+        n_global = max(self.n_elite, self._batch_size(self.time_budget / 2, self.n_samples))
+        candidates = np.vstack([current, start, latin_hypercube(n_global, self.lower, self.upper, self.rng)])
+        score, pdi, finos = self._evaluate(base, candidates, start)
+        evaluations += len(candidates)
+        if current_pdi is None:
+            current_pdi = pdi[0]
+        current_finos = finos[0] if finos is not None else None
+        candidates, score, pdi = candidates[1:], score[1:], pdi[1:]
+        if finos is not None:
+            finos = finos[1:]
+
+        order = np.argsort(score)[::-1][:self.n_elite]
+        elite, elite_score, elite_pdi = candidates[order], score[order], pdi[order]
+        elite_finos = finos[order] if finos is not None else None
+
+        # 2) Refinamento local em torno dos melhores, com passo decrescente
+        step = 0.1 * (self.upper - self.lower)
+        while step.max() > 1e-4 * (self.upper - self.lower).max():
+            remaining = deadline - time.perf_counter()
+            n_rows = self._batch_size(remaining, self.n_elite * self.n_neighbors)
+            per_center = n_rows // len(elite)
+            if per_center < 2:
+                break
+            noise = self.rng.normal(0.0, 1.0, size=(len(elite), per_center, len(self.controls)))
+            neighbors = np.clip(elite[:, None, :] + noise * step, self.lower, self.upper).reshape(-1, len(self.controls))
+            score, pdi, finos = self._evaluate(base, neighbors, start)
+            evaluations += len(neighbors)
+
+            pool = np.vstack([elite, neighbors])
+            pool_score = np.concatenate([elite_score, score])
+            pool_pdi = np.concatenate([elite_pdi, pdi])
+            order = np.argsort(pool_score)[::-1][:self.n_elite]
+            improved = pool_score[order[0]] > elite_score[0]
+            if elite_finos is not None:
+                elite_finos = np.concatenate([elite_finos, finos])[order]
+            elite, elite_score, elite_pdi = pool[order], pool_score[order], pool_pdi[order]
+            if not improved:
+                step = step / 2
+
+        best = elite[0]
+        return {
+            'setpoint': dict(zip(self.controls, best.tolist())),
+            'current_pdi': float(current_pdi),
+            'predicted_pdi': float(elite_pdi[0]),
+            'gain': float(elite_pdi[0] - current_pdi),
+            'current_finos': float(current_finos) if current_finos is not None else None,
+            'predicted_finos': float(elite_finos[0]) if elite_finos is not None else None,
+            'evaluations': evaluations,
+            'elapsed_ms': 1000 * (time.perf_counter() - started),
+        }
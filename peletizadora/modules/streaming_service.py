@@ -0,0 +1,459 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import (MODEL_DIR, CONTROL_LIMITS, STREAM_QUEUE_SIZE, STREAM_BATCH_SIZE,
+                    STREAM_BATCH_TIMEOUT, STREAM_HISTORY)
+from data_processor import DataProcessor
+from monitoring_system import PDIMonitor
+
+
+class RingBuffer:
+    """
+    Histórico de tamanho fixo sobre um array NumPy pré-alocado.
+
+    As últimas `capacity` linhas ficam em memória; linhas novas sobrescrevem as
+    mais antigas, então o consumo de memória não cresce com o tempo de execução.
+    """
+
+    def __init__(self, capacity, columns):
+        self.columns = list(columns)
+        self.capacity = int(capacity)
+        self.data = np.full((self.capacity, len(self.columns)), np.nan)
+        self.total = 0  # linhas já escritas desde o início
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def extend(self, rows):
+        """Acrescenta um bloco de linhas (array 2D na ordem de columns)"""
+        rows = np.asarray(rows, dtype=np.float64)
+        n_rows = rows.shape[0]
+        if n_rows >= self.capacity:
+            rows = rows[-self.capacity:]
+            start = (self.total + n_rows - self.capacity) % self.capacity
+        else:
+            start = self.total % self.capacity
+        n_write = rows.shape[0]
+        first = min(n_write, self.capacity - start)
+        self.data[start:start + first] = rows[:first]
+        self.data[:n_write - first] = rows[first:]
+        self.total += n_rows
+
+    def window(self):
+        """Linhas em memória, sem ordem cronológica (suficiente para estatísticas da janela)"""
+        return self.data[:len(self)]
+
+    def ordered(self):
+        """Cópia das linhas em memória, da mais antiga para a mais recente"""
+        if self.total <= self.capacity:
+            return self.data[:self.total].copy()
+        start = self.total % self.capacity
+        return np.concatenate([self.data[start:], self.data[:start]])
+
+    def rolling_stats(self):
+        """Média, desvio, mínimo e máximo de cada coluna na janela atual"""
+        window = self.window()
+        if window.shape[0] == 0:
+            return {}
+        stats = np.vstack([
+            np.nanmean(window, axis=0), np.nanstd(window, axis=0),
+            np.nanmin(window, axis=0), np.nanmax(window, axis=0)
+        ])
+        return {
+            column: dict(zip(('mean', 'std', 'min', 'max'), stats[:, i]))
+            for i, column in enumerate(self.columns)
+        }
+
+
+class StreamMetrics:
+    """Contadores de vazão e contrapressão do serviço"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.parse_errors = 0
+        self.failed = 0  # leituras de lotes cuja análise falhou
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.producer_wait_s = 0.0  # tempo total que as fontes ficaram bloqueadas na fila cheia
+        self.batch_time_s = 0.0
+        self.max_latency_s = 0.0
+
+    def snapshot(self, queue):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'parse_errors': self.parse_errors,
+            'failed': self.failed,
+            'queue_depth': queue.qsize(),
+            'queue_capacity': queue.maxsize,
+            'max_queue_depth': self.max_queue_depth,
+            'producer_wait_s': round(self.producer_wait_s, 3),
+            'throughput_per_s': round(self.processed / elapsed, 1) if elapsed > 0 else 0.0,
+            'mean_batch_size': round(self.processed / self.batches, 1) if self.batches else 0.0,
+            'mean_batch_ms': round(1000 * self.batch_time_s / self.batches, 3) if self.batches else 0.0,
+            'max_latency_ms': round(1000 * self.max_latency_s, 3),
+        }
+
+
+def parse_line(line):
+    """
+    Converte uma linha JSON ({"Parametro": valor, ...}) em dicionário de leitura.
+    Valores nulos viram NaN; valores não numéricos levantam ValueError, para a
+    leitura ser descartada na fonte e não derrubar o lote inteiro no consumidor.
+    """
+    reading = json.loads(line)
+    if not isinstance(reading, dict):
+        raise ValueError("Leitura deve ser um objeto JSON")
+    for name, value in reading.items():
+        if value is None:
+            reading[name] = np.nan
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            reading[name] = float(value)
+        else:
+            raise ValueError(f"Valor não numérico para {name}: {value!r}")
+    return reading
+
+
+class StreamingMonitorService:
+    """
+    Serviço assíncrono de monitoramento contínuo de uma linha de produção.
+
+    Fontes (simulador, arquivo, UDP, TCP) colocam leituras em uma fila limitada;
+    o consumidor agrupa as leituras em micro-lotes e chama
+    PDIMonitor.full_analysis_batch, guardando leituras e previsões em um RingBuffer.
+    Com a fila cheia, fontes de fluxo (arquivo, TCP, simulador) aguardam e
+    leituras UDP são descartadas; ambos os casos aparecem nas métricas.
+    """
+
+    def __init__(self, monitor, name='linha', queue_size=STREAM_QUEUE_SIZE,
+                 batch_size=STREAM_BATCH_SIZE, batch_timeout=STREAM_BATCH_TIMEOUT,
+                 history=STREAM_HISTORY, on_batch=None):
+        self.monitor = monitor
+        self.name = name
+        self.feature_names = list(monitor.feature_names)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.history = RingBuffer(history, self.feature_names + ['PDI_Previsto', 'Alerta'])
+        self.metrics = StreamMetrics()
+        self.on_batch = on_batch
+        self.last_report = None
+
+    async def put(self, reading):
+        """Enfileira uma leitura aguardando espaço na fila (contrapressão)"""
+        item = (time.perf_counter(), reading)
+        self.metrics.received += 1
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            waited = time.perf_counter()
+            await self.queue.put(item)
+            self.metrics.producer_wait_s += time.perf_counter() - waited
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.queue.qsize())
+
+    def put_nowait(self, reading):
+        """Enfileira uma leitura sem bloquear; descarta e contabiliza quando a fila está cheia"""
+        self.metrics.received += 1
+        try:
+            self.queue.put_nowait((time.perf_counter(), reading))
+        except asyncio.QueueFull:
+            self.metrics.dropped += 1
+            return False
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.queue.qsize())
+        return True
+
+    async def _next_batch(self):
+        """Aguarda a primeira leitura e completa o lote até batch_size ou batch_timeout"""
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def process_batch(self, batch):
+        """Analisa um micro-lote de (timestamp, leitura) e registra o resultado no histórico"""
+        started = time.perf_counter()
+        names = self.feature_names
+        values = np.array([[reading.get(name, np.nan) for name in names] for _, reading in batch],
+                          dtype=np.float64)
+        # DataFrame com nomes de colunas: continua válido se o monitor trocar de modelo (hot-reload)
+        report = self.monitor.full_analysis_batch(pd.DataFrame(values, columns=names, copy=False))
+
+        rows = np.empty((values.shape[0], len(names) + 2))
+        rows[:, :len(names)] = values
+        rows[:, -2] = report['predicted_pdi']
+        rows[:, -1] = report['status'] == 'ALERT'
+        self.history.extend(rows)
+
+        finished = time.perf_counter()
+        metrics = self.metrics
+        metrics.processed += len(batch)
+        metrics.batches += 1
+        metrics.batch_time_s += finished - started
+        metrics.max_latency_s = max(metrics.max_latency_s, finished - batch[0][0])
+        self.last_report = report
+        if self.on_batch is not None:
+            self.on_batch(report)
+        return report
+
+    async def consume(self):
+        """Laço do consumidor: micro-lotes até o serviço ser cancelado"""
+        while True:
+            batch = await self._next_batch()
+            try:
+                self.process_batch(batch)
+            except Exception as e:
+                # Um lote com problema não pode parar o consumidor (run() aguarda a fila esvaziar)
+                self.metrics.failed += len(batch)
+                print(f"Aviso: lote de {len(batch)} leituras não analisado - {str(e) or type(e).__name__}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            # Devolve o controle às fontes entre lotes
+            await asyncio.sleep(0)
+
+    def status(self):
+        """Métricas de vazão/contrapressão e estatísticas da janela de PDI previsto"""
+        status = {'line': self.name, 'model_version': self.monitor.model_version,
+                  **self.metrics.snapshot(self.queue)}
+        window = self.history.window()
+        if window.shape[0]:
+            status['window_size'] = window.shape[0]
+            status['pdi_mean'] = round(float(np.mean(window[:, -2])), 2)
+            status['pdi_std'] = round(float(np.std(window[:, -2])), 2)
+            status['alert_rate'] = round(float(np.mean(window[:, -1])), 4)
+        return status
+
+    async def report_status(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps(self.status(), ensure_ascii=False))
+
+    async def run(self, sources, duration=None, status_interval=None):
+        """Executa as fontes e o consumidor; termina após `duration` segundos ou quando as fontes acabarem"""
+        consumer = asyncio.create_task(self.consume())
+        background = [consumer]
+        if status_interval:
+            background.append(asyncio.create_task(self.report_status(status_interval)))
+        tasks = [asyncio.create_task(source(self)) for source in sources]
+        try:
+            try:
+                if duration is not None:
+                    await asyncio.wait(tasks, timeout=duration)
+                else:
+                    await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            # Processa o que ainda estiver na fila
+            await self.queue.join()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+        return self.status()
+
+
+def simulator_source(rate=1000, noise=0.05, seed=None, total=None):
+    """
+    Fonte simulada: leituras em torno das medianas do pré-processador (ou do centro
+    dos limites de controle), geradas a `rate` leituras por segundo.
+    """
+    async def source(service):
+        names = service.feature_names
+        preprocessor = service.monitor.preprocessor
+        if preprocessor is not None:
+            center = preprocessor.medians.copy()
+        else:
+            center = np.ones(len(names))
+        spread = np.maximum(np.abs(center) * noise, noise)
+        for i, name in enumerate(names):
+            if name in CONTROL_LIMITS:
+                lower, upper = CONTROL_LIMITS[name]
+                center[i] = (lower + upper) / 2
+                spread[i] = (upper - lower) / 4
+        rng = np.random.default_rng(seed)
+
+        tick = 0.01
+        per_tick = max(1, int(round(rate * tick)))
+        sent = 0
+        next_tick = time.perf_counter()
+        while total is None or sent < total:
+            n_rows = per_tick if total is None else min(per_tick, total - sent)
+            block = rng.normal(center, spread, size=(n_rows, len(names)))
+            for row in block:
+                await service.put(dict(zip(names, row.tolist())))
+            sent += n_rows
+            next_tick += tick
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+    return source
+
+
+def file_tail_source(filepath, from_start=False, poll_interval=0.1):
+    """Fonte que acompanha um arquivo de linhas JSON (como `tail -f`)"""
+    async def source(service):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            pending = ''
+            while True:
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    await asyncio.sleep(poll_interval)
+                    continue
+                lines = (pending + chunk).split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        reading = parse_line(line)
+                    except ValueError:
+                        service.metrics.parse_errors += 1
+                        continue
+                    await service.put(reading)
+    return source
+
+
+class _UDPReadingProtocol(asyncio.DatagramProtocol):
+    def __init__(self, service):
+        self.service = service
+
+    def datagram_received(self, data, addr):
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            if not line.strip():
+                continue
+            try:
+                reading = parse_line(line)
+            except ValueError:
+                self.service.metrics.parse_errors += 1
+                continue
+            # UDP não tem controle de fluxo: com a fila cheia a leitura é descartada
+            self.service.put_nowait(reading)
+
+
+def udp_source(host='0.0.0.0', port=9870):
+    """Fonte UDP: cada datagrama contém uma ou mais linhas JSON"""
+    async def source(service):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPReadingProtocol(service), local_addr=(host, port))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            transport.close()
+    return source
+
+
+def tcp_source(host='0.0.0.0', port=9870):
+    """Fonte TCP: cada conexão envia linhas JSON; a fila cheia suspende a leitura do socket"""
+    async def source(service):
+        async def handle(reader, writer):
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+                    try:
+                        reading = parse_line(line)
+                    except ValueError:
+                        service.metrics.parse_errors += 1
+                        continue
+                    await service.put(reading)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        async with server:
+            await server.serve_forever()
+    return source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitoramento contínuo do PDI")
+    parser.add_argument('--source', choices=['simulator', 'file', 'udp', 'tcp'], default='simulator')
+    parser.add_argument('--model', default=os.path.join(MODEL_DIR, 'pdi_model_bayesian.npz'),
+                        help="Modelo (.npz compacto ou .pkl)")
+    parser.add_argument('--preprocessor', default=os.path.join(MODEL_DIR, 'preprocessor.npz'))
+    parser.add_argument('--path', help="Arquivo de linhas JSON (fonte file)")
+    parser.add_argument('--from-start', action='store_true', help="Lê o arquivo desde o início")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=9870)
+    parser.add_argument('--rate', type=float, default=1000, help="Leituras por segundo do simulador")
+    parser.add_argument('--duration', type=float, default=None, help="Tempo de execução (s)")
+    parser.add_argument('--line', default='linha', help="Identificação da linha de produção")
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE)
+    parser.add_argument('--history', type=int, default=STREAM_HISTORY)
+    parser.add_argument('--status-interval', type=float, default=5.0)
+    parser.add_argument('--watch', action='store_true',
+                        help="Recarrega automaticamente novas versões do modelo salvas em MODEL_DIR")
+    parser.add_argument('--validation', metavar='CSV',
+                        help="Amostra reservada (CSV no formato dos dados de treino) para validar cada versão "
+                             "recarregada por --watch")
+    args = parser.parse_args()
+
+    preprocessor_path = args.preprocessor if os.path.exists(args.preprocessor) else None
+    monitor = PDIMonitor(args.model, preprocessor_path)
+    if args.watch:
+        validation_data = None
+        if args.validation:
+            processor = DataProcessor(args.validation)
+            if not processor.load_data(use_cache=False):
+                parser.error(f"não foi possível ler a amostra de validação {args.validation}")
+            if 'PDI' not in processor.df.columns:
+                parser.error(f"a amostra de validação {args.validation} não tem a coluna PDI")
+            validation_data = (processor.df.drop(['PDI', 'Finos'], axis=1, errors='ignore'), processor.df['PDI'])
+        else:
+            print("Aviso: sem --validation, novas versões do modelo são recarregadas sem validação")
+        monitor.start_watching(os.path.dirname(args.model) or '.', validation_data=validation_data)
+    service = StreamingMonitorService(monitor, name=args.line, batch_size=args.batch_size,
+                                      history=args.history)
+
+    if args.source == 'simulator':
+        source = simulator_source(rate=args.rate)
+    elif args.source == 'file':
+        if not args.path:
+            parser.error("--path é obrigatório para a fonte file")
+        source = file_tail_source(args.path, from_start=args.from_start)
+    elif args.source == 'udp':
+        source = udp_source(args.host, args.port)
+    else:
+        source = tcp_source(args.host, args.port)
+
+    try:
+        final = asyncio.run(service.run([source], duration=args.duration,
+                                        status_interval=args.status_interval))
+    except KeyboardInterrupt:
+        final = service.status()
+    if args.watch:
+        monitor.stop_watching()
+        final['reload'] = {key: value for key, value in monitor.reload_status().items() if key != 'events'}
+    print("\nResumo do monitoramento contínuo:")
+    print(json.dumps(final, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR, CHUNK_SIZE, STATS_CACHE_SIZE
+from fingerprint import content_fingerprint
+
+# Estatísticas já calculadas neste processo, pela impressão digital dos dados (da menos à mais usada)
+_memory_cache = OrderedDict()
+
+
+class SummaryStats:
+    """
+    Contagem, média, variância, covariância/correlação, mínimo, máximo e nulos
+    das colunas numéricas, calculados em uma única passada por blocos.
+
+    Como em DataFrame.corr(), cada par de colunas usa as linhas em que as duas
+    estão preenchidas: para cada par guardam-se a contagem, as médias de cada
+    coluna nessas linhas e os co-momentos centrados. Blocos (ou resultados de
+    processos diferentes) são combinados com as fórmulas de Chan, sem perda de
+    precisão por somas de quadrados brutas.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n_rows = 0
+        self.pair_count = np.zeros((k, k))
+        # pair_mean[i, j]: média da coluna i nas linhas em que i e j estão preenchidas
+        self.pair_mean = np.zeros((k, k))
+        # pair_m2[i, j]: soma dos quadrados centrados da coluna i nessas linhas
+        self.pair_m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    @classmethod
+    def from_chunks(cls, chunks, columns=None):
+        """Estatísticas de uma sequência de DataFrames (ex.: DataProcessor.iter_preprocessed)"""
+        stats = None
+        for chunk in chunks:
+            if stats is None:
+                stats = cls(columns if columns is not None else chunk.select_dtypes(include='number').columns)
+            stats.update(chunk)
+        if stats is None:
+            raise ValueError("Nenhum bloco de dados para calcular as estatísticas")
+        return stats
+
+    @classmethod
+    def from_frame(cls, df, chunksize=CHUNK_SIZE):
+        columns = df.select_dtypes(include='number').columns
+        return cls.from_chunks((df.iloc[start:start + chunksize] for start in range(0, max(len(df), 1), chunksize)),
+                               columns)
+
+    def update(self, chunk):
+        """Acrescenta um bloco de linhas (DataFrame com as colunas de self.columns)"""
+        values = chunk[self.columns].to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            return self
+        self.merge(self._chunk_stats(values))
+        return self
+
+    def _chunk_stats(self, values):
+        chunk = SummaryStats(self.columns)
+        valid = ~np.isnan(values)
+        mask = valid.astype(np.float64)
+        # Desloca cada coluna pela sua média no bloco: os produtos abaixo ficam pequenos e sem cancelamento
+        filled = valid.any(axis=0)
+        shift = np.zeros(len(self.columns))
+        shift[filled] = np.nanmean(values[:, filled], axis=0)
+        centered = np.where(valid, values - shift, 0.0)
+
+        count = mask.T @ mask
+        sums = centered.T @ mask                       # [i, j]: soma de x_i nas linhas com i e j
+        squares = (centered ** 2).T @ mask
+        products = centered.T @ centered
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, sums / count, 0.0)
+        chunk.n_rows = len(values)
+        chunk.pair_count = count
+        chunk.pair_mean = mean + shift[:, None]
+        chunk.pair_m2 = squares - count * mean ** 2
+        chunk.comoment = products - count * mean * mean.T
+        chunk.min = np.where(valid, values, np.inf).min(axis=0)
+        chunk.max = np.where(valid, values, -np.inf).max(axis=0)
+        return chunk
+
+    def merge(self, other):
+        """Combina com as estatísticas de outro bloco ou processo (mesmas colunas), no lugar"""
+        if other.columns != self.columns:
+            raise ValueError("Estatísticas com colunas diferentes não podem ser combinadas")
+        n_a, n_b = self.pair_count, other.pair_count
+        n = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, n_a * n_b / n, 0.0)
+            delta = other.pair_mean - self.pair_mean
+            self.pair_mean = np.where(n > 0, (n_a * self.pair_mean + n_b * other.pair_mean) / n, 0.0)
+        self.pair_m2 = self.pair_m2 + other.pair_m2 + weight * delta ** 2
+        self.comoment = self.comoment + other.comoment + weight * delta * delta.T
+        self.pair_count = n
+        self.n_rows += other.n_rows
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    @property
+    def count(self):
+        return pd.Series(np.diag(self.pair_count), index=self.columns)
+
+    @property
+    def mean(self):
+        return pd.Series(np.diag(self.pair_mean), index=self.columns)
+
+    def variance(self, ddof=1):
+        n = np.diag(self.pair_count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(np.where(n > ddof, np.diag(self.pair_m2) / (n - ddof), np.nan), index=self.columns)
+
+    def null_counts(self):
+        return pd.Series(self.n_rows - np.diag(self.pair_count), index=self.columns).astype(int)
+
+    def covariance(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(self.pair_count > ddof, self.comoment / (self.pair_count - ddof), np.nan)
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def correlation(self, columns=None):
+        """Correlação de Pearson por pares, como DataFrame.corr()"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = self.comoment / np.sqrt(self.pair_m2 * self.pair_m2.T)
+        values = np.where(self.pair_count > 1, np.clip(values, -1.0, 1.0), np.nan)
+        corr = pd.DataFrame(values, index=self.columns, columns=self.columns)
+        return corr.loc[columns, columns] if columns is not None else corr
+
+    def describe(self):
+        """count, mean, std, min e max por coluna (os quartis exigem outra passada)"""
+        return pd.DataFrame({
+            'count': self.count,
+            'mean': self.mean,
+            'std': np.sqrt(self.variance()),
+            'min': pd.Series(np.where(np.isfinite(self.min), self.min, np.nan), index=self.columns),
+            'max': pd.Series(np.where(np.isfinite(self.max), self.max, np.nan), index=self.columns),
+        }).T
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Arquivo temporário por processo: vários processos de gráficos podem salvar ao mesmo tempo
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, columns=np.array(self.columns), n_rows=self.n_rows, pair_count=self.pair_count,
+                     pair_mean=self.pair_mean, pair_m2=self.pair_m2, comoment=self.comoment,
+                     min=self.min, max=self.max)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        stats = cls(data['columns'].tolist())
+        stats.n_rows = int(data['n_rows'])
+        for name in ('pair_count', 'pair_mean', 'pair_m2', 'comoment', 'min', 'max'):
+            setattr(stats, name, data[name])
+        return stats
+
+
+def cached_stats(key, compute):
+    """
+    Estatísticas identificadas por key (impressão digital dos dados): primeiro na
+    memória do processo, depois em CACHE_DIR; se não houver, compute() é chamado e salvo.
+    Os dois caches guardam no máximo STATS_CACHE_SIZE entradas, descartando as usadas há mais tempo.
+    """
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+    path = Path(CACHE_DIR) / f"stats_{key}.npz"
+    try:
+        stats = SummaryStats.load(path)
+        # A data de modificação marca o último uso, para o descarte em _prune_stats_files
+        os.utime(path)
+    except FileNotFoundError:
+        stats = compute()
+        stats.save(path)
+        _prune_stats_files()
+    _memory_cache[key] = stats
+    while len(_memory_cache) > STATS_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return stats
+
+
+def _prune_stats_files():
+    """Remove de CACHE_DIR os arquivos de estatísticas além dos STATS_CACHE_SIZE usados mais recentemente"""
+    files = []
+    for path in Path(CACHE_DIR).glob("stats_*.npz"):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            # Já removido por outro processo
+            continue
+    files.sort(reverse=True)
+    for _, path in files[STATS_CACHE_SIZE:]:
+        path.unlink(missing_ok=True)
+
+
+def frame_stats(df):
+    """Estatísticas de um DataFrame em memória, reaproveitadas enquanto o conteúdo for o mesmo"""
+    numeric = df.select_dtypes(include='number')
+    return cached_stats(content_fingerprint(list(numeric.columns), numeric), lambda: SummaryStats.from_frame(numeric))
@@ -1,121 +1,183 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from pathlib import Path
-from config import PLOT_DIR
-
-class Visualization:
-    @staticmethod
-    def plot_combined_results(model, df, features, model_step_name='regressor', save=False):
-        """
-        Plota os 4 gráficos combinados com nome do passo configurável
-        """
-        plt.figure(figsize=(20, 15))
-
-        # Gráfico 1: Importância das Variáveis
-        plt.subplot(2, 2, 1)
-        Visualization._plot_feature_importance(model, features, model_step_name)
-
-        # Gráfico 2: Relação Temperatura vs PDI
-        plt.subplot(2, 2, 2)
-        Visualization._plot_temp_vs_pdi(df)
-
-        # Gráfico 3: Relação Amperagem vs PDI
-        plt.subplot(2, 2, 3)
-        Visualization._plot_amperage_vs_pdi(df)
-
-        # Gráfico 4: Matriz de Correlação
-        plt.subplot(2, 2, 4)
-        Visualization._plot_correlation_matrix(df, features)
-
-        plt.tight_layout()
-        if save:
-            Visualization.save_plot("combined_results")
-        else:
-            plt.show()
-
-    @staticmethod
-    def _plot_feature_importance(model, features, model_step_name):
-        """Gráfico de importância com nome do passo configurável"""
-        try:
-            if hasattr(model.named_steps[model_step_name], 'feature_importances_'):
-                importances = model.named_steps[model_step_name].feature_importances_
-                indices = np.argsort(importances)[::-1]
-
-                plt.title('Importância das Variáveis', fontsize=14)
-                bars = plt.barh(range(len(indices)), importances[indices], color='royalblue')
-                plt.yticks(range(len(indices)), [features[i] for i in indices])
-                plt.xlabel('Importância Relativa', fontsize=12)
-
-                for bar in bars:
-                    width = bar.get_width()
-                    plt.text(width + 0.01, bar.get_y() + bar.get_height()/2,
-                            f'{width:.2f}', ha='left', va='center')
-            elif hasattr(model.named_steps[model_step_name], 'coef_'):
-                coefs = model.named_steps[model_step_name].coef_
-                indices = np.argsort(np.abs(coefs))[::-1]
-                plt.title('Importância das Variáveis (coeficientes)', fontsize=14)
-                bars = plt.barh(range(len(indices)), coefs[indices], color='royalblue')
-                plt.yticks(range(len(indices)), [features[i] for i in indices])
-                plt.xlabel('Coeficiente', fontsize=12)
-                for bar in bars:
-                    width = bar.get_width()
-                    plt.text(width + 0.01, bar.get_y() + bar.get_height()/2,
-                             f'{width:.2f}', ha='left', va='center')
-            else:
-                plt.title('Importância não disponível')
-        except Exception as e:
-            plt.title('Importância não disponível')
-            print(f"Aviso: Não foi possível plotar importância - {e}")
-
-    @staticmethod
-    def _plot_temp_vs_pdi(df):
-        """Relação entre temperatura do condicionador e PDI"""
-        sns.regplot(x='Temp_Condicionador', y='PDI', data=df, scatter_kws={'alpha':0.6})
-        plt.axvline(x=78, color='r', linestyle='--')
-        plt.title('Relação entre Temperatura e PDI')
-
-    @staticmethod
-    def _plot_amperage_vs_pdi(df):
-        """Relação entre amperagem da peletizadora e PDI"""
-        sns.regplot(x='Amperagem_Peletizadora', y='PDI', data=df, scatter_kws={'alpha':0.6})
-        plt.axvline(x=650, color='r', linestyle='--')
-        plt.title('Relação entre Amperagem e PDI')
-
-    @staticmethod
-    def _plot_correlation_matrix(df, features):
-        """Matriz de correlação entre variáveis"""
-        corr = df[features + ['PDI']].corr()
-        sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
-        plt.title('Matriz de Correlação')
-
-    @staticmethod
-    def plot_actual_vs_predicted(y_true, y_pred, save=False):
-        plt.figure(figsize=(8, 6))
-        plt.scatter(y_true, y_pred, alpha=0.6)
-        plt.plot([min(y_true), max(y_true)], [min(y_true), max(y_true)], 'r--')
-        plt.xlabel('Valores Reais')
-        plt.ylabel('Valores Preditos')
-        plt.title('Valores Reais vs Preditos')
-        if save:
-            Visualization.save_plot("actual_vs_predicted")
-        else:
-            plt.show()
-
-    @staticmethod
-    def plot_residuals(y_true, y_pred, save=False):
-        residuals = y_true - y_pred
-        plt.figure(figsize=(8, 6))
-        sns.histplot(residuals, kde=True)
-        plt.xlabel('Resíduos')
-        plt.title('Distribuição dos Resíduos')
-        if save:
-            Visualization.save_plot("residuals")
-        else:
-            plt.show()
-
-    @staticmethod
-    def save_plot(filename):
-        Path(PLOT_DIR).mkdir(parents=True, exist_ok=True)
-        plt.savefig(f"{PLOT_DIR}/{filename}.png")
-        plt.close()
+import matplotlib.pyplot as plt
+import seaborn as sns
+import numpy as np
+from pathlib import Path
+from config import PLOT_DIR
+from sensitivity import SensitivityAnalysis
+from summary_stats import frame_stats
+from plot_aggregation import is_large, plot_distribution, plot_relationship, density_2d
+from matplotlib.colors import LogNorm
+
+class Visualization:
+    @staticmethod
+    def plot_combined_results(model, df, features, model_step_name='regressor', save=False,
+                              filename='combined_results'):
+        """
+        Plota os 4 gráficos combinados com nome do passo configurável
+        """
+        plt.figure(figsize=(20, 15))
+
+        # Gráfico 1: Importância das Variáveis
+        plt.subplot(2, 2, 1)
+        Visualization._plot_feature_importance(model, features, model_step_name)
+
+        # Gráfico 2: Relação Temperatura vs PDI
+        plt.subplot(2, 2, 2)
+        Visualization._plot_temp_vs_pdi(df)
+
+        # Gráfico 3: Relação Amperagem vs PDI
+        plt.subplot(2, 2, 3)
+        Visualization._plot_amperage_vs_pdi(df)
+
+        # Gráfico 4: Matriz de Correlação
+        plt.subplot(2, 2, 4)
+        Visualization._plot_correlation_matrix(df, features)
+
+        plt.tight_layout()
+        if save:
+            return Visualization.save_plot(filename)
+        plt.show()
+
+    @staticmethod
+    def _plot_feature_importance(model, features, model_step_name):
+        """Gráfico de importância com nome do passo configurável"""
+        try:
+            if hasattr(model.named_steps[model_step_name], 'feature_importances_'):
+                importances = model.named_steps[model_step_name].feature_importances_
+                indices = np.argsort(importances)[::-1]
+
+                plt.title('Importância das Variáveis', fontsize=14)
+                bars = plt.barh(range(len(indices)), importances[indices], color='royalblue')
+                plt.yticks(range(len(indices)), [features[i] for i in indices])
+                plt.xlabel('Importância Relativa', fontsize=12)
+
+                for bar in bars:
+                    width = bar.get_width()
+                    plt.text(width + 0.01, bar.get_y() + bar.get_height()/2,
+                            f'{width:.2f}', ha='left', va='center')
+            elif hasattr(model.named_steps[model_step_name], 'coef_'):
+                coefs = model.named_steps[model_step_name].coef_
+                indices = np.argsort(np.abs(coefs))[::-1]
+                plt.title('Importância das Variáveis (coeficientes)', fontsize=14)
+                bars = plt.barh(range(len(indices)), coefs[indices], color='royalblue')
+                plt.yticks(range(len(indices)), [features[i] for i in indices])
+                plt.xlabel('Coeficiente', fontsize=12)
+                for bar in bars:
+                    width = bar.get_width()
+                    plt.text(width + 0.01, bar.get_y() + bar.get_height()/2,
+                             f'{width:.2f}', ha='left', va='center')
+            else:
+                plt.title('Importância não disponível')
+        except Exception as e:
+            plt.title('Importância não disponível')
+            print(f"Aviso: Não foi possível plotar importância - {e}")
+
+    @staticmethod
+    def _plot_temp_vs_pdi(df):
+        """Relação entre temperatura do condicionador e PDI"""
+        Visualization._plot_relationship(df, 'Temp_Condicionador', 'PDI')
+        plt.axvline(x=78, color='r', linestyle='--')
+        plt.title('Relação entre Temperatura e PDI')
+
+    @staticmethod
+    def _plot_amperage_vs_pdi(df):
+        """Relação entre amperagem da peletizadora e PDI"""
+        Visualization._plot_relationship(df, 'Amperagem_Peletizadora', 'PDI')
+        plt.axvline(x=650, color='r', linestyle='--')
+        plt.title('Relação entre Amperagem e PDI')
+
+    @staticmethod
+    def _plot_relationship(df, x, y):
+        """regplot em bases pequenas; densidade, amostra e média por faixa em bases grandes"""
+        if is_large(len(df)):
+            plot_relationship(df[x], df[y])
+            plt.xlabel(x)
+            plt.ylabel(y)
+        else:
+            sns.regplot(x=x, y=y, data=df, scatter_kws={'alpha':0.6})
+
+    @staticmethod
+    def _plot_correlation_matrix(df, features):
+        """Matriz de correlação entre variáveis"""
+        corr = frame_stats(df).correlation(features + ['PDI'])
+        sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
+        plt.title('Matriz de Correlação')
+
+    @staticmethod
+    def plot_actual_vs_predicted(y_true, y_pred, save=False, filename='actual_vs_predicted'):
+        plt.figure(figsize=(8, 6))
+        if is_large(len(y_true)):
+            counts, x_edges, y_edges = density_2d(y_true, y_pred)
+            plt.pcolormesh(x_edges, y_edges, counts.T, cmap='Blues', norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)))
+            plt.colorbar(label='Leituras')
+        else:
+            plt.scatter(y_true, y_pred, alpha=0.6)
+        lower, upper = np.min(y_true), np.max(y_true)
+        plt.plot([lower, upper], [lower, upper], 'r--')
+        plt.xlabel('Valores Reais')
+        plt.ylabel('Valores Preditos')
+        plt.title('Valores Reais vs Preditos')
+        if save:
+            return Visualization.save_plot(filename)
+        plt.show()
+
+    @staticmethod
+    def plot_residuals(y_true, y_pred, save=False, filename='residuals'):
+        residuals = y_true - y_pred
+        plt.figure(figsize=(8, 6))
+        if is_large(len(residuals)):
+            plot_distribution(residuals)
+        else:
+            sns.histplot(residuals, kde=True)
+        plt.xlabel('Resíduos')
+        plt.title('Distribuição dos Resíduos')
+        if save:
+            return Visualization.save_plot(filename)
+        plt.show()
+
+    @staticmethod
+    def plot_sensitivity_analysis(df, feature_x, feature_y, target, model, save=False, n_grid=20, n_samples=200,
+                                  filename=None):
+        """
+        Curvas PD/ICE de feature_x e feature_y e mapa da PD conjunta do par.
+        Retorna os arrays calculados por SensitivityAnalysis (com o caminho do PNG em 'path', se salvo).
+        Sem filename, o arquivo é sensitivity_<feature_x>_<feature_y>.
+        """
+        features = list(getattr(model, 'feature_names_in_', [])) or \
+            [col for col in df.columns if col not in (target, 'PDI', 'Finos')]
+        analysis = SensitivityAnalysis(model, df[features], n_grid=n_grid, n_samples=n_samples)
+        results = analysis.run(features=[feature_x, feature_y], pairs=[(feature_x, feature_y)])
+
+        plt.figure(figsize=(20, 6))
+        for position, feature in enumerate((feature_x, feature_y), start=1):
+            curve = results['one_way'][feature]
+            plt.subplot(1, 3, position)
+            plt.plot(curve['grid'], curve['ice'].T, color='gray', alpha=0.15, linewidth=0.8)
+            plt.plot(curve['grid'], curve['pd'], color='royalblue', linewidth=3, label='Dependência parcial')
+            plt.xlabel(feature)
+            plt.ylabel(f'{target} previsto')
+            plt.title(f'Sensibilidade do {target} a {feature}')
+            plt.legend()
+
+        surface = results['two_way'][(feature_x, feature_y)]
+        plt.subplot(1, 3, 3)
+        contour = plt.contourf(surface['grid_x'], surface['grid_y'], surface['pd'].T, levels=20, cmap='viridis')
+        plt.colorbar(contour, label=f'{target} previsto')
+        plt.xlabel(feature_x)
+        plt.ylabel(feature_y)
+        plt.title(f'Dependência parcial conjunta: {feature_x} x {feature_y}')
+
+        plt.tight_layout()
+        if save:
+            results['path'] = Visualization.save_plot(filename or f"sensitivity_{feature_x}_{feature_y}")
+        else:
+            plt.show()
+        return results
+
+    @staticmethod
+    def save_plot(filename):
+        Path(PLOT_DIR).mkdir(parents=True, exist_ok=True)
+        path = f"{PLOT_DIR}/{filename}.png"
+        plt.savefig(path)
+        plt.close()
+        return path
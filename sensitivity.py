@@ -0,0 +1,16 @@
+"""
+Análise de sensibilidade (PD/ICE) para os scripts da raiz.
+
+A implementação fica em peletizadora/modules/sensitivity.py; este arquivo carrega
+aquele módulo e o registra com o nome 'sensitivity', para que haja uma única cópia
+do código (inclusive nos processos criados por SensitivityAnalysis.run).
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location(
+    __name__, Path(__file__).resolve().parent / 'peletizadora' / 'modules' / 'sensitivity.py')
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
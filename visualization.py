@@ -1,99 +1,141 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-
-class Visualization:
-    @staticmethod
-    def plot_combined_results(model, df, features):
-        """
-        Plota os 4 gráficos combinados conforme especificado
-        
-        Args:
-            model: Modelo treinado (deve ter feature_importances_)
-            df: DataFrame com os dados (já com nomes de colunas corrigidos)
-            features: Lista de nomes das features originais
-        """
-        # Mapeamento de nomes para os gráficos
-        feature_names_for_plot = {
-            'Temp_Condicionador': 'Porc Temp Condicionador',
-            'Amperagem_Peletizadora': 'Amperagem Peletizadora'
-        }
-        
-        # Converter nomes das features para exibição
-        display_features = [feature_names_for_plot.get(f, f) for f in features]
-        
-        plt.figure(figsize=(18, 12))
-        
-        # Gráfico 1: Importância das Variáveis
-        plt.subplot(2, 2, 1)
-        if hasattr(model.named_steps['regressor'], 'feature_importances_'):
-            importancias = model.named_steps['regressor'].feature_importances_
-            indices = np.argsort(importancias)[::-1]
-            
-            plt.title('Importância das Variáveis')
-            plt.barh(range(len(indices)), importancias[indices], color='b', align='center')
-            plt.yticks(range(len(indices)), [display_features[i] for i in indices])
-            plt.xlabel('Importância Relativa')
-        
-        # Gráfico 2: Relação Temperatura vs PDI
-        plt.subplot(2, 2, 2)
-        if 'Porc Temp Condicionador' in df.columns:
-            sns.regplot(x='Porc Temp Condicionador', y='PDI', data=df, scatter_kws={'alpha':0.6})
-            plt.axvline(x=78, color='r', linestyle='--')
-            plt.title('Relação entre Temperatura e PDI')
-        
-        # Gráfico 3: Relação Amperagem vs PDI
-        plt.subplot(2, 2, 3)
-        if 'Amperagem Peletizadora' in df.columns:
-            sns.regplot(x='Amperagem Peletizadora', y='PDI', data=df, scatter_kws={'alpha':0.6})
-            plt.axvline(x=650, color='r', linestyle='--')
-            plt.title('Relação entre Amperagem e PDI')
-        
-        # Gráfico 4: Matriz de Correlação
-        plt.subplot(2, 2, 4)
-        cols_for_corr = [feature_names_for_plot.get(f, f) for f in features] + ['PDI']
-        cols_for_corr = [c for c in cols_for_corr if c in df.columns]
-        
-        if len(cols_for_corr) > 1:
-            corr = df[cols_for_corr].corr()
-            sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
-            plt.title('Matriz de Correlação')
-        
-        plt.tight_layout()
-        plt.show()
-
-    # ... (mantenha os outros métodos existentes)
-
-    @staticmethod
-    def _plot_feature_importance(model, features):
-        """Gráfico de importância das variáveis"""
-        importancias = model.named_steps['regressor'].feature_importances_
-        indices = np.argsort(importancias)[::-1]
-        
-        plt.title('Importância das Variáveis')
-        plt.barh(range(len(indices)), importancias[indices], color='b', align='center')
-        plt.yticks(range(len(indices)), [features[i] for i in indices])
-        plt.xlabel('Importância Relativa')
-
-    @staticmethod
-    def _plot_temp_vs_pdi(df):
-        """Relação entre temperatura do condicionador e PDI"""
-        sns.regplot(x='Porc Temp Condicionador', y='PDI', data=df, 
-                   scatter_kws={'alpha':0.6})
-        plt.axvline(x=78, color='r', linestyle='--')
-        plt.title('Relação entre Temperatura e PDI')
-
-    @staticmethod
-    def _plot_amperage_vs_pdi(df):
-        """Relação entre amperagem da peletizadora e PDI"""
-        sns.regplot(x='Amperagem Peletizadora', y='PDI', data=df, 
-                   scatter_kws={'alpha':0.6})
-        plt.axvline(x=650, color='r', linestyle='--')
-        plt.title('Relação entre Amperagem e PDI')
-
-    @staticmethod
-    def _plot_correlation_matrix(df, features):
-        """Matriz de correlação entre variáveis"""
-        corr = df[features + ['PDI']].corr()
-        sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
-        plt.title('Matriz de Correlação')
\ No newline at end of file
+import matplotlib.pyplot as plt
+import seaborn as sns
+import numpy as np
+from sensitivity import SensitivityAnalysis
+
+class Visualization:
+    @staticmethod
+    def plot_combined_results(model, df, features):
+        """
+        Plota os 4 gráficos combinados conforme especificado
+        
+        Args:
+            model: Modelo treinado (deve ter feature_importances_)
+            df: DataFrame com os dados (já com nomes de colunas corrigidos)
+            features: Lista de nomes das features originais
+        """
+        # Mapeamento de nomes para os gráficos
+        feature_names_for_plot = {
+            'Temp_Condicionador': 'Porc Temp Condicionador',
+            'Amperagem_Peletizadora': 'Amperagem Peletizadora'
+        }
+        
+        # Converter nomes das features para exibição
+        display_features = [feature_names_for_plot.get(f, f) for f in features]
+        
+        plt.figure(figsize=(18, 12))
+        
+        # Gráfico 1: Importância das Variáveis
+        plt.subplot(2, 2, 1)
+        if hasattr(model.named_steps['regressor'], 'feature_importances_'):
+            importancias = model.named_steps['regressor'].feature_importances_
+            indices = np.argsort(importancias)[::-1]
+            
+            plt.title('Importância das Variáveis')
+            plt.barh(range(len(indices)), importancias[indices], color='b', align='center')
+            plt.yticks(range(len(indices)), [display_features[i] for i in indices])
+            plt.xlabel('Importância Relativa')
+        
+        # Gráfico 2: Relação Temperatura vs PDI
+        plt.subplot(2, 2, 2)
+        if 'Porc Temp Condicionador' in df.columns:
+            sns.regplot(x='Porc Temp Condicionador', y='PDI', data=df, scatter_kws={'alpha':0.6})
+            plt.axvline(x=78, color='r', linestyle='--')
+            plt.title('Relação entre Temperatura e PDI')
+        
+        # Gráfico 3: Relação Amperagem vs PDI
+        plt.subplot(2, 2, 3)
+        if 'Amperagem Peletizadora' in df.columns:
+            sns.regplot(x='Amperagem Peletizadora', y='PDI', data=df, scatter_kws={'alpha':0.6})
+            plt.axvline(x=650, color='r', linestyle='--')
+            plt.title('Relação entre Amperagem e PDI')
+        
+        # Gráfico 4: Matriz de Correlação
+        plt.subplot(2, 2, 4)
+        cols_for_corr = [feature_names_for_plot.get(f, f) for f in features] + ['PDI']
+        cols_for_corr = [c for c in cols_for_corr if c in df.columns]
+        
+        if len(cols_for_corr) > 1:
+            corr = df[cols_for_corr].corr()
+            sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
+            plt.title('Matriz de Correlação')
+        
+        plt.tight_layout()
+        plt.show()
+
+    # ... (mantenha os outros métodos existentes)
+
+    @staticmethod
+    def _plot_feature_importance(model, features):
+        """Gráfico de importância das variáveis"""
+        importancias = model.named_steps['regressor'].feature_importances_
+        indices = np.argsort(importancias)[::-1]
+        
+        plt.title('Importância das Variáveis')
+        plt.barh(range(len(indices)), importancias[indices], color='b', align='center')
+        plt.yticks(range(len(indices)), [features[i] for i in indices])
+        plt.xlabel('Importância Relativa')
+
+    @staticmethod
+    def _plot_temp_vs_pdi(df):
+        """Relação entre temperatura do condicionador e PDI"""
+        sns.regplot(x='Porc Temp Condicionador', y='PDI', data=df, 
+                   scatter_kws={'alpha':0.6})
+        plt.axvline(x=78, color='r', linestyle='--')
+        plt.title('Relação entre Temperatura e PDI')
+
+    @staticmethod
+    def _plot_amperage_vs_pdi(df):
+        """Relação entre amperagem da peletizadora e PDI"""
+        sns.regplot(x='Amperagem Peletizadora', y='PDI', data=df, 
+                   scatter_kws={'alpha':0.6})
+        plt.axvline(x=650, color='r', linestyle='--')
+        plt.title('Relação entre Amperagem e PDI')
+
+    @staticmethod
+    def _plot_correlation_matrix(df, features):
+        """Matriz de correlação entre variáveis"""
+        corr = df[features + ['PDI']].corr()
+        sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
+        plt.title('Matriz de Correlação')
+
+    @staticmethod
+    def plot_sensitivity_analysis(df, feature_x, feature_y, target, model, save=False, n_grid=20, n_samples=200,
+                                  filename=None):
+        """
+        Curvas PD/ICE de feature_x e feature_y e mapa da PD conjunta do par.
+        Retorna os arrays calculados por SensitivityAnalysis; com save, grava
+        <filename>.png em vez de abrir a janela e inclui o caminho em 'path'.
+        """
+        features = list(getattr(model, 'feature_names_in_', [])) or \
+            [col for col in df.columns if col not in (target, 'PDI', 'Finos')]
+        analysis = SensitivityAnalysis(model, df[features], n_grid=n_grid, n_samples=n_samples)
+        results = analysis.run(features=[feature_x, feature_y], pairs=[(feature_x, feature_y)])
+
+        plt.figure(figsize=(20, 6))
+        for position, feature in enumerate((feature_x, feature_y), start=1):
+            curve = results['one_way'][feature]
+            plt.subplot(1, 3, position)
+            plt.plot(curve['grid'], curve['ice'].T, color='gray', alpha=0.15, linewidth=0.8)
+            plt.plot(curve['grid'], curve['pd'], color='royalblue', linewidth=3, label='Dependência parcial')
+            plt.xlabel(feature)
+            plt.ylabel(f'{target} previsto')
+            plt.title(f'Sensibilidade do {target} a {feature}')
+            plt.legend()
+
+        surface = results['two_way'][(feature_x, feature_y)]
+        plt.subplot(1, 3, 3)
+        contour = plt.contourf(surface['grid_x'], surface['grid_y'], surface['pd'].T, levels=20, cmap='viridis')
+        plt.colorbar(contour, label=f'{target} previsto')
+        plt.xlabel(feature_x)
+        plt.ylabel(feature_y)
+        plt.title(f'Dependência parcial conjunta: {feature_x} x {feature_y}')
+
+        plt.tight_layout()
+        if save:
+            results['path'] = f"{filename or f'sensitivity_{feature_x}_{feature_y}'}.png"
+            plt.savefig(results['path'])
+            plt.close()
+        else:
+            plt.show()
+        return results